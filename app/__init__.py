@@ -1,9 +1,18 @@
-from .db_mysql import MySQLDB
-from .db_postgres import PostgresDB
+from .drivers import DRIVERS, client_class
+
+# Client classes are resolved on attribute access so importing the package loads no database driver;
+# MSSQL/Oracle stay out of __all__ so a star import never needs their system libraries
+_CLIENT_CLASSES = {class_name: dbtype for dbtype, (_, class_name) in DRIVERS.items()}
+
+
+def __getattr__(name: str):
+    if name in _CLIENT_CLASSES:
+        return client_class(_CLIENT_CLASSES[name])
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-# Avoid importing MSSQL/Oracle connectors here to prevent ImportError on missing system libs
 
 __all__ = [
     "MySQLDB",
     "PostgresDB",
+    "SQLiteDB",
 ]
@@ -1,3 +1,5 @@
+import contextvars
+import hashlib
 from typing import Optional
 from fastapi import HTTPException, status, Security
 from fastapi.security.api_key import APIKeyHeader
@@ -6,6 +8,19 @@ from .config import API_KEYS
 # Define the API key header security scheme (this registers the scheme in OpenAPI)
 api_key_header = APIKeyHeader(name="X-API-KEY", auto_error=False)
 
+# Hash of the key the current request authenticated with, for logs that must not hold the key itself
+_caller_key_hash: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("caller_key_hash", default=None)
+
+def api_key_hash(api_key: str) -> str:
+    return hashlib.sha256(api_key.encode()).hexdigest()[:12]
+
+def caller_key_hash() -> Optional[str]:
+    return _caller_key_hash.get()
+
+def api_key_valid(api_key: Optional[str]) -> bool:
+    """Whether api_key is a configured key; for public routes that show more to authenticated callers."""
+    return bool(API_KEYS) and api_key is not None and api_key in API_KEYS
+
 async def verify_api_key(api_key: Optional[str] = Security(api_key_header)):
     """Verify the incoming X-API-KEY header against configured keys.
 
@@ -17,4 +32,5 @@ async def verify_api_key(api_key: Optional[str] = Security(api_key_header)):
         raise HTTPException(status_code=500, detail="API key(s) not configured")
     if api_key is None or api_key not in API_KEYS:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid or missing API key")
+    _caller_key_hash.set(api_key_hash(api_key))
     return True
@@ -0,0 +1,219 @@
+import json
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Optional, Set, Tuple
+
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries also expire after a time-to-live.
+
+    Least recently used entries are evicted once max_entries is exceeded;
+    expired entries are dropped lazily when they are looked up.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl: float = 60.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                self.misses += 1
+                return default
+            expires_at, value = item
+            if expires_at <= time.monotonic():
+                self._remove(key)
+                self.expirations += 1
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        ttl = self.ttl if ttl is None else ttl
+        if ttl <= 0 or self.max_entries <= 0:
+            return
+        with self._lock:
+            self._store(key, value, ttl)
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            if key not in self._data:
+                return default
+            return self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._cleared()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "entries": len(self._data),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
+
+    # -- bookkeeping hooks for subclasses (called with the lock held) ---------
+
+    def _added(self, key: Hashable, value: Any):
+        pass
+
+    def _removed(self, key: Hashable, value: Any):
+        pass
+
+    def _cleared(self):
+        pass
+
+    def _store(self, key: Hashable, value: Any, ttl: float):
+        if key in self._data:
+            self._remove(key)
+        self._data[key] = (time.monotonic() + ttl, value)
+        self._added(key, value)
+        while len(self._data) > self.max_entries:
+            self._evict_oldest()
+
+    def _remove(self, key: Hashable) -> Any:
+        _, value = self._data.pop(key)
+        self._removed(key, value)
+        return value
+
+    def _evict_oldest(self):
+        key = next(iter(self._data))
+        self._remove(key)
+        self.evictions += 1
+
+
+def _approx_size(rows: List[Dict[str, Any]]) -> int:
+    """Rough in-memory size of a list of row dicts (containers plus keys and values)."""
+    size = sys.getsizeof(rows)
+    for row in rows:
+        size += sys.getsizeof(row)
+        for key, value in row.items():
+            size += sys.getsizeof(key) + sys.getsizeof(value)
+    return size
+
+
+class RecordCache(TTLCache):
+    """LRU + TTL cache of /getRecord results with per-table invalidation.
+
+    Entries are keyed by (dbtype, server, table, fields, parameters) and
+    bounded both by count and by an approximate byte budget. Writes made
+    through this service call invalidate_table(); writes made elsewhere are
+    only picked up when the TTL expires.
+
+    Invalidation works on the bare table name, so "hr.users" and "users"
+    drop each other's entries (as does any other schema's "users"). Each
+    table also has a generation, bumped by every invalidation: a reader
+    takes it before its database read and passes it to put(), which drops
+    the result if a write invalidated the table in between.
+    """
+
+    def __init__(self, max_entries: int, max_bytes: int, ttl: float, table_ttls: Dict[str, float]):
+        super().__init__(max_entries, ttl)
+        self.max_bytes = max_bytes
+        self.table_ttls = table_ttls
+        self.bytes = 0
+        self.invalidations = 0
+        self._sizes: Dict[Hashable, int] = {}
+        self._by_table: Dict[Tuple[str, str, str], Set[Hashable]] = {}
+        self._generations: Dict[Tuple[str, str, str], int] = {}
+
+    @staticmethod
+    def make_key(dbtype: str, server: str, table: str, fields: str, parameters: Dict[str, Any]) -> Tuple:
+        fields_key = ",".join(f.strip().lower() for f in fields.split(","))
+        return (dbtype, server, table.strip().lower(), fields_key,
+                json.dumps(parameters, sort_keys=True, default=str))
+
+    @staticmethod
+    def _table_key(dbtype: str, server: str, table: str) -> Tuple[str, str, str]:
+        """Invalidation group of a table: its bare name, without schema or identifier quotes."""
+        bare = table.strip().lower().rsplit(".", 1)[-1]
+        return (dbtype, server, bare.strip('"`[]'))
+
+    def generation(self, dbtype: str, server: str, table: str) -> int:
+        """Invalidation count of a table, to pass to put() for a result read after this call."""
+        with self._lock:
+            return self._generations.get(self._table_key(dbtype, server, table), 0)
+
+    def ttl_for(self, table: str) -> float:
+        """Table-specific TTL (full "schema.table" name first, then bare table name) or the default."""
+        name = table.strip().lower()
+        if name in self.table_ttls:
+            return self.table_ttls[name]
+        bare = name.rsplit(".", 1)[-1]
+        return self.table_ttls.get(bare, self.ttl)
+
+    def put(self, key: Tuple, rows: List[Dict[str, Any]], generation: Optional[int] = None):
+        """Cache a result, unless its table was invalidated since generation() returned generation."""
+        ttl = self.ttl_for(key[2])
+        if ttl <= 0 or self.max_entries <= 0 or _approx_size(rows) > self.max_bytes:
+            return
+        with self._lock:
+            # A write committed during the read: the rows may predate it
+            if generation is not None and self._generations.get(self._table_key(*key[:3]), 0) != generation:
+                return
+            self._store(key, rows, ttl)
+
+    def invalidate_table(self, dbtype: str, server: str, table: str) -> int:
+        """Drop every cached result for a table on one server; returns how many were removed."""
+        table_key = self._table_key(dbtype, server, table)
+        with self._lock:
+            self._generations[table_key] = self._generations.get(table_key, 0) + 1
+            keys = self._by_table.pop(table_key, set())
+            for key in keys:
+                if key in self._data:
+                    self._remove(key)
+            self.invalidations += len(keys)
+            return len(keys)
+
+    def stats(self) -> Dict[str, Any]:
+        stats = super().stats()
+        with self._lock:
+            stats.update({
+                "bytes": self.bytes,
+                "max_bytes": self.max_bytes,
+                "invalidations": self.invalidations,
+                "default_ttl": self.ttl,
+                "table_ttls": dict(self.table_ttls),
+            })
+        return stats
+
+    def _added(self, key: Hashable, value: Any):
+        size = _approx_size(value)
+        self._sizes[key] = size
+        self.bytes += size
+        self._by_table.setdefault(self._table_key(*key[:3]), set()).add(key)
+        while self.bytes > self.max_bytes and len(self._data) > 1:
+            self._evict_oldest()
+
+    def _removed(self, key: Hashable, value: Any):
+        self.bytes -= self._sizes.pop(key, 0)
+        table_key = self._table_key(*key[:3])
+        keys = self._by_table.get(table_key)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._by_table[table_key]
+
+    def _cleared(self):
+        self._sizes.clear()
+        self._by_table.clear()
+        self.bytes = 0
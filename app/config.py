@@ -81,31 +81,212 @@ PG_CONFIG = {
     "password": os.getenv("PG_PASSWORD"),
 }
 
+# SQLite: a database file (or ":memory:") on this host, for benchmarks and offline testing.
+# The tuning settings are also the defaults for SQLITE_CONFIGS entries that leave them out.
+SQLITE_CONFIG = {
+    "path": os.getenv("SQLITE_PATH"),
+    # WAL lets readers run alongside the single writer
+    "journal_mode": os.getenv("SQLITE_JOURNAL_MODE", "WAL"),
+    # NORMAL is durable across application crashes in WAL mode (not across power loss)
+    "synchronous": os.getenv("SQLITE_SYNCHRONOUS", "NORMAL"),
+    # Bytes of the file read through mmap instead of read() calls (0 = off)
+    "mmap_size": int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024))),
+    # Seconds a statement waits for another connection's lock before "database is locked"
+    "busy_timeout": float(os.getenv("SQLITE_BUSY_TIMEOUT", "5")),
+}
+
 # Multi-DB configs via JSON objects keyed by name
 # Example: MYSQL_CONFIGS={"primary":{"host":"...","port":3306,"db":"...","user":"...","password":"..."},"analytics":{...}}
 MYSQL_CONFIGS: Dict[str, Dict[str, Any]] = _parse_json_env("MYSQL_CONFIGS") or {}
 PG_CONFIGS: Dict[str, Dict[str, Any]] = _parse_json_env("PG_CONFIGS") or {}
 MSSQL_CONFIGS: Dict[str, Dict[str, Any]] = _parse_json_env("MSSQL_CONFIGS") or {}
 ORACLE_CONFIGS: Dict[str, Dict[str, Any]] = _parse_json_env("ORACLE_CONFIGS") or {}
+SQLITE_CONFIGS: Dict[str, Dict[str, Any]] = _parse_json_env("SQLITE_CONFIGS") or {}
+
+# Lookup tables by dbtype so callers can resolve (dbtype, server) without if/elif chains
+DB_CONFIGS: Dict[str, Dict[str, Dict[str, Any]]] = {
+    "oracle": ORACLE_CONFIGS,
+    "mysql": MYSQL_CONFIGS,
+    "postgres": PG_CONFIGS,
+    "mssql": MSSQL_CONFIGS,
+    "sqlite": SQLITE_CONFIGS,
+}
+
+DEFAULT_DB_CONFIGS: Dict[str, Dict[str, Any]] = {
+    "oracle": ORACLE_CONFIG,
+    "mysql": MYSQL_CONFIG,
+    "postgres": PG_CONFIG,
+    "mssql": MSSQL_CONFIG,
+    "sqlite": SQLITE_CONFIG,
+}
+
+def get_db_config(dbtype: str, name: str | None) -> tuple[str, Dict[str, Any]]:
+    """Return (resolved server name, config) for a dbtype, falling back to the single config as "default"."""
+    configs = DB_CONFIGS.get(dbtype, {})
+    if name and name in configs:
+        return name, configs[name]
+    return "default", DEFAULT_DB_CONFIGS[dbtype]
+
+# Settings that mark a single (default) config as filled in, per dbtype
+_DEFAULT_CONFIG_KEYS: Dict[str, tuple] = {
+    "oracle": ("host", "dsn"),
+    "mysql": ("host",),
+    "postgres": ("host",),
+    "mssql": ("server",),
+    "sqlite": ("path",),
+}
+
+def configured_servers() -> List[tuple]:
+    """(dbtype, server name, config) for every server in *_CONFIGS plus each default config that is set."""
+    servers = []
+    for dbtype, configs in DB_CONFIGS.items():
+        for name, config in configs.items():
+            servers.append((dbtype, name, config))
+        default = DEFAULT_DB_CONFIGS[dbtype]
+        if any(default.get(key) for key in _DEFAULT_CONFIG_KEYS[dbtype]):
+            servers.append((dbtype, "default", default))
+    return servers
+
+def _env_float(name: str, default: float) -> float:
+    raw = os.getenv(name)
+    if raw is None or raw == "":
+        return default
+    try:
+        return float(raw)
+    except ValueError:
+        logger.warning(f"Invalid number in {name}: {raw!r}; using {default}")
+        return default
+
+def _env_bool(name: str, default: bool) -> bool:
+    raw = os.getenv(name)
+    if raw is None or raw == "":
+        return default
+    return raw.strip().lower() in ("1", "true", "yes", "on")
+
+# Connection pools (one per (dbtype, server) per worker process)
+# Defaults apply to every server; override per server with a "pool" object inside *_CONFIGS,
+# e.g. ORACLE_CONFIGS={"erp":{..., "pool":{"min_size":2,"max_size":10}}}
+DB_POOL_ENABLED = _env_bool("DB_POOL_ENABLED", True)
+DB_POOL_SETTINGS: Dict[str, float] = {
+    "min_size": int(_env_float("DB_POOL_MIN_SIZE", 0)),
+    "max_size": int(_env_float("DB_POOL_MAX_SIZE", 5)),
+    # Seconds an idle connection may sit in the pool before it is closed (above min_size)
+    "idle_timeout": _env_float("DB_POOL_IDLE_TIMEOUT", 300),
+    # Seconds after which a connection is retired regardless of use (0 = never)
+    "max_lifetime": _env_float("DB_POOL_MAX_LIFETIME", 1800),
+    # Seconds a request waits for a free connection before failing
+    "acquire_timeout": _env_float("DB_POOL_ACQUIRE_TIMEOUT", 30),
+    # Connections idle longer than this are pinged on checkout (0 = ping every checkout)
+    "ping_interval": _env_float("DB_POOL_PING_INTERVAL", 30),
+}
+DB_POOL_REAP_INTERVAL = _env_float("DB_POOL_REAP_INTERVAL", 30)
+
+# Database drivers are imported on first use of their dbtype; list dbtypes here (comma-separated,
+# or "all") to load them at startup instead, e.g. DB_PRELOAD_DRIVERS=oracle,postgres
+DB_PRELOAD_DRIVERS: List[str] = [d.strip().lower() for d in os.getenv("DB_PRELOAD_DRIVERS", "").split(",") if d.strip()]
+
+# Startup warm-up (GET /ready answers 503 until it finishes): every configured server gets its driver
+# loaded, max(min_size, 1) pooled connections opened and its "warmup" statement shapes prepared,
+# e.g. PG_CONFIGS={"app":{..., "warmup":[{"op":"select","table":"users","where":["id"]}]}}
+WARMUP_ENABLED = _env_bool("WARMUP_ENABLED", True)
+# Seconds one server may take to warm up before it is reported as timed out
+WARMUP_TIMEOUT = _env_float("WARMUP_TIMEOUT", 30)
+
+# /health/deep: seconds each database probe may take, seconds one round of results is reused (per worker,
+# so load-balancer polls between rounds never reach the databases), and whether it needs X-API-KEY
+HEALTH_CHECK_TIMEOUT = _env_float("HEALTH_CHECK_TIMEOUT", 5)
+HEALTH_CHECK_CACHE_TTL = _env_float("HEALTH_CHECK_CACHE_TTL", 10)
+HEALTH_REQUIRE_API_KEY = _env_bool("HEALTH_REQUIRE_API_KEY", False)
+
+def get_pool_settings(config: Dict[str, Any]) -> Dict[str, float]:
+    """Merge the global pool defaults with a server's optional "pool" overrides."""
+    settings = dict(DB_POOL_SETTINGS)
+    overrides = config.get("pool") if isinstance(config, dict) else None
+    if isinstance(overrides, dict):
+        for key, value in overrides.items():
+            if key in settings:
+                settings[key] = type(settings[key])(value)
+            else:
+                logger.warning(f"Unknown pool setting '{key}' ignored")
+    settings["max_size"] = max(1, int(settings["max_size"]))
+    settings["min_size"] = max(0, min(int(settings["min_size"]), settings["max_size"]))
+    return settings
+
+# Streaming /sqlExec: rows fetched per driver round trip (cursor arraysize / itersize)
+SQL_STREAM_FETCH_SIZE = int(_env_float("SQL_STREAM_FETCH_SIZE", 500))
+
+# /sqlExec total-count strategy when the request omits count_mode: exact | none | window | cached | estimate
+SQL_DEFAULT_COUNT_MODE = os.getenv("SQL_DEFAULT_COUNT_MODE", "exact").strip().lower()
+# count_mode=cached: seconds a COUNT(*) result is reused for the same SQL + parameters, and max entries
+SQL_COUNT_CACHE_TTL = _env_float("SQL_COUNT_CACHE_TTL", 60)
+SQL_COUNT_CACHE_SIZE = int(_env_float("SQL_COUNT_CACHE_SIZE", 1000))
+SQL_COUNT_MODES = ("exact", "none", "window", "cached", "estimate")
+if SQL_DEFAULT_COUNT_MODE not in SQL_COUNT_MODES:
+    logger.warning(f"Invalid SQL_DEFAULT_COUNT_MODE {SQL_DEFAULT_COUNT_MODE!r}; using 'exact'")
+    SQL_DEFAULT_COUNT_MODE = "exact"
+
+# /getRecord read-through cache (per worker). RECORD_CACHE_TTL=0 disables caching except for
+# tables listed in RECORD_CACHE_TABLE_TTLS, e.g. {"users": 30, "hr.departments": 600, "audit_log": 0}
+RECORD_CACHE_TTL = _env_float("RECORD_CACHE_TTL", 0)
+RECORD_CACHE_TABLE_TTLS: Dict[str, float] = {
+    str(k).strip().lower(): float(v) for k, v in (_parse_json_env("RECORD_CACHE_TABLE_TTLS") or {}).items()
+}
+RECORD_CACHE_MAX_ENTRIES = int(_env_float("RECORD_CACHE_MAX_ENTRIES", 10000))
+RECORD_CACHE_MAX_BYTES = int(_env_float("RECORD_CACHE_MAX_BYTES", 64 * 1024 * 1024))
+
+# Statement caching. SQL_TEMPLATE_CACHE_SIZE: CRUD statement shapes compiled once per worker.
+# DB_STATEMENT_CACHE_SIZE: statements kept prepared per connection (oracledb stmtcachesize,
+# MySQL prepared cursors, PostgreSQL PREPARE, reused pyodbc cursors); 0 disables.
+SQL_TEMPLATE_CACHE_SIZE = int(_env_float("SQL_TEMPLATE_CACHE_SIZE", 1024))
+DB_STATEMENT_CACHE_SIZE = int(_env_float("DB_STATEMENT_CACHE_SIZE", 50))
+
+# Oracle fetch tuning. Results whose size the caller knows (a /sqlExec page, a /getRecords chunk,
+# a stream batch) are fetched with the execute in one round trip; these defaults apply to the rest.
+# Override per server with "arraysize", "prefetchrows" and "lob_inline_max_size" inside ORACLE_CONFIGS.
+ORACLE_FETCH_ARRAYSIZE = int(_env_float("ORACLE_FETCH_ARRAYSIZE", 100))
+ORACLE_PREFETCH_ROWS = int(_env_float("ORACLE_PREFETCH_ROWS", 2))
+# CLOB/NCLOB/BLOB columns come back inline with the rows as str/bytes instead of LOB locators that
+# are each read in another round trip. The value, in bytes, sizes the driver's fetch buffer for the
+# largest LOB expected; 0 keeps locators (for servers whose LOBs are too big to hold in a response)
+ORACLE_LOB_INLINE_MAX_SIZE = int(_env_float("ORACLE_LOB_INLINE_MAX_SIZE", 16 * 1024 * 1024))
+
+# /insertRecords: rows per batch (one transaction each) when the request omits batch_size, and max rows per request
+BULK_INSERT_BATCH_SIZE = int(_env_float("BULK_INSERT_BATCH_SIZE", 1000))
+BULK_INSERT_MAX_ROWS = int(_env_float("BULK_INSERT_MAX_ROWS", 100000))
+
+# /getRecords: keys per lookup query (further capped by each database's limits) and max keys per request
+GET_RECORDS_CHUNK_SIZE = int(_env_float("GET_RECORDS_CHUNK_SIZE", 500))
+GET_RECORDS_MAX_KEYS = int(_env_float("GET_RECORDS_MAX_KEYS", 10000))
+
+# /batch: most operations accepted in one request
+BATCH_MAX_OPERATIONS = int(_env_float("BATCH_MAX_OPERATIONS", 100))
+
+# /export: rows per driver fetch, written out as one Arrow record batch / Parquet row group / CSV chunk
+EXPORT_BATCH_SIZE = int(_env_float("EXPORT_BATCH_SIZE", 10000))
 
-# Utility to pick config by name with fallback to single-config
+# /fanout: most targets per request, per-target timeout in seconds, and most rows returned per target
+FANOUT_MAX_TARGETS = int(_env_float("FANOUT_MAX_TARGETS", 16))
+FANOUT_TIMEOUT = _env_float("FANOUT_TIMEOUT", 30)
+FANOUT_MAX_ROWS = int(_env_float("FANOUT_MAX_ROWS", 10000))
 
-def get_mysql_config(name: str | None) -> Dict[str, Any]:
-    if name and name in MYSQL_CONFIGS:
-        return MYSQL_CONFIGS[name]
-    return MYSQL_CONFIG
+# /join: most joined rows per response, build-side memory budget before spilling to disk (bytes),
+# spill partitions, and the spill directory (default: system temp dir)
+JOIN_MAX_ROWS = int(_env_float("JOIN_MAX_ROWS", 100000))
+JOIN_MEMORY_LIMIT = int(_env_float("JOIN_MEMORY_LIMIT", 256 * 1024 * 1024))
+JOIN_SPILL_PARTITIONS = max(1, int(_env_float("JOIN_SPILL_PARTITIONS", 16)))
+JOIN_SPILL_DIR = os.getenv("JOIN_SPILL_DIR") or None
 
-def get_pg_config(name: str | None) -> Dict[str, Any]:
-    if name and name in PG_CONFIGS:
-        return PG_CONFIGS[name]
-    return PG_CONFIG
+# /metrics: seconds between event-loop lag probes / pool gauge refreshes, and whether scrapes need X-API-KEY
+METRICS_SAMPLE_INTERVAL = _env_float("METRICS_SAMPLE_INTERVAL", 5)
+METRICS_REQUIRE_API_KEY = _env_bool("METRICS_REQUIRE_API_KEY", False)
 
-def get_mssql_config(name: str | None) -> Dict[str, Any]:
-    if name and name in MSSQL_CONFIGS:
-        return MSSQL_CONFIGS[name]
-    return MSSQL_CONFIG
+# Request tracing: Server-Timing response header with per-phase durations, an optional file that
+# receives each request's spans as one OTLP/JSON line, and the most spans recorded per request
+SERVER_TIMING_ENABLED = _env_bool("SERVER_TIMING_ENABLED", True)
+TRACE_EXPORT_FILE = os.getenv("TRACE_EXPORT_FILE") or None
+TRACE_MAX_SPANS = int(_env_float("TRACE_MAX_SPANS", 1000))
 
-def get_oracle_config(name: str | None) -> Dict[str, Any]:
-    if name and name in ORACLE_CONFIGS:
-        return ORACLE_CONFIGS[name]
-    return ORACLE_CONFIG
+# Slow-query log: statements taking at least SLOW_QUERY_THRESHOLD seconds (execute plus fetch) are kept,
+# up to SLOW_QUERY_LOG_SIZE per worker (oldest dropped first; 0 disables), for /admin/slow-queries
+SLOW_QUERY_THRESHOLD = _env_float("SLOW_QUERY_THRESHOLD", 1.0)
+SLOW_QUERY_LOG_SIZE = int(_env_float("SLOW_QUERY_LOG_SIZE", 1000))
@@ -0,0 +1,536 @@
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import asyncio
+import contextvars
+import functools
+import logging
+import time
+from collections import OrderedDict
+
+from .config import DB_POOL_ENABLED, DB_STATEMENT_CACHE_SIZE, get_pool_settings
+from . import metrics, slowlog, tracing
+from .dialects import compile_statement
+from .pool import ConnectionPool, get_pool
+from .serialization import ColumnType, Converter, convert_rows
+
+logger = logging.getLogger(__name__)
+
+
+class BulkInsertError(RuntimeError):
+    """A bulk insert batch failed; earlier batches stay committed.
+
+    batch is the 1-based number of the failed batch and committed holds the
+    row counts of the batches committed before it.
+    """
+
+    def __init__(self, batch: int, committed: List[int], cause: Exception):
+        super().__init__(str(cause))
+        self.batch = batch
+        self.committed = committed
+
+
+class RowStream:
+    """Open cursor that hands out result rows in chunks of arraysize.
+
+    columns holds the names from cursor.description (kept as description);
+    rows are driver tuples, or lists once converters (one per column, see
+    BaseDB.column_converters) have been applied. A driver may pre-fetch the first chunk (e.g. psycopg2
+    named cursors only expose description after the first fetch) and pass it
+    in as first_chunk. sql and execute_seconds let close_stream() report the
+    whole statement to the slow-query log.
+    """
+
+    def __init__(self, cursor, arraysize: int, description, first_chunk: Optional[List[tuple]] = None,
+                 converters: Optional[List[Converter]] = None, sql: Optional[str] = None,
+                 execute_seconds: float = 0.0):
+        self.cursor = cursor
+        self.arraysize = arraysize
+        self.description = description
+        self.columns = [d[0] for d in description]
+        self.converters = converters
+        self.exhausted = False
+        self._pending = first_chunk
+        self.sql = sql
+        self.execute_seconds = execute_seconds
+        # Totals reported to metrics when the stream is closed
+        self.fetch_seconds = 0.0
+        self.rows_fetched = 0
+
+    def fetch(self) -> List[tuple]:
+        """Return the next chunk of rows; an empty list means the result is exhausted."""
+        if self._pending is not None:
+            rows, self._pending = self._pending, None
+        elif self.exhausted:
+            return []
+        else:
+            started = time.perf_counter()
+            with tracing.span("db.fetch"):
+                rows = self.cursor.fetchmany(self.arraysize)
+            self.fetch_seconds += time.perf_counter() - started
+        self.rows_fetched += len(rows)
+        if len(rows) < self.arraysize:
+            self.exhausted = True
+        if self.converters:
+            with tracing.span("db.convert"):
+                rows = convert_rows(rows, self.converters)
+        return rows
+
+    def close(self) -> bool:
+        """Close the cursor; returns False if the connection should not be reused."""
+        try:
+            self.cursor.close()
+            return True
+        except Exception as e:
+            logger.warning(f"Closing streaming cursor failed: {e}")
+            return False
+
+
+class BaseDB:
+    """Common behaviour for the db_* clients.
+
+    Subclasses implement open_connection() for their driver. When a client is
+    created with a server name it borrows connections from the shared pool for
+    (dbtype, server) and close() hands them back; without a server name it
+    opens and closes a dedicated connection as before.
+
+    The drivers are blocking, so async callers use the a*() variants, which run
+    the same methods on the pool's bounded executor instead of the event loop.
+    """
+
+    dbtype: str = ""
+    ping_sql: str = "SELECT 1"
+    # Whether a connection can be reused after a stream is abandoned half-read
+    reusable_after_partial_stream: bool = True
+
+    def __init__(self, config: Dict[str, Any], server: Optional[str] = None):
+        self.config = config
+        self.server = server
+        self.conn = None
+        # cursor.description of the last query_rows() result, for callers that convert rows later
+        self.description = None
+        self._unpooled_state: Dict[str, Any] = {}
+        self.pool: Optional[ConnectionPool] = None
+        # Pool slot held by the async API while this client has a connection (see run())
+        self._slot: Optional[asyncio.Semaphore] = None
+        self._slot_wait = 0.0
+        if server is not None and DB_POOL_ENABLED:
+            self.pool = get_pool(self.dbtype, server, self._build_pool)
+
+    # -- driver hooks -----------------------------------------------------
+
+    @classmethod
+    def open_connection(cls, config: Dict[str, Any]):
+        raise NotImplementedError
+
+    @classmethod
+    def ping_connection(cls, conn):
+        cur = conn.cursor()
+        try:
+            cur.execute(cls.ping_sql)
+            cur.fetchall()
+        finally:
+            cur.close()
+
+    @classmethod
+    def reset_connection(cls, conn):
+        """Clear transaction state before a connection goes back to the pool."""
+        conn.rollback()
+
+    @classmethod
+    def cancel_connection(cls, conn):
+        """Interrupt the statement running on conn from another thread (no-op if the driver cannot)."""
+
+    def _last_insert_id(self, cur) -> Any:
+        return None
+
+    @classmethod
+    def column_converters(cls, description) -> List[Converter]:
+        """One converter per result column, chosen from cursor.description type codes.
+
+        Converters turn values the JSON encoder cannot write natively
+        (Decimal, bytes, LOBs, intervals) into plain JSON types, matching
+        jsonable_encoder's output. None leaves the value to the encoder.
+        """
+        return [None] * len(description)
+
+    @classmethod
+    def column_types(cls, description) -> List[ColumnType]:
+        """Logical type per result column, for typed exports (Arrow/Parquet schemas).
+
+        The default leaves every column untyped so it is inferred from the data.
+        """
+        return [ColumnType(None)] * len(description)
+
+    def _prepared(self, conn, sql: str, params: Any) -> Tuple[Any, str, Any, bool]:
+        """Return (cursor, sql, params, keep_cursor) for a statement worth keeping prepared.
+
+        The default is a fresh cursor, which suits drivers with an implicit
+        statement cache (oracledb). Drivers override this to reuse a prepared
+        cursor or a server-side prepared statement via _cached_statement();
+        when keep_cursor is True the caller must not close the cursor.
+        """
+        return conn.cursor(), sql, params, False
+
+    def _statement_cache(self) -> "OrderedDict[str, Tuple[Any, Callable[[Any], None]]]":
+        """LRU of prepared statements (or reusable cursors) attached to the current connection."""
+        state = self.pool.state(self.conn) if self.pool else self._unpooled_state
+        return state.setdefault("statements", OrderedDict())
+
+    def _cached_statement(self, sql: str, factory: Callable[[], Any], evict: Callable[[Any], None]) -> Any:
+        """Per-connection prepared object for sql, created by factory() and released by evict()."""
+        cache = self._statement_cache()
+        entry = cache.get(sql)
+        if entry is not None:
+            cache.move_to_end(sql)
+            return entry[0]
+        item = factory()
+        cache[sql] = (item, evict)
+        while len(cache) > DB_STATEMENT_CACHE_SIZE:
+            _, old = cache.popitem(last=False)
+            self._evict(old)
+        return item
+
+    def _forget_statement(self, sql: str):
+        entry = self._statement_cache().pop(sql, None)
+        if entry is not None:
+            self._evict(entry)
+
+    @staticmethod
+    def _evict(entry: Tuple[Any, Callable[[Any], None]]):
+        item, evict = entry
+        try:
+            evict(item)
+        except Exception as e:
+            logger.debug(f"Releasing prepared statement failed: {e}")
+
+    def _pool_settings(self) -> Dict[str, float]:
+        """Pool sizing and timeouts for this server; drivers may tighten them (e.g. single-connection engines)."""
+        return get_pool_settings(self.config)
+
+    def _build_pool(self) -> ConnectionPool:
+        settings = self._pool_settings()
+        config, opener = self.config, self.open_connection
+        dbtype, server = self.dbtype, self.server
+        return ConnectionPool(
+            f"{dbtype}:{server}",
+            lambda: opener(config),
+            ping=self.ping_connection,
+            reset=self.reset_connection,
+            on_acquire=lambda waited: metrics.observe_pool_wait(dbtype, server, waited),
+            **settings,
+        )
+
+    def _span_attributes(self, sql: Optional[str] = None) -> Dict[str, Any]:
+        attributes = {"db.system": self.dbtype, "db.server": self.server or "default"}
+        if sql is not None:
+            attributes["db.statement"] = sql
+        return attributes
+
+    # -- connection lifecycle ---------------------------------------------
+
+    def connect(self):
+        if self.conn is None:
+            with tracing.span("db.connect", self._span_attributes()):
+                if self.pool:
+                    self.conn = self.pool.acquire(self._slot_wait)
+                    self._slot_wait = 0.0
+                else:
+                    self.conn = self.open_connection(self.config)
+        return self.conn
+
+    def close(self, discard: bool = False):
+        """Return the connection to its pool (or close it when unpooled)."""
+        if self.conn is None:
+            return
+        conn, self.conn = self.conn, None
+        if self.pool:
+            self.pool.release(conn, discard=discard)
+        else:
+            self._unpooled_state.clear()
+            conn.close()
+
+    def interrupt(self):
+        """Best-effort cancel of the statement in flight, e.g. after a caller gave up waiting."""
+        conn = self.conn
+        if conn is None:
+            return
+        try:
+            self.cancel_connection(conn)
+        except Exception as e:
+            logger.warning(f"Cancelling {self.dbtype}:{self.server} statement failed: {e}")
+
+    def commit(self):
+        if self.conn is not None:
+            self.conn.commit()
+
+    def rollback(self):
+        if self.conn is not None:
+            self.conn.rollback()
+
+    # -- statements -------------------------------------------------------
+
+    def _cursor(self, conn, sql: str, params: Any, prepare: bool) -> Tuple[Any, str, Any, bool]:
+        if prepare and DB_STATEMENT_CACHE_SIZE > 0:
+            return self._prepared(conn, sql, params)
+        return conn.cursor(), sql, params, False
+
+    def _size_fetch(self, cur, rows: Optional[int]):
+        """Size the cursor's fetching for a first read of about `rows` rows (None when unknown).
+
+        The default only sets arraysize; drivers with fetch tuning (oracledb
+        prefetchrows) override this to read such results in fewer round trips.
+        """
+        if rows:
+            cur.arraysize = rows
+
+    def query(self, sql: str, params: Tuple | Dict[str, Any] = (), prepare: bool = False) -> List[Dict[str, Any]]:
+        """Run a SELECT; prepare=True marks a repeated statement shape worth keeping prepared."""
+        cols, rows = self.query_rows(sql, params, prepare)
+        with tracing.span("db.build_dicts"):
+            return [dict(zip(cols, r)) for r in rows]
+
+    def query_rows(self, sql: str, params: Tuple | Dict[str, Any] = (), prepare: bool = False,
+                   convert: bool = False, fetch_rows: Optional[int] = None) -> Tuple[List[str], List[tuple]]:
+        """Run a SELECT and return (column names, rows) without building row dicts.
+
+        Rows are driver tuples, or JSON-ready lists when convert=True (column
+        converters are applied here, on the worker thread, so LOB reads never
+        block the event loop). fetch_rows is the number of rows the caller
+        expects (e.g. a page size), used to size the driver's fetches.
+        """
+        with tracing.span("db.query", self._span_attributes(sql)) as span:
+            conn = self.connect()
+            cur, sql_to_run, params, keep_cursor = self._cursor(conn, sql, params, prepare)
+            try:
+                self._size_fetch(cur, fetch_rows)
+                started = time.perf_counter()
+                with tracing.span("db.execute"):
+                    if params:
+                        cur.execute(sql_to_run, params)
+                    else:
+                        cur.execute(sql_to_run)
+                executed = time.perf_counter()
+                self.description = cur.description
+                cols = [d[0] for d in cur.description]
+                with tracing.span("db.fetch"):
+                    rows = cur.fetchall()
+                fetched = time.perf_counter()
+                metrics.observe_query(self.dbtype, self.server, executed - started, fetched - executed, len(rows))
+                slowlog.record(self.dbtype, self.server, sql, fetched - started, len(rows))
+                if span is not None:
+                    span.attributes["db.rows"] = len(rows)
+                if convert:
+                    with tracing.span("db.convert"):
+                        rows = convert_rows(rows, self.column_converters(cur.description))
+                return cols, rows
+            except Exception as e:
+                metrics.observe_db_error(self.dbtype, self.server, e)
+                if prepare:
+                    # The prepared statement may be invalid now (e.g. the table changed); re-prepare next time
+                    self._forget_statement(sql)
+                raise
+            finally:
+                if not keep_cursor:
+                    cur.close()
+
+    def _stream_cursor(self, conn):
+        """Cursor suited to incremental fetching; drivers override for server-side cursors."""
+        return conn.cursor()
+
+    def open_stream(self, sql: str, params: Tuple | Dict[str, Any] = (), arraysize: int = 500,
+                    convert: bool = True) -> RowStream:
+        """Execute sql and return a RowStream without materialising the result.
+
+        With convert=False rows keep the driver's own types (e.g. Decimal) for
+        exports that preserve them.
+        """
+        conn = self.connect()
+        cur = self._stream_cursor(conn)
+        try:
+            self._size_fetch(cur, arraysize)
+            started = time.perf_counter()
+            with tracing.span("db.execute", self._span_attributes(sql)):
+                if params:
+                    cur.execute(sql, params)
+                else:
+                    cur.execute(sql)
+            executed = time.perf_counter() - started
+            metrics.observe_query(self.dbtype, self.server, executed, None, 0)
+            converters = self.column_converters(cur.description) if convert else None
+        except Exception as e:
+            metrics.observe_db_error(self.dbtype, self.server, e)
+            cur.close()
+            raise
+        return RowStream(cur, arraysize, cur.description, converters=converters, sql=sql, execute_seconds=executed)
+
+    def close_stream(self, stream: RowStream):
+        """Close a stream's cursor and release the connection, discarding it if unsafe to reuse."""
+        metrics.observe_query(self.dbtype, self.server, None, stream.fetch_seconds, stream.rows_fetched)
+        if stream.sql is not None:
+            slowlog.record(self.dbtype, self.server, stream.sql, stream.execute_seconds + stream.fetch_seconds,
+                           stream.rows_fetched)
+        reusable = stream.close()
+        if not stream.exhausted and not self.reusable_after_partial_stream:
+            reusable = False
+        self.close(discard=not reusable)
+
+    def execute(self, sql: str, params: Tuple | Dict[str, Any] = (), commit: bool = True, prepare: bool = False) -> Tuple[int, Any]:
+        """Run a DML statement and return (rows affected, last insert id or None)."""
+        conn = self.connect()
+        cur, sql_to_run, params, keep_cursor = self._cursor(conn, sql, params, prepare)
+        try:
+            started = time.perf_counter()
+            with tracing.span("db.execute", self._span_attributes(sql)):
+                if params:
+                    cur.execute(sql_to_run, params)
+                else:
+                    cur.execute(sql_to_run)
+            elapsed = time.perf_counter() - started
+            metrics.observe_query(self.dbtype, self.server, elapsed, None, 0)
+            rows_affected = cur.rowcount
+            slowlog.record(self.dbtype, self.server, sql, elapsed, rows_affected)
+            last_id = self._last_insert_id(cur)
+        except Exception as e:
+            metrics.observe_db_error(self.dbtype, self.server, e)
+            if prepare:
+                # The prepared statement may be invalid now (e.g. the table changed); re-prepare next time
+                self._forget_statement(sql)
+            raise
+        finally:
+            if not keep_cursor:
+                cur.close()
+        if commit:
+            conn.commit()
+        return rows_affected, last_id
+
+    def execute_sql(self, sql: str, params: Tuple | Dict[str, Any] = (), max_rows: int = 100) -> Tuple[Optional[List[Dict[str, Any]]], int]:
+        """Run any statement without committing.
+
+        Returns (rows, rowcount): rows is None for statements without a result
+        set, otherwise at most max_rows rows with rowcount the full row count.
+        """
+        conn = self.connect()
+        cur = conn.cursor()
+        try:
+            self._size_fetch(cur, None)
+            started = time.perf_counter()
+            with tracing.span("db.execute", self._span_attributes(sql)):
+                if params:
+                    cur.execute(sql, params)
+                else:
+                    cur.execute(sql)
+            executed = time.perf_counter()
+            if cur.description is None:
+                metrics.observe_query(self.dbtype, self.server, executed - started, None, 0)
+                slowlog.record(self.dbtype, self.server, sql, executed - started, cur.rowcount)
+                return None, cur.rowcount
+            cols = [d[0] for d in cur.description]
+            # Read the whole result: some drivers refuse to close a cursor with unread rows
+            with tracing.span("db.fetch"):
+                rows = cur.fetchall()
+            fetched = time.perf_counter()
+            metrics.observe_query(self.dbtype, self.server, executed - started, fetched - executed, len(rows))
+            slowlog.record(self.dbtype, self.server, sql, fetched - started, len(rows))
+            with tracing.span("db.build_dicts"):
+                return [dict(zip(cols, r)) for r in rows[:max_rows]], len(rows)
+        except Exception as e:
+            metrics.observe_db_error(self.dbtype, self.server, e)
+            raise
+        finally:
+            cur.close()
+
+    def _insert_batch(self, cur, table: str, columns: Tuple[str, ...], rows: List[tuple]) -> int:
+        """Insert one batch of row tuples on cur and return the number of rows written.
+
+        The default is DB-API executemany(), which oracledb already sends as a
+        single array DML round trip; other drivers override it with their
+        native bulk path.
+        """
+        cur.executemany(compile_statement(self.dbtype, "insert", table, columns=columns), rows)
+        return cur.rowcount if cur.rowcount is not None and cur.rowcount >= 0 else len(rows)
+
+    def bulk_insert(self, table: str, columns: Tuple[str, ...], rows: List[tuple], batch_size: int) -> List[int]:
+        """Insert rows in batches of batch_size, committing each batch; returns rows per batch."""
+        conn = self.connect()
+        counts: List[int] = []
+        for start in range(0, len(rows), batch_size):
+            batch = rows[start:start + batch_size]
+            cur = conn.cursor()
+            try:
+                started = time.perf_counter()
+                with tracing.span("db.insert_batch", {**self._span_attributes(), "db.rows": len(batch)}):
+                    count = self._insert_batch(cur, table, columns, batch)
+                conn.commit()
+                elapsed = time.perf_counter() - started
+                metrics.observe_query(self.dbtype, self.server, elapsed, None, 0)
+                slowlog.record(self.dbtype, self.server, compile_statement(self.dbtype, "insert", table, columns=columns),
+                               elapsed, count)
+            except Exception as e:
+                metrics.observe_db_error(self.dbtype, self.server, e)
+                try:
+                    conn.rollback()
+                except Exception as rollback_error:
+                    logger.warning(f"Rollback after failed batch failed: {rollback_error}")
+                raise BulkInsertError(len(counts) + 1, counts, e) from e
+            finally:
+                cur.close()
+            counts.append(count)
+        return counts
+
+    # -- async API --------------------------------------------------------
+
+    async def run(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """Run a blocking callable on this server's executor and await its result.
+
+        With a pool, the client first reserves a pool slot and keeps it for as
+        long as it holds a connection, so executor threads never all sit in
+        acquire() while the holders' next calls queue behind them.
+        """
+        loop = asyncio.get_running_loop()
+        ctx = contextvars.copy_context()
+        call = functools.partial(ctx.run, fn, *args, **kwargs)
+        if self.pool is None:
+            return await loop.run_in_executor(None, call)
+        if self._slot is None:
+            self._slot, self._slot_wait = await self.pool.reserve()
+        job = loop.run_in_executor(self.pool.executor, call)
+        try:
+            return await job
+        finally:
+            # A cancelled job may still be running on its thread; the slot then stays until aclose()
+            if not job.cancelled() and self.conn is None:
+                self._release_slot()
+
+    def _release_slot(self):
+        if self._slot is not None:
+            slot, self._slot = self._slot, None
+            slot.release()
+
+    async def aquery(self, sql: str, params: Tuple | Dict[str, Any] = (), prepare: bool = False) -> List[Dict[str, Any]]:
+        return await self.run(self.query, sql, params, prepare)
+
+    async def aquery_rows(self, sql: str, params: Tuple | Dict[str, Any] = (), prepare: bool = False,
+                          convert: bool = False, fetch_rows: Optional[int] = None) -> Tuple[List[str], List[tuple]]:
+        return await self.run(self.query_rows, sql, params, prepare, convert, fetch_rows)
+
+    async def aopen_stream(self, sql: str, params: Tuple | Dict[str, Any] = (), arraysize: int = 500,
+                           convert: bool = True) -> RowStream:
+        return await self.run(self.open_stream, sql, params, arraysize, convert)
+
+    async def aexecute(self, sql: str, params: Tuple | Dict[str, Any] = (), commit: bool = True, prepare: bool = False) -> Tuple[int, Any]:
+        return await self.run(self.execute, sql, params, commit, prepare)
+
+    async def abulk_insert(self, table: str, columns: Tuple[str, ...], rows: List[tuple], batch_size: int) -> List[int]:
+        return await self.run(self.bulk_insert, table, columns, rows, batch_size)
+
+    async def acommit(self):
+        if self.conn is not None:
+            await self.run(self.commit)
+
+    async def arollback(self):
+        if self.conn is not None:
+            await self.run(self.rollback)
+
+    async def aclose(self, discard: bool = False):
+        if self.conn is not None:
+            await self.run(self.close, discard)
+        self._release_slot()
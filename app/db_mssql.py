@@ -1,38 +1,59 @@
+import datetime
+import decimal
+import uuid
 import pyodbc
 from typing import Any, Dict, List, Tuple
 
-class MSSQLDB:
-    def __init__(self, config: Dict[str, Any]):
-        self.config = config
-        self.conn = None
+from .db_base import BaseDB
+from .dialects import compile_statement
+from .serialization import ColumnType, Converter, bytes_to_text, decimal_to_number
 
-    def connect(self):
+# pyodbc reports each column's Python type in cursor.description
+_CONVERTERS: Dict[type, Converter] = {
+    decimal.Decimal: decimal_to_number,
+    bytes: bytes_to_text,
+    bytearray: bytes_to_text,
+}
+# Logical column types for exports; decimal precision/scale are description[4:6]
+_KINDS: Dict[type, str] = {
+    bool: "bool", int: "int", float: "float", decimal.Decimal: "decimal",
+    str: "string", uuid.UUID: "string", bytes: "binary", bytearray: "binary",
+    datetime.datetime: "datetime", datetime.date: "date", datetime.time: "time",
+}
+
+class MSSQLDB(BaseDB):
+    dbtype = "mssql"
+
+    @classmethod
+    def open_connection(cls, config: Dict[str, Any]):
         conn_str = (
-            f"DRIVER={{{self.config.get('driver', 'ODBC Driver 17 for SQL Server')}}};"
-            f"SERVER={self.config.get('server')},{int(self.config.get('port', 1433))};"
-            f"DATABASE={self.config.get('db')};"
-            f"UID={self.config.get('user')};"
-            f"PWD={self.config.get('password')}"
+            f"DRIVER={{{config.get('driver', 'ODBC Driver 17 for SQL Server')}}};"
+            f"SERVER={config.get('server')},{int(config.get('port', 1433))};"
+            f"DATABASE={config.get('db')};"
+            f"UID={config.get('user')};"
+            f"PWD={config.get('password')}"
         )
-        self.conn = pyodbc.connect(conn_str)
-        return self.conn
-
-    def query(self, sql: str, params: Tuple | Dict[str, Any] = ()) -> List[Dict[str, Any]]:
-        if self.conn is None:
-            self.connect()
-        cur = self.conn.cursor()
-        # pyodbc supports positional parameters (?)
-        # For named parameters, we need to convert dict to tuple in the right order
-        if params:
-            cur.execute(sql, params)
-        else:
-            cur.execute(sql)
-        cols = [desc[0] for desc in cur.description]
-        rows = [dict(zip(cols, r)) for r in cur.fetchall()]
-        cur.close()
-        return rows
-
-    def close(self):
-        if self.conn:
-            self.conn.close()
-            self.conn = None
+        return pyodbc.connect(conn_str)
+
+    @classmethod
+    def column_converters(cls, description) -> List[Converter]:
+        return [_CONVERTERS.get(d[1]) for d in description]
+
+    @classmethod
+    def column_types(cls, description) -> List[ColumnType]:
+        return [
+            ColumnType("decimal", d[4], d[5]) if d[1] is decimal.Decimal else ColumnType(_KINDS.get(d[1]))
+            for d in description
+        ]
+
+    def _prepared(self, conn, sql: str, params: Any) -> Tuple[Any, str, Any, bool]:
+        # pyodbc keeps the last statement prepared on its cursor and skips SQLPrepare
+        # when the same SQL is executed again, so reuse one cursor per statement
+        cur = self._cached_statement(sql, conn.cursor, lambda c: c.close())
+        return cur, sql, params, True
+
+    def _insert_batch(self, cur, table: str, columns: Tuple[str, ...], rows: List[tuple]) -> int:
+        # fast_executemany binds the whole batch as parameter arrays in one ODBC call
+        cur.fast_executemany = True
+        cur.executemany(compile_statement(self.dbtype, "insert", table, columns=columns), rows)
+        return len(rows)
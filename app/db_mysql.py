@@ -1,36 +1,90 @@
 import mysql.connector
+from mysql.connector.constants import FieldFlag, FieldType
 from typing import Any, Dict, List, Tuple
 
-class MySQLDB:
-    def __init__(self, config: Dict[str, Any]):
-        self.config = config
-        self.conn = None
-
-    def connect(self):
-        self.conn = mysql.connector.connect(
-            host=self.config["host"],
-            port=self.config["port"],
-            database=self.config["db"],
-            user=self.config["user"],
-            password=self.config["password"],
+from .db_base import BaseDB
+from .serialization import ColumnType, Converter, bytes_to_text, decimal_to_number, set_to_list, timedelta_to_seconds
+
+# Converters by MySQL field type
+_CONVERTERS: Dict[int, Converter] = {
+    FieldType.DECIMAL: decimal_to_number,
+    FieldType.NEWDECIMAL: decimal_to_number,
+    FieldType.TIME: timedelta_to_seconds,
+    FieldType.SET: set_to_list,
+}
+# String and BLOB types return bytes only for binary columns (BINARY, VARBINARY, BLOB); text stays str
+_BINARY_TYPES = {
+    FieldType.STRING, FieldType.VAR_STRING, FieldType.TINY_BLOB,
+    FieldType.MEDIUM_BLOB, FieldType.LONG_BLOB, FieldType.BLOB,
+}
+# Logical column types for exports (the connector reports no DECIMAL precision/scale)
+_KINDS: Dict[int, str] = {
+    FieldType.TINY: "int", FieldType.SHORT: "int", FieldType.INT24: "int",
+    FieldType.LONG: "int", FieldType.LONGLONG: "int", FieldType.YEAR: "int", FieldType.BIT: "int",
+    FieldType.FLOAT: "float", FieldType.DOUBLE: "float",
+    FieldType.DECIMAL: "decimal", FieldType.NEWDECIMAL: "decimal",
+    FieldType.DATE: "date", FieldType.NEWDATE: "date",
+    FieldType.DATETIME: "datetime", FieldType.TIMESTAMP: "datetime",
+    FieldType.TIME: "interval",
+    FieldType.VARCHAR: "string", FieldType.ENUM: "string", FieldType.SET: "string",
+    FieldType.JSON: "json",
+}
+
+class MySQLDB(BaseDB):
+    dbtype = "mysql"
+    # Unread rows of an unbuffered result block the connection, so abandoned streams discard it
+    reusable_after_partial_stream = False
+
+    @classmethod
+    def open_connection(cls, config: Dict[str, Any]):
+        return mysql.connector.connect(
+            host=config["host"],
+            port=config["port"],
+            database=config["db"],
+            user=config["user"],
+            password=config["password"],
         )
-        return self.conn
-
-    def query(self, sql: str, params: Tuple | Dict[str, Any] = ()) -> List[Dict[str, Any]]:
-        if self.conn is None:
-            self.connect()
-        cur = self.conn.cursor()
-        # MySQL supports both positional (tuple) and named (dict with %(name)s syntax)
-        if params:
-            cur.execute(sql, params)
-        else:
-            cur.execute(sql)
-        cols = [c[0] for c in cur.description]
-        rows = [dict(zip(cols, r)) for r in cur.fetchall()]
-        cur.close()
-        return rows
-
-    def close(self):
-        if self.conn:
-            self.conn.close()
-            self.conn = None
+
+    @classmethod
+    def ping_connection(cls, conn):
+        conn.ping(reconnect=False)
+
+    @classmethod
+    def reset_connection(cls, conn):
+        # End any implicit transaction so the next borrower does not see a stale snapshot
+        if conn.in_transaction:
+            conn.rollback()
+
+    def _last_insert_id(self, cur) -> Any:
+        return cur.lastrowid
+
+    @classmethod
+    def column_converters(cls, description) -> List[Converter]:
+        return [
+            bytes_to_text if d[1] in _BINARY_TYPES and d[7] & FieldFlag.BINARY else _CONVERTERS.get(d[1])
+            for d in description
+        ]
+
+    @classmethod
+    def column_types(cls, description) -> List[ColumnType]:
+        return [
+            ColumnType(("binary" if d[7] & FieldFlag.BINARY else "string") if d[1] in _BINARY_TYPES else _KINDS.get(d[1]))
+            for d in description
+        ]
+
+    def _stream_cursor(self, conn):
+        # Unbuffered: rows are read from the socket as they are fetched
+        return conn.cursor(buffered=False)
+
+    def _prepared(self, conn, sql: str, params: Any) -> Tuple[Any, str, Any, bool]:
+        # A prepared cursor re-sends COM_STMT_PREPARE only when handed a different SQL
+        # object than its last execute, so one cursor per statement executes without re-parsing
+        cur = self._cached_statement(sql, lambda: conn.cursor(prepared=True), lambda c: c.close())
+        return cur, sql, params, True
+
+    def _insert_batch(self, cur, table: str, columns: Tuple[str, ...], rows: List[tuple]) -> int:
+        # One multi-row INSERT ... VALUES (...), (...) per batch: a single round trip and parse
+        row_marks = "(" + ", ".join(["%s"] * len(columns)) + ")"
+        sql = f"INSERT INTO {table} ({', '.join(columns)}) VALUES " + ", ".join([row_marks] * len(rows))
+        cur.execute(sql, [value for row in rows for value in row])
+        return cur.rowcount
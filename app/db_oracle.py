@@ -1,80 +1,191 @@
 import oracledb
-from typing import Any, Dict, List, Tuple
+from typing import Any, Dict, List, Optional, Tuple
 import logging
 import os
+import threading
+
+from .config import (
+    DB_STATEMENT_CACHE_SIZE,
+    ORACLE_FETCH_ARRAYSIZE,
+    ORACLE_LOB_INLINE_MAX_SIZE,
+    ORACLE_PREFETCH_ROWS,
+)
+from .db_base import BaseDB
+from .serialization import ColumnType, Converter, bytes_to_text, decimal_to_number, read_lob, timedelta_to_seconds
 
 logger = logging.getLogger(__name__)
 
-# Try to initialize thick mode for Oracle connections
-# This is needed for older Oracle password verifier types (like 0x939)
+# Thick mode is needed for older Oracle password verifier types (like 0x939). It is initialised
+# on first use (see init_client) rather than at import, so workers that never talk to Oracle skip it.
 _thick_mode_initialized = False
 _thick_mode_error = None
+_client_checked = False
+_client_lock = threading.Lock()
 
-try:
-    # Check if ORACLE_CLIENT_LIB environment variable is set
-    lib_dir = os.getenv("ORACLE_CLIENT_LIB")
-    logger.info(f"Oracle Client Library Path from env: {lib_dir}")
-
-    # Check if directory exists
-    if lib_dir:
-        if os.path.exists(lib_dir):
-            logger.info(f"Oracle client directory exists: {lib_dir}")
-            # List files in the directory for debugging
-            try:
-                files = os.listdir(lib_dir)
-                logger.info(f"Files in Oracle client directory: {files[:10]}")  # Show first 10 files
-            except Exception as list_error:
-                logger.warning(f"Could not list files in {lib_dir}: {list_error}")
-        else:
-            logger.error(f"Oracle client directory does NOT exist: {lib_dir}")
-
-    # Try to initialize thick mode
-    if lib_dir:
-        logger.info(f"Attempting to initialize Oracle client in thick mode with lib_dir={lib_dir}")
-        oracledb.init_oracle_client(lib_dir=lib_dir)
-    else:
-        logger.info("Attempting to initialize Oracle client in thick mode (no lib_dir specified)")
-        oracledb.init_oracle_client()
-
-    _thick_mode_initialized = True
-    logger.info("✓ Oracle client successfully initialized in THICK mode")
-    logger.info(f"Oracle client version: {oracledb.clientversion()}")
-except Exception as e:
-    _thick_mode_error = str(e)
-    logger.error(f"✗ Oracle thick mode initialization FAILED: {e}")
-    logger.error(f"Error type: {type(e).__name__}")
-    logger.warning("Using THIN mode - some older Oracle password types may not be supported")
-    logger.info("To enable thick mode:")
-    logger.info("  1. Ensure Oracle Instant Client is installed in the container")
-    logger.info("  2. Set ORACLE_CLIENT_LIB environment variable to the lib directory")
-    logger.info(f"  3. Current ORACLE_CLIENT_LIB: {lib_dir}")
-
-class OracleDB:
-    def __init__(self, config: Dict[str, Any]):
-        self.config = config
-        self.conn = None
 
-    def connect(self):
+def init_client() -> Dict[str, Any]:
+    """Try once per process to switch oracledb to thick mode; returns the outcome for the driver report.
+
+    Must run before the first connection is opened: oracledb cannot change
+    mode once a thin connection exists.
+    """
+    global _thick_mode_initialized, _thick_mode_error, _client_checked
+    with _client_lock:
+        if _client_checked:
+            return _client_mode()
+        _client_checked = True
+        lib_dir = os.getenv("ORACLE_CLIENT_LIB")
+        try:
+            logger.info(f"Oracle Client Library Path from env: {lib_dir}")
+
+            # Check if directory exists
+            if lib_dir:
+                if os.path.exists(lib_dir):
+                    logger.info(f"Oracle client directory exists: {lib_dir}")
+                    # List files in the directory for debugging
+                    try:
+                        files = os.listdir(lib_dir)
+                        logger.info(f"Files in Oracle client directory: {files[:10]}")  # Show first 10 files
+                    except Exception as list_error:
+                        logger.warning(f"Could not list files in {lib_dir}: {list_error}")
+                else:
+                    logger.error(f"Oracle client directory does NOT exist: {lib_dir}")
+
+            # Try to initialize thick mode
+            if lib_dir:
+                logger.info(f"Attempting to initialize Oracle client in thick mode with lib_dir={lib_dir}")
+                oracledb.init_oracle_client(lib_dir=lib_dir)
+            else:
+                logger.info("Attempting to initialize Oracle client in thick mode (no lib_dir specified)")
+                oracledb.init_oracle_client()
+
+            _thick_mode_initialized = True
+            logger.info("✓ Oracle client successfully initialized in THICK mode")
+            logger.info(f"Oracle client version: {oracledb.clientversion()}")
+        except Exception as e:
+            _thick_mode_error = str(e)
+            logger.error(f"✗ Oracle thick mode initialization FAILED: {e}")
+            logger.error(f"Error type: {type(e).__name__}")
+            logger.warning("Using THIN mode - some older Oracle password types may not be supported")
+            logger.info("To enable thick mode:")
+            logger.info("  1. Ensure Oracle Instant Client is installed in the container")
+            logger.info("  2. Set ORACLE_CLIENT_LIB environment variable to the lib directory")
+            logger.info(f"  3. Current ORACLE_CLIENT_LIB: {lib_dir}")
+        return _client_mode()
+
+
+def _client_mode() -> Dict[str, Any]:
+    mode: Dict[str, Any] = {"thick_mode": _thick_mode_initialized}
+    if _thick_mode_error:
+        mode["thick_mode_error"] = _thick_mode_error
+    return mode
+
+# Converters by oracledb column type; NUMBER is only converted when fetched as Decimal
+_CONVERTERS: Dict[Any, Converter] = {
+    oracledb.DB_TYPE_CLOB: read_lob,
+    oracledb.DB_TYPE_NCLOB: read_lob,
+    oracledb.DB_TYPE_BLOB: read_lob,
+    oracledb.DB_TYPE_BFILE: read_lob,
+    oracledb.DB_TYPE_RAW: bytes_to_text,
+    oracledb.DB_TYPE_LONG_RAW: bytes_to_text,
+    oracledb.DB_TYPE_INTERVAL_DS: timedelta_to_seconds,
+    oracledb.DB_TYPE_INTERVAL_YM: list,
+}
+
+# Logical column types for exports; NUMBER is typed from its precision and scale
+_KINDS: Dict[Any, str] = {
+    oracledb.DB_TYPE_BINARY_INTEGER: "int",
+    oracledb.DB_TYPE_BINARY_FLOAT: "float",
+    oracledb.DB_TYPE_BINARY_DOUBLE: "float",
+    oracledb.DB_TYPE_BOOLEAN: "bool",
+    oracledb.DB_TYPE_CHAR: "string",
+    oracledb.DB_TYPE_NCHAR: "string",
+    oracledb.DB_TYPE_VARCHAR: "string",
+    oracledb.DB_TYPE_NVARCHAR: "string",
+    oracledb.DB_TYPE_LONG: "string",
+    oracledb.DB_TYPE_CLOB: "string",
+    oracledb.DB_TYPE_NCLOB: "string",
+    oracledb.DB_TYPE_ROWID: "string",
+    oracledb.DB_TYPE_RAW: "binary",
+    oracledb.DB_TYPE_LONG_RAW: "binary",
+    oracledb.DB_TYPE_BLOB: "binary",
+    oracledb.DB_TYPE_DATE: "datetime",
+    oracledb.DB_TYPE_TIMESTAMP: "datetime",
+    oracledb.DB_TYPE_TIMESTAMP_TZ: "datetime",
+    oracledb.DB_TYPE_TIMESTAMP_LTZ: "datetime",
+    oracledb.DB_TYPE_INTERVAL_DS: "interval",
+    oracledb.DB_TYPE_JSON: "json",
+}
+
+# LOB types fetched inline, as the LONG type carrying the same data
+_INLINE_LOBS: Dict[Any, Any] = {
+    oracledb.DB_TYPE_CLOB: oracledb.DB_TYPE_LONG,
+    oracledb.DB_TYPE_NCLOB: oracledb.DB_TYPE_LONG_NVARCHAR,
+    oracledb.DB_TYPE_BLOB: oracledb.DB_TYPE_LONG_RAW,
+}
+# Significant digits a float holds exactly through a decimal round trip
+_FLOAT_DIGITS = 15
+
+
+def _output_type_handler(lob_size: int):
+    """Connection output type handler: LOBs inline (when lob_size > 0) and NUMBER as int/float.
+
+    The handler picks each column's Python type from its metadata once per
+    execute, so NUMBER(p, 0) is always int and NUMBER(p, s) with p <= 15 always
+    float (rather than int or float per value, or Decimal with fetch_decimals).
+    Wider numbers keep the driver default so no digits are lost.
+    """
+    def handler(cursor, metadata):
+        # Fetch variables must hold a full fetch, including the rows prefetched with the execute
+        rows = max(cursor.arraysize, cursor.prefetchrows)
+        if metadata.type_code is oracledb.DB_TYPE_NUMBER:
+            if metadata.scale == 0 and metadata.precision > 0:
+                return cursor.var(int, arraysize=rows)
+            if 0 < metadata.scale and 0 < metadata.precision <= _FLOAT_DIGITS:
+                return cursor.var(float, arraysize=rows)
+        elif lob_size > 0 and metadata.type_code in _INLINE_LOBS:
+            return cursor.var(_INLINE_LOBS[metadata.type_code], size=lob_size, arraysize=rows)
+        return None
+    return handler
+
+
+def _setting(config: Dict[str, Any], name: str, default: int) -> int:
+    value = config.get(name)
+    return default if value is None else int(value)
+
+
+class OracleDB(BaseDB):
+    dbtype = "oracle"
+    ping_sql = "SELECT 1 FROM dual"
+
+    @classmethod
+    def open_connection(cls, config: Dict[str, Any]):
+        init_client()
         try:
             # Support direct DSN string or build from components
-            if "dsn" in self.config and self.config["dsn"]:
-                dsn = self.config["dsn"]
+            if "dsn" in config and config["dsn"]:
+                dsn = config["dsn"]
                 logger.info(f"Using provided DSN connection string")
             else:
                 # Build DSN from host, port, service_name
-                host = self.config.get("host")
-                port = int(self.config.get("port", 1521))
-                service_name = self.config.get("service_name")
+                host = config.get("host")
+                port = int(config.get("port", 1521))
+                service_name = config.get("service_name")
                 logger.info(f"Building DSN: host={host}, port={port}, service_name={service_name}")
                 dsn = oracledb.makedsn(host, port, service_name=service_name)
 
-            user = self.config.get("user")
-            password = self.config.get("password")
+            user = config.get("user")
+            password = config.get("password")
 
             logger.info(f"Attempting Oracle connection with user={user} (thick_mode={_thick_mode_initialized})")
-            self.conn = oracledb.connect(user=user, password=password, dsn=dsn)
+            conn = oracledb.connect(user=user, password=password, dsn=dsn)
+            # Statements are cached per connection by SQL text, so repeated shapes skip the hard parse
+            conn.stmtcachesize = int(config.get("stmtcachesize", DB_STATEMENT_CACHE_SIZE))
+            conn.outputtypehandler = _output_type_handler(
+                _setting(config, "lob_inline_max_size", ORACLE_LOB_INLINE_MAX_SIZE)
+            )
             logger.info("Oracle connection successful")
-            return self.conn
+            return conn
         except oracledb.NotSupportedError as e:
             error_msg = str(e)
             if "DPY-3015" in error_msg or "password verifier" in error_msg:
@@ -92,33 +203,66 @@ class OracleDB:
                 raise RuntimeError(f"Oracle connection failed: {e}") from e
         except Exception as e:
             logger.error(f"Oracle connection failed: {e}")
-            logger.error(f"Config (masked): user={self.config.get('user')}, has_password={bool(self.config.get('password'))}, has_dsn={bool(self.config.get('dsn'))}")
+            logger.error(f"Config (masked): user={config.get('user')}, has_password={bool(config.get('password'))}, has_dsn={bool(config.get('dsn'))}")
             raise RuntimeError(f"Oracle connection failed: {e}") from e
 
-    def query(self, sql: str, params: Tuple | Dict[str, Any] = ()) -> List[Dict[str, Any]]:
+    @classmethod
+    def ping_connection(cls, conn):
+        conn.ping()
+
+    @classmethod
+    def reset_connection(cls, conn):
+        if conn.transaction_in_progress:
+            conn.rollback()
+
+    @classmethod
+    def cancel_connection(cls, conn):
+        conn.cancel()
+
+    def _size_fetch(self, cur, rows: Optional[int]):
+        if rows:
+            # prefetchrows arrive with the execute: one more than expected also brings the end of the result
+            cur.arraysize = rows
+            cur.prefetchrows = rows + 1
+        else:
+            cur.arraysize = _setting(self.config, "arraysize", ORACLE_FETCH_ARRAYSIZE)
+            cur.prefetchrows = _setting(self.config, "prefetchrows", ORACLE_PREFETCH_ROWS)
+
+    @classmethod
+    def column_converters(cls, description) -> List[Converter]:
+        decimals = oracledb.defaults.fetch_decimals
+        return [
+            decimal_to_number if decimals and d[1] is oracledb.DB_TYPE_NUMBER else _CONVERTERS.get(d[1])
+            for d in description
+        ]
+
+    @classmethod
+    def column_types(cls, description) -> List[ColumnType]:
+        types = []
+        for d in description:
+            if d[1] is not oracledb.DB_TYPE_NUMBER:
+                types.append(ColumnType(_KINDS.get(d[1])))
+            elif d[5] == -127:
+                # FLOAT or unconstrained NUMBER
+                types.append(ColumnType("float"))
+            elif d[5] == 0 and 0 < d[4] <= 18:
+                types.append(ColumnType("int"))
+            else:
+                types.append(ColumnType("decimal", d[4] or None, d[5]))
+        return types
+
+    def connect(self):
+        if self.conn is None:
+            logger.debug("No connection held, acquiring Oracle connection...")
+        return super().connect()
+
+    def query(self, sql: str, params: Tuple | Dict[str, Any] = (), prepare: bool = False) -> List[Dict[str, Any]]:
         try:
-            if self.conn is None:
-                logger.info("No existing connection, connecting to Oracle...")
-                self.connect()
             logger.debug(f"Executing query: {sql}")
             logger.debug(f"Parameters: {params}")
-            cur = self.conn.cursor()
-            # Oracle supports both positional (tuple) and named (dict) parameters
-            if params:
-                cur.execute(sql, params)
-            else:
-                cur.execute(sql)
-            cols = [d[0] for d in cur.description]
-            rows = [dict(zip(cols, r)) for r in cur.fetchall()]
-            cur.close()
+            rows = super().query(sql, params, prepare)
             logger.debug(f"Query returned {len(rows)} rows")
             return rows
         except Exception as e:
             logger.error(f"Query execution failed: {e}")
             raise
-
-    def close(self):
-        if self.conn:
-            logger.debug("Closing Oracle connection")
-            self.conn.close()
-            self.conn = None
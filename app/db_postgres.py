@@ -1,36 +1,161 @@
 import psycopg2
+import psycopg2.extensions
+import datetime
+import io
+import itertools
+import json
+import re
+import time
+import uuid
 from typing import Any, Dict, List, Tuple
 
-class PostgresDB:
-    def __init__(self, config: Dict[str, Any]):
-        self.config = config
-        self.conn = None
-
-    def connect(self):
-        self.conn = psycopg2.connect(
-            host=self.config.get("host"),
-            port=int(self.config.get("port", 5432)),
-            dbname=self.config.get("db"),
-            user=self.config.get("user"),
-            password=self.config.get("password"),
+from . import metrics, tracing
+from .db_base import BaseDB, RowStream
+from .serialization import ColumnType, Converter, bytes_to_text, decimal_to_number, timedelta_to_seconds
+
+_POSITIONAL_RE = re.compile(r"%s")
+
+# Converters by type OID: numeric, bytea, interval (other types decode to JSON-native values)
+_CONVERTERS: Dict[int, Converter] = {
+    1700: decimal_to_number,
+    17: bytes_to_text,
+    1186: timedelta_to_seconds,
+}
+# Logical column types by type OID for exports; numeric is typed from its precision and scale
+_KINDS: Dict[int, str] = {
+    16: "bool", 20: "int", 21: "int", 23: "int", 26: "int",
+    700: "float", 701: "float", 1700: "decimal",
+    18: "string", 19: "string", 25: "string", 1042: "string", 1043: "string", 2950: "string",
+    17: "binary",
+    1082: "date", 1114: "datetime", 1184: "datetime", 1083: "time", 1186: "interval",
+    114: "json", 3802: "json",
+}
+
+
+def _copy_field(value: Any) -> str:
+    """One field of COPY ... (FORMAT csv): NULL is an unquoted empty field, text is always quoted."""
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return "t" if value else "f"
+    if isinstance(value, (int, float)):
+        return str(value)
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        text = "\\x" + bytes(value).hex()
+    elif isinstance(value, (datetime.date, datetime.time)):
+        text = value.isoformat()
+    elif isinstance(value, (dict, list)):
+        text = json.dumps(value)
+    else:
+        text = str(value)
+    return '"' + text.replace('"', '""') + '"'
+
+class PostgresDB(BaseDB):
+    dbtype = "postgres"
+
+    @classmethod
+    def open_connection(cls, config: Dict[str, Any]):
+        return psycopg2.connect(
+            host=config.get("host"),
+            port=int(config.get("port", 5432)),
+            dbname=config.get("db"),
+            user=config.get("user"),
+            password=config.get("password"),
         )
-        return self.conn
 
-    def query(self, sql: str, params: Tuple | Dict[str, Any] = ()) -> List[Dict[str, Any]]:
-        if self.conn is None:
-            self.connect()
-        cur = self.conn.cursor()
-        # PostgreSQL supports both positional (tuple) and named (dict with %(name)s syntax)
+    @classmethod
+    def reset_connection(cls, conn):
+        if conn.closed:
+            raise psycopg2.InterfaceError("connection already closed")
+        # psycopg2 opens a transaction on the first statement; don't hand out idle-in-transaction sessions
+        if conn.get_transaction_status() != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+            conn.rollback()
+
+    @classmethod
+    def cancel_connection(cls, conn):
+        # Sends a cancel request on a separate socket; the running execute() raises QueryCanceledError
+        conn.cancel()
+
+    @classmethod
+    def column_converters(cls, description) -> List[Converter]:
+        return [_CONVERTERS.get(d[1]) for d in description]
+
+    @classmethod
+    def column_types(cls, description) -> List[ColumnType]:
+        return [
+            ColumnType("decimal", d.precision, d.scale) if d[1] == 1700 else ColumnType(_KINDS.get(d[1]))
+            for d in description
+        ]
+
+    def _prepared(self, conn, sql: str, params: Any) -> Tuple[Any, str, Any, bool]:
+        # Server-side PREPARE once per connection, then EXECUTE skips parse and planning.
+        # Names come from a per-connection counter so a statement forgotten after an
+        # error never collides with its replacement.
+        counter = self._statement_cache_counter()
+
+        def prepare():
+            name = f"crud_{next(counter)}"
+            numbered = iter(range(1, len(params or ()) + 1))
+            body = _POSITIONAL_RE.sub(lambda m: f"${next(numbered)}", sql)
+            cur = conn.cursor()
+            try:
+                cur.execute(f"PREPARE {name} AS {body}")
+            finally:
+                cur.close()
+            return name
+
+        def deallocate(name):
+            cur = conn.cursor()
+            try:
+                cur.execute(f"DEALLOCATE {name}")
+            finally:
+                cur.close()
+
+        name = self._cached_statement(sql, prepare, deallocate)
         if params:
-            cur.execute(sql, params)
-        else:
-            cur.execute(sql)
-        cols = [desc[0] for desc in cur.description]
-        rows = [dict(zip(cols, r)) for r in cur.fetchall()]
-        cur.close()
-        return rows
-
-    def close(self):
-        if self.conn:
-            self.conn.close()
-            self.conn = None
+            return conn.cursor(), f"EXECUTE {name} ({', '.join(['%s'] * len(params))})", params, False
+        return conn.cursor(), f"EXECUTE {name}", params, False
+
+    def _insert_batch(self, cur, table: str, columns: Tuple[str, ...], rows: List[tuple]) -> int:
+        # COPY FROM STDIN streams the batch in one command instead of a statement per row
+        buf = io.StringIO()
+        for row in rows:
+            buf.write(",".join(_copy_field(v) for v in row))
+            buf.write("\n")
+        buf.seek(0)
+        cur.copy_expert(f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)", buf)
+        return cur.rowcount if cur.rowcount >= 0 else len(rows)
+
+    def _statement_cache_counter(self):
+        state = self.pool.state(self.conn) if self.pool else self._unpooled_state
+        return state.setdefault("statement_names", itertools.count(1))
+
+    def open_stream(self, sql: str, params: Tuple | Dict[str, Any] = (), arraysize: int = 500,
+                    convert: bool = True) -> RowStream:
+        # A named cursor is a server-side cursor: rows are pulled arraysize at a time
+        # instead of psycopg2 buffering the whole result client-side.
+        conn = self.connect()
+        cur = conn.cursor(name=f"sqlexec_{uuid.uuid4().hex}")
+        cur.itersize = arraysize
+        try:
+            started = time.perf_counter()
+            with tracing.span("db.execute", self._span_attributes(sql)):
+                if params:
+                    cur.execute(sql, params)
+                else:
+                    cur.execute(sql)
+                # description is only populated once the first rows have been fetched
+                first = cur.fetchmany(arraysize)
+            # A named cursor only runs the query on that first fetch, so it counts as execute time
+            executed = time.perf_counter() - started
+            metrics.observe_query(self.dbtype, self.server, executed, None, 0)
+            converters = self.column_converters(cur.description) if convert else None
+        except Exception as e:
+            metrics.observe_db_error(self.dbtype, self.server, e)
+            try:
+                cur.close()
+            except Exception:
+                pass
+            raise
+        return RowStream(cur, arraysize, cur.description, first_chunk=first, converters=converters,
+                         sql=sql, execute_seconds=executed)
@@ -0,0 +1,109 @@
+import sqlite3
+import threading
+from typing import Any, Dict, List
+
+from .config import DB_STATEMENT_CACHE_SIZE, SQLITE_CONFIG
+from .db_base import BaseDB
+from .serialization import Converter, bytes_to_text
+
+MEMORY_PATH = ":memory:"
+_PRAGMA_WORDS = {
+    "journal_mode": {"DELETE", "TRUNCATE", "PERSIST", "MEMORY", "WAL", "OFF"},
+    "synchronous": {"OFF", "NORMAL", "FULL", "EXTRA"},
+}
+
+# One idle connection per in-memory database keeps it alive while the pool opens and closes others
+_memory_anchors: Dict[str, sqlite3.Connection] = {}
+_anchor_lock = threading.Lock()
+
+
+def _setting(config: Dict[str, Any], name: str) -> Any:
+    value = config.get(name)
+    return SQLITE_CONFIG[name] if value is None else value
+
+
+def _pragma_word(config: Dict[str, Any], name: str) -> str:
+    value = str(_setting(config, name)).upper()
+    if value not in _PRAGMA_WORDS[name]:
+        raise ValueError(f"Invalid SQLite {name} '{value}'. Must be one of: {', '.join(sorted(_PRAGMA_WORDS[name]))}")
+    return value
+
+
+def is_memory(config: Dict[str, Any]) -> bool:
+    return config.get("path") == MEMORY_PATH
+
+
+def _memory_uri(config: Dict[str, Any]) -> str:
+    # Named shared-cache database: every pooled connection of this config sees the same data.
+    # Configs are loaded once at startup, so their identity names the database for the process.
+    return f"file:multidb_{id(config)}?mode=memory&cache=shared"
+
+
+def _blob_to_text(value: Any) -> Any:
+    # sqlite3 leaves cursor.description types empty, so BLOBs are recognised by value
+    return bytes_to_text(value) if isinstance(value, (bytes, bytearray, memoryview)) else value
+
+
+class SQLiteDB(BaseDB):
+    """Local SQLite database through the standard library driver.
+
+    Files are opened in WAL mode with memory-mapped reads (see SQLITE_CONFIG).
+    A ":memory:" database lives as long as the worker process and is shared by
+    its pooled connections.
+    """
+
+    dbtype = "sqlite"
+
+    @classmethod
+    def open_connection(cls, config: Dict[str, Any]):
+        path = config.get("path")
+        if not path:
+            raise RuntimeError("SQLite database path is not configured (set SQLITE_PATH or \"path\" in SQLITE_CONFIGS)")
+        options = {
+            "timeout": float(_setting(config, "busy_timeout")),
+            # Pooled connections move between executor threads but are only used by one at a time
+            "check_same_thread": False,
+            "cached_statements": max(DB_STATEMENT_CACHE_SIZE, 1),
+        }
+        if path == MEMORY_PATH:
+            uri = _memory_uri(config)
+            with _anchor_lock:
+                if uri not in _memory_anchors:
+                    _memory_anchors[uri] = sqlite3.connect(uri, uri=True, **options)
+            return sqlite3.connect(uri, uri=True, **options)
+
+        conn = sqlite3.connect(path, **options)
+        try:
+            # journal_mode is stored in the file; synchronous and mmap_size are per connection
+            conn.execute(f"PRAGMA journal_mode={_pragma_word(config, 'journal_mode')}")
+            conn.execute(f"PRAGMA synchronous={_pragma_word(config, 'synchronous')}")
+            conn.execute(f"PRAGMA mmap_size={int(_setting(config, 'mmap_size'))}")
+        except Exception:
+            conn.close()
+            raise
+        return conn
+
+    @classmethod
+    def reset_connection(cls, conn):
+        if conn.in_transaction:
+            conn.rollback()
+
+    @classmethod
+    def cancel_connection(cls, conn):
+        # sqlite3_interrupt() is safe to call from another thread
+        conn.interrupt()
+
+    def _pool_settings(self) -> Dict[str, float]:
+        settings = super()._pool_settings()
+        if is_memory(self.config):
+            # Shared-cache databases lock whole tables instead of waiting on busy_timeout,
+            # so concurrent connections would fail with "database table is locked"
+            settings["max_size"] = 1
+        return settings
+
+    def _last_insert_id(self, cur) -> Any:
+        return cur.lastrowid
+
+    @classmethod
+    def column_converters(cls, description) -> List[Converter]:
+        return [_blob_to_text] * len(description)
@@ -0,0 +1,404 @@
+import base64
+import datetime
+import decimal
+import functools
+import hashlib
+import json
+import re
+import uuid
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from .config import GET_RECORDS_CHUNK_SIZE, SQL_TEMPLATE_CACHE_SIZE
+
+# :name placeholders (but not PostgreSQL ::casts)
+_NAMED_PARAM_RE = re.compile(r"(?<![:\w]):([A-Za-z_]\w*)")
+# Literals, quoted identifiers and comments, blanked out before split_order_by() looks for clauses
+_LITERAL_RE = re.compile(r"""'(?:[^']|'')*'|"[^"]*"|`[^`]*`|--[^\n]*|/\*.*?\*/""", re.DOTALL)
+_ORDER_BY_RE = re.compile(r"order\s+by\b")
+_ROW_LIMIT_RE = re.compile(r"[()]|\b(?:limit|offset|fetch|for)\b")
+_QUALIFIER_RE = re.compile(r"\b[A-Za-z_]\w*\.(?=[A-Za-z_\"])")
+_IDENTIFIER_RE = re.compile(r"^[A-Za-z_][A-Za-z0-9_$#]*$")
+
+KEYSET_PARAM_PREFIX = "ks_last_"
+# Extra column carrying COUNT(*) OVER () in count_mode=window; stripped before rows are returned
+WINDOW_TOTAL_COLUMN = "sqlexec_total"
+# Extra column carrying the position of the key a /getRecords row matched; stripped before rows are returned
+LOOKUP_POSITION_COLUMN = "getrecords_pos"
+
+
+class UnsupportedQuery(ValueError):
+    """The query's ORDER BY cannot be moved for a pagination mode that wraps the query."""
+
+
+def strip_order_by(sql: str) -> str:
+    """Drop a trailing ORDER BY clause (used when the query is wrapped as a subquery).
+
+    A query whose ORDER BY cannot be split off is returned unchanged.
+    """
+    try:
+        return split_order_by(sql)[0]
+    except UnsupportedQuery:
+        return sql
+
+
+def split_order_by(sql: str) -> Tuple[str, Optional[str]]:
+    """Split a query into (body, trailing ORDER BY expressions or None).
+
+    Only an ORDER BY outside parentheses, literals and comments counts, so
+    ones inside OVER (...) or subqueries stay in the body; the clause may
+    span lines. Raises UnsupportedQuery for unbalanced parentheses or
+    quotes, and when the ORDER BY is followed by LIMIT, OFFSET, FETCH or
+    FOR, which cannot move with it.
+    """
+    # Same length as sql, so positions carry over
+    text = sql.lower()
+    if any(mark in text for mark in ("'", '"', "`", "--", "/*")):
+        text = _LITERAL_RE.sub(lambda m: " " * len(m.group(0)), text)
+        if any(quote in text for quote in ("'", '"', "`")):
+            raise UnsupportedQuery("Unterminated quoted string or identifier in the query")
+    if text.count("(") != text.count(")"):
+        raise UnsupportedQuery("Unbalanced parentheses in the query")
+    order = None
+    for m in _ORDER_BY_RE.finditer(text):
+        start = m.start()
+        if start and (text[start - 1].isalnum() or text[start - 1] in "_$#"):
+            continue
+        if text.count("(", 0, start) == text.count(")", 0, start):
+            order = m
+    if order is None:
+        return sql, None
+    depth = 0
+    for m in _ROW_LIMIT_RE.finditer(text, order.end()):
+        token = m.group(0)
+        if token == "(":
+            depth += 1
+        elif token == ")":
+            depth -= 1
+        elif depth == 0:
+            raise UnsupportedQuery(f"The query's ORDER BY is followed by {token.upper()}; leave paging to the API")
+    return sql[:order.start()].rstrip(), sql[order.end():].strip()
+
+
+def is_identifier(name: str) -> bool:
+    return bool(_IDENTIFIER_RE.match(name))
+
+
+class Dialect:
+    """SQL differences between the supported databases.
+
+    Callers write SQL with :name placeholders; bind_named() converts them to
+    the driver's paramstyle right before execution.
+    """
+
+    name = ""
+    # Row-value comparison "(a, b) > (x, y)" is supported natively
+    row_value_compare = True
+    # ORDER BY used when a window-count query has none (MS SQL requires one for OFFSET)
+    default_order: Optional[str] = None
+    # Most SELECTs one UNION ALL may combine, and most bind variables in one statement (None = no practical limit)
+    max_compound_select: Optional[int] = None
+    max_bind_params: Optional[int] = None
+    # Savepoints can be set inside the driver's implicit transaction
+    savepoints = True
+
+    def bind_named(self, sql: str, params: Optional[Dict[str, Any]]) -> Tuple[str, Any]:
+        return sql, params or {}
+
+    def placeholders(self, count: int, start: int = 1) -> List[str]:
+        """Positional bind markers for `count` values, numbered from `start` where the driver needs it."""
+        return ["?"] * count
+
+    def paginate(self, sql: str, limit: int, offset: int = 0) -> str:
+        return f"{sql} LIMIT {limit} OFFSET {offset}"
+
+    def savepoint(self, name: str) -> str:
+        return f"SAVEPOINT {name}"
+
+    def rollback_to_savepoint(self, name: str) -> str:
+        return f"ROLLBACK TO SAVEPOINT {name}"
+
+    def lookup_chunk_size(self, key_columns: int) -> int:
+        """Keys per lookup query for a key of key_columns columns, within the engine's limits."""
+        size = GET_RECORDS_CHUNK_SIZE
+        if self.max_compound_select:
+            size = min(size, self.max_compound_select)
+        if self.max_bind_params:
+            size = min(size, self.max_bind_params // key_columns)
+        return max(1, size)
+
+    def count_query(self, sql: str) -> str:
+        return f"SELECT COUNT(*) as total FROM ({strip_order_by(sql)}) count_subquery"
+
+    def window_count_query(self, sql: str, limit: int, offset: int = 0) -> str:
+        """One page plus the full result size in every row via COUNT(*) OVER ().
+
+        The caller's ORDER BY moves outside the subquery, so it may only refer
+        to output columns; table qualifiers such as "u." are dropped.
+        """
+        body, order = split_order_by(sql)
+        order = _QUALIFIER_RE.sub("", order) if order else self.default_order
+        wrapped = f"SELECT q.*, COUNT(*) OVER () AS {WINDOW_TOTAL_COLUMN} FROM ({body}) q"
+        if order:
+            wrapped += f" ORDER BY {order}"
+        return self.paginate(wrapped, limit, offset)
+
+    def estimate_count(self, db, sql: str, params: Any) -> Optional[int]:
+        """Planner row estimate for an already-bound query, or None if unsupported."""
+        return None
+
+    def keyset_predicate(self, columns: Sequence[str], descending: bool = False) -> str:
+        """WHERE predicate seeking past the last key values bound as :ks_last_<i>."""
+        op = "<" if descending else ">"
+        names = [f":{KEYSET_PARAM_PREFIX}{i}" for i in range(len(columns))]
+        if self.row_value_compare or len(columns) == 1:
+            if len(columns) == 1:
+                return f"{columns[0]} {op} {names[0]}"
+            return f"({', '.join(columns)}) {op} ({', '.join(names)})"
+        # Expand (a, b, c) > (x, y, z) into a > x OR (a = x AND b > y) OR ...
+        terms = []
+        for i, col in enumerate(columns):
+            equal = [f"{columns[j]} = {names[j]}" for j in range(i)]
+            terms.append("(" + " AND ".join(equal + [f"{col} {op} {names[i]}"]) + ")")
+        return "(" + " OR ".join(terms) + ")"
+
+    def keyset_query(self, sql: str, columns: Sequence[str], has_last: bool, descending: bool, limit: int) -> str:
+        """Wrap a query so it returns `limit` rows ordered by columns, after the last key if has_last."""
+        direction = " DESC" if descending else ""
+        inner, _ = split_order_by(sql)
+        where = f" WHERE {self.keyset_predicate(columns, descending)}" if has_last else ""
+        order = ", ".join(f"{c}{direction}" for c in columns)
+        return self.paginate(f"SELECT * FROM ({inner}) keyset_q{where} ORDER BY {order}", limit)
+
+
+class OracleDialect(Dialect):
+    name = "oracle"
+    row_value_compare = False
+
+    def placeholders(self, count: int, start: int = 1) -> List[str]:
+        return [f":{i}" for i in range(start, start + count)]
+
+    def paginate(self, sql: str, limit: int, offset: int = 0) -> str:
+        return f"{sql} OFFSET {offset} ROWS FETCH NEXT {limit} ROWS ONLY"
+
+    def estimate_count(self, db, sql: str, params: Any) -> Optional[int]:
+        # EXPLAIN PLAN does not bind values; the optimizer estimates with unknown binds
+        statement_id = f"sqlexec_{uuid.uuid4().hex[:20]}"
+        db.execute(f"EXPLAIN PLAN SET STATEMENT_ID = '{statement_id}' FOR {sql}", commit=False)
+        try:
+            rows = db.query("SELECT cardinality FROM plan_table WHERE statement_id = :1 AND id = 0", (statement_id,))
+        finally:
+            db.execute("DELETE FROM plan_table WHERE statement_id = :1", (statement_id,))
+        if not rows or row_value(rows[0], "cardinality") is None:
+            return None
+        return int(row_value(rows[0], "cardinality"))
+
+
+class MySQLDialect(Dialect):
+    name = "mysql"
+
+    def bind_named(self, sql: str, params: Optional[Dict[str, Any]]) -> Tuple[str, Any]:
+        # mysql.connector / psycopg2 pyformat: :name -> %(name)s, single pass over the SQL
+        if not params:
+            return sql, {}
+        return _NAMED_PARAM_RE.sub(
+            lambda m: f"%({m.group(1)})s" if m.group(1) in params else m.group(0), sql
+        ), params
+
+    def placeholders(self, count: int, start: int = 1) -> List[str]:
+        return ["%s"] * count
+
+    def estimate_count(self, db, sql: str, params: Any) -> Optional[int]:
+        # Classic EXPLAIN: multiply the estimated rows (after filtering) of the outer query's tables
+        rows = db.query(f"EXPLAIN {sql}", params)
+        estimate, seen = 1.0, False
+        for row in rows:
+            if str(row.get("select_type", "")).upper() in ("SIMPLE", "PRIMARY") and row.get("rows") is not None:
+                estimate *= float(row["rows"]) * float(row.get("filtered") or 100) / 100
+                seen = True
+        return int(estimate) if seen else None
+
+
+class PostgresDialect(MySQLDialect):
+    name = "postgres"
+
+    def estimate_count(self, db, sql: str, params: Any) -> Optional[int]:
+        rows = db.query(f"EXPLAIN (FORMAT JSON) {sql}", params)
+        if not rows:
+            return None
+        plan = next(iter(rows[0].values()))
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]["Plan"]["Plan Rows"])
+
+
+class MSSQLDialect(Dialect):
+    name = "mssql"
+    row_value_compare = False
+    default_order = "(SELECT NULL)"
+    # SAVE TRANSACTION does not open pyodbc's implicit transaction; a failed statement is
+    # rolled back on its own anyway (XACT_ABORT OFF) while the transaction stays usable
+    savepoints = False
+    # SQL Server rejects requests with more than 2100 parameters; keep a margin below it
+    max_bind_params = 2000
+
+    def bind_named(self, sql: str, params: Optional[Dict[str, Any]]) -> Tuple[str, Any]:
+        # pyodbc only understands positional "?" markers
+        if not params:
+            return sql, ()
+        values: List[Any] = []
+
+        def repl(m):
+            name = m.group(1)
+            if name not in params:
+                return m.group(0)
+            values.append(params[name])
+            return "?"
+
+        return _NAMED_PARAM_RE.sub(repl, sql), tuple(values)
+
+    def paginate(self, sql: str, limit: int, offset: int = 0) -> str:
+        return f"{sql} OFFSET {offset} ROWS FETCH NEXT {limit} ROWS ONLY"
+
+
+class SQLiteDialect(Dialect):
+    name = "sqlite"
+    # SQLITE_MAX_COMPOUND_SELECT defaults to 500; SQLITE_MAX_VARIABLE_NUMBER to 999 before SQLite 3.32
+    max_compound_select = 500
+    max_bind_params = 999
+
+
+DIALECTS: Dict[str, Dialect] = {
+    "oracle": OracleDialect(),
+    "mysql": MySQLDialect(),
+    "postgres": PostgresDialect(),
+    "mssql": MSSQLDialect(),
+    "sqlite": SQLiteDialect(),
+}
+
+
+def get_dialect(dbtype: str) -> Dialect:
+    return DIALECTS[dbtype]
+
+
+# -- compiled CRUD statements ------------------------------------------------
+
+@functools.lru_cache(maxsize=SQL_TEMPLATE_CACHE_SIZE)
+def compile_statement(
+    dbtype: str,
+    op: str,
+    table: str,
+    columns: Tuple[str, ...] = (),
+    where: Tuple[str, ...] = (),
+    fields: str = "*",
+) -> str:
+    """SQL for one CRUD statement shape, built once per (dbtype, op, table, columns).
+
+    op is "select", "insert", "update" or "delete"; columns are the INSERT/SET
+    columns and where the equality-matched columns, bound positionally in that
+    order. Returning the identical string object for a repeated shape also lets
+    drivers that key prepared statements on the SQL text reuse them.
+    """
+    dialect = get_dialect(dbtype)
+    marks = dialect.placeholders(len(columns) + len(where))
+    set_marks, where_marks = marks[:len(columns)], marks[len(columns):]
+    where_clause = " AND ".join(f"{col} = {mark}" for col, mark in zip(where, where_marks))
+    if op == "select":
+        return f"SELECT {fields} FROM {table} WHERE {where_clause}"
+    if op == "insert":
+        return f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join(set_marks)})"
+    if op == "update":
+        set_clause = ", ".join(f"{col} = {mark}" for col, mark in zip(columns, set_marks))
+        return f"UPDATE {table} SET {set_clause} WHERE {where_clause}"
+    if op == "delete":
+        return f"DELETE FROM {table} WHERE {where_clause}"
+    raise ValueError(f"Unknown statement type '{op}'")
+
+
+@functools.lru_cache(maxsize=SQL_TEMPLATE_CACHE_SIZE)
+def compile_lookup(dbtype: str, table: str, key_columns: Tuple[str, ...], count: int, fields: str = "*") -> str:
+    """SELECT matching `count` keys at once: one equality lookup per key, combined with UNION ALL.
+
+    Each branch is the /getRecord statement for its key plus its position as
+    LOOKUP_POSITION_COLUMN, so the database decides what matches (collations,
+    CHAR padding, implicit date conversion) and a row matching several keys
+    comes back once for each. Keys are bound positionally, key by key.
+    """
+    marks = get_dialect(dbtype).placeholders(len(key_columns) * count)
+    width = len(key_columns)
+    # "*" gets a table alias: "schema.table.*" is not valid everywhere, and "*, expr" is not valid on Oracle
+    select, source = (fields, table) if fields != "*" else ("lookup_t.*", f"{table} lookup_t")
+    branches = []
+    for pos in range(count):
+        key_marks = marks[pos * width:(pos + 1) * width]
+        where = " AND ".join(f"{col} = {mark}" for col, mark in zip(key_columns, key_marks))
+        branches.append(f"SELECT {select}, {pos} AS {LOOKUP_POSITION_COLUMN} FROM {source} WHERE {where}")
+    return " UNION ALL ".join(branches)
+
+
+# -- keyset continuation tokens ----------------------------------------------
+
+class InvalidToken(ValueError):
+    pass
+
+
+def _encode_value(value: Any) -> Any:
+    if isinstance(value, datetime.datetime):
+        return {"$dt": value.isoformat()}
+    if isinstance(value, datetime.date):
+        return {"$d": value.isoformat()}
+    if isinstance(value, decimal.Decimal):
+        return {"$n": str(value)}
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return {"$b": base64.b64encode(value).decode("ascii")}
+    return value
+
+
+def _decode_value(value: Any) -> Any:
+    if isinstance(value, dict) and len(value) == 1:
+        tag, raw = next(iter(value.items()))
+        if tag == "$dt":
+            return datetime.datetime.fromisoformat(raw)
+        if tag == "$d":
+            return datetime.date.fromisoformat(raw)
+        if tag == "$n":
+            return decimal.Decimal(raw)
+        if tag == "$b":
+            return base64.b64decode(raw)
+    return value
+
+
+def _query_fingerprint(sql: str, columns: Sequence[str], descending: bool) -> str:
+    raw = json.dumps([sql, list(columns), descending])
+    return hashlib.sha256(raw.encode()).hexdigest()[:16]
+
+
+def encode_keyset_token(sql: str, columns: Sequence[str], descending: bool, values: Sequence[Any]) -> str:
+    payload = {"q": _query_fingerprint(sql, columns, descending), "v": [_encode_value(v) for v in values]}
+    raw = json.dumps(payload, separators=(",", ":"), default=str).encode()
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_keyset_token(token: str, sql: str, columns: Sequence[str], descending: bool) -> List[Any]:
+    """Return the last key values from a token, rejecting tokens issued for another query."""
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        payload = json.loads(raw)
+        fingerprint, values = payload["q"], payload["v"]
+    except Exception as e:
+        raise InvalidToken("Malformed continuation token") from e
+    if fingerprint != _query_fingerprint(sql, columns, descending):
+        raise InvalidToken("Continuation token does not belong to this query and key ordering")
+    if not isinstance(values, list) or len(values) != len(columns):
+        raise InvalidToken("Continuation token does not match the key columns")
+    return [_decode_value(v) for v in values]
+
+
+def row_value(row: Dict[str, Any], column: str) -> Any:
+    """Look up a column in a result row, tolerating driver case folding (Oracle upper-cases)."""
+    if column in row:
+        return row[column]
+    lowered = column.lower()
+    for key, value in row.items():
+        if key.lower() == lowered:
+            return value
+    raise KeyError(column)
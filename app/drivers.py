@@ -0,0 +1,101 @@
+"""Database client classes by dbtype, imported on first use.
+
+A driver package (oracledb, mysql.connector, psycopg2, pyodbc) is only
+imported when a request, DB_PRELOAD_DRIVERS or the warm-up first needs its
+dbtype, so a worker that serves one database never pays for the others.
+A client module may define init_client(), run once right after the import
+(Oracle thick mode); it returns details for the report. Import and init
+times are logged and kept for GET /admin/drivers.
+"""
+import importlib
+import logging
+import threading
+import time
+from typing import Any, Dict, Iterable, Tuple, Type
+
+from .db_base import BaseDB
+
+logger = logging.getLogger(__name__)
+
+# dbtype -> (client module, client class)
+DRIVERS: Dict[str, Tuple[str, str]] = {
+    "oracle": (".db_oracle", "OracleDB"),
+    "mysql": (".db_mysql", "MySQLDB"),
+    "postgres": (".db_postgres", "PostgresDB"),
+    "mssql": (".db_mssql", "MSSQLDB"),
+    "sqlite": (".db_sqlite", "SQLiteDB"),
+}
+
+_classes: Dict[str, Type[BaseDB]] = {}
+_loads: Dict[str, Dict[str, Any]] = {}
+_lock = threading.Lock()
+
+
+def _ms(seconds: float) -> float:
+    return round(seconds * 1000, 1)
+
+
+def client_class(dbtype: str) -> Type[BaseDB]:
+    """The client class for dbtype, importing and initialising its driver on the first call.
+
+    Raises the import error when the driver cannot be loaded (e.g. pyodbc
+    without its system libraries); the next call tries again.
+    """
+    cls = _classes.get(dbtype)
+    if cls is not None:
+        return cls
+    module_name, class_name = DRIVERS[dbtype]
+    with _lock:
+        cls = _classes.get(dbtype)
+        if cls is not None:
+            return cls
+        started = time.perf_counter()
+        try:
+            module = importlib.import_module(module_name, __package__)
+        except Exception as e:
+            _loads[dbtype] = {"status": "failed", "import_ms": _ms(time.perf_counter() - started),
+                              "error": f"{type(e).__name__}: {e}"}
+            logger.error(f"{dbtype} driver failed to load: {e}")
+            raise
+        imported = time.perf_counter()
+        load: Dict[str, Any] = {"status": "loaded", "import_ms": _ms(imported - started)}
+        init = getattr(module, "init_client", None)
+        if init is not None:
+            load.update(init())
+            load["init_ms"] = _ms(time.perf_counter() - imported)
+        load["loaded_at"] = time.time()
+        _loads[dbtype] = load
+        _classes[dbtype] = cls = getattr(module, class_name)
+    logger.info(f"{dbtype} driver {describe(load)}")
+    return cls
+
+
+def preload(dbtypes: Iterable[str]):
+    """Load drivers ahead of their first request; failures are logged and left for first use to report."""
+    for dbtype in dbtypes:
+        if dbtype not in DRIVERS:
+            logger.warning(f"Unknown dbtype '{dbtype}' in DB_PRELOAD_DRIVERS ignored")
+            continue
+        try:
+            client_class(dbtype)
+        except Exception:
+            pass
+
+
+def describe(load: Dict[str, Any]) -> str:
+    """One-line summary of a load_report() entry, e.g. "loaded (import 55.5 ms, init 0.9 ms, thick_mode=False)"."""
+    if load["status"] != "loaded":
+        return load["status"]
+    parts = [f"import {load['import_ms']} ms"]
+    if "init_ms" in load:
+        parts.append(f"init {load['init_ms']} ms")
+    # init_client() details; errors are logged where they happen and kept in the report
+    parts += [f"{k}={v}" for k, v in load.items()
+              if k not in ("status", "import_ms", "init_ms", "loaded_at") and not k.endswith("_error")]
+    return f"loaded ({', '.join(parts)})"
+
+
+def load_report() -> Dict[str, Dict[str, Any]]:
+    """Load status and timings per dbtype: loaded, failed or not loaded (yet)."""
+    with _lock:
+        return {dbtype: dict(_loads.get(dbtype, {"status": "not loaded"})) for dbtype in DRIVERS}
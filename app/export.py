@@ -0,0 +1,267 @@
+import asyncio
+import csv
+import decimal
+import io
+import logging
+from typing import Any, AsyncIterator, List, Optional
+
+from .db_base import BaseDB, RowStream
+from .serialization import ColumnType, Converter, bytes_to_text, dumps
+
+try:
+    import pyarrow
+    import pyarrow.ipc
+    import pyarrow.parquet
+except ImportError:  # optional: only needed for the arrow and parquet formats
+    pyarrow = None
+
+logger = logging.getLogger(__name__)
+
+EXPORT_MEDIA_TYPES = {
+    "arrow": "application/vnd.apache.arrow.stream",
+    "parquet": "application/vnd.apache.parquet",
+    "csv": "text/csv; charset=utf-8",
+}
+EXPORT_EXTENSIONS = {"arrow": "arrows", "parquet": "parquet", "csv": "csv"}
+ARROW_FORMATS = ("arrow", "parquet")
+
+
+class _Sink:
+    """Write-only file object that collects what a writer produced since the last drain()."""
+
+    closed = False
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+        self._pos = 0
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self._chunks.append(data)
+        self._pos += len(data)
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def tell(self) -> int:
+        return self._pos
+
+    def close(self):
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data, self._chunks = b"".join(self._chunks), []
+        return data
+
+
+def _read(value: Any) -> Any:
+    return value.read() if hasattr(value, "read") else value
+
+
+def _to_text(value: Any) -> str:
+    value = _read(value)
+    if isinstance(value, str):
+        return value
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return bytes_to_text(value)
+    if isinstance(value, (dict, list)):
+        return dumps(value).decode()
+    if isinstance(value, (set, frozenset)):
+        return ",".join(sorted(value))
+    return str(value)
+
+
+def _to_bytes(value: Any) -> bytes:
+    value = _read(value)
+    return value.encode() if isinstance(value, str) else bytes(value)
+
+
+def _to_decimal(value: Any) -> decimal.Decimal:
+    return value if isinstance(value, decimal.Decimal) else decimal.Decimal(str(value))
+
+
+def _declared_decimal(column: ColumnType) -> bool:
+    """Whether a decimal column has a precision/scale Arrow's decimal128 can hold exactly."""
+    p, s = column.precision, column.scale
+    return bool(p) and p <= 38 and s is not None and 0 <= s <= p
+
+
+def _arrow_type(column: ColumnType):
+    kind = column.kind
+    if kind == "decimal":
+        # Without a declared precision the exact digits are kept as text
+        return pyarrow.decimal128(column.precision, column.scale) if _declared_decimal(column) else pyarrow.string()
+    return {
+        "int": pyarrow.int64(),
+        "float": pyarrow.float64(),
+        "bool": pyarrow.bool_(),
+        "string": pyarrow.string(),
+        "json": pyarrow.string(),
+        "binary": pyarrow.binary(),
+        "date": pyarrow.date32(),
+        "datetime": pyarrow.timestamp("us"),
+        "time": pyarrow.time64("us"),
+        "interval": pyarrow.duration("us"),
+    }.get(kind)
+
+
+def _arrow_converter(column: ColumnType) -> Converter:
+    kind = column.kind
+    if kind in ("string", "json"):
+        return _to_text
+    if kind == "binary":
+        return _to_bytes
+    if kind == "decimal":
+        return _to_decimal if _declared_decimal(column) else _to_text
+    if kind == "int":
+        return int
+    if kind == "float":
+        return float
+    if kind is None:
+        return _read
+    return None
+
+
+class CsvExportWriter:
+    """CSV with a header row; values keep their full text form (Decimals are not rounded)."""
+
+    def __init__(self, columns: List[str], types: List[ColumnType]):
+        self.columns = columns
+        self._buffer = io.StringIO()
+        self._writer = csv.writer(self._buffer)
+
+    def _drain(self) -> bytes:
+        data = self._buffer.getvalue().encode()
+        self._buffer.seek(0)
+        self._buffer.truncate()
+        return data
+
+    @staticmethod
+    def _field(value: Any) -> Any:
+        if value is None or isinstance(value, (str, int, float, decimal.Decimal)):
+            return value
+        if hasattr(value, "isoformat"):
+            return value.isoformat()
+        if hasattr(value, "total_seconds"):
+            return value.total_seconds()
+        return _to_text(value)
+
+    def start(self) -> bytes:
+        self._writer.writerow(self.columns)
+        return self._drain()
+
+    def write(self, rows: List[Any]) -> bytes:
+        field = self._field
+        self._writer.writerows([field(v) for v in row] for row in rows)
+        return self._drain()
+
+    def finish(self) -> bytes:
+        return b""
+
+
+class ArrowExportWriter:
+    """Arrow IPC stream or Parquet file written one record batch per driver fetch.
+
+    The schema comes from the columns' logical types; untyped columns take
+    the type pyarrow infers from the first batch. Parquet writes a row group
+    per batch and its footer at the end, so only the current batch is held
+    in memory.
+    """
+
+    def __init__(self, columns: List[str], types: List[ColumnType], parquet: bool = False):
+        self.columns = columns
+        self.types = types
+        self.parquet = parquet
+        self._converters = [_arrow_converter(t) for t in types]
+        self._arrow_types = [_arrow_type(t) for t in types]
+        self._sink = _Sink()
+        self._writer = None
+        self._schema = None
+
+    def _open(self, arrays: Optional[List[Any]] = None):
+        fields = []
+        for i, name in enumerate(self.columns):
+            arrow_type = self._arrow_types[i]
+            if arrow_type is None:
+                arrow_type = arrays[i].type if arrays is not None else pyarrow.string()
+                if pyarrow.types.is_null(arrow_type):
+                    arrow_type = pyarrow.string()
+            fields.append(pyarrow.field(name, arrow_type))
+        self._schema = pyarrow.schema(fields)
+        if self.parquet:
+            self._writer = pyarrow.parquet.ParquetWriter(self._sink, self._schema)
+        else:
+            self._writer = pyarrow.ipc.new_stream(self._sink, self._schema)
+
+    def start(self) -> bytes:
+        return b""
+
+    def write(self, rows: List[Any]) -> bytes:
+        columns = list(zip(*rows))
+        values = []
+        for i, convert in enumerate(self._converters):
+            column = columns[i]
+            if convert is not None:
+                column = [None if v is None else convert(v) for v in column]
+            values.append(column)
+        if self._writer is None:
+            inferred = [
+                pyarrow.array(v) if t is None else None
+                for v, t in zip(values, self._arrow_types)
+            ]
+            self._open(inferred)
+        arrays = [pyarrow.array(v, type=f.type) for v, f in zip(values, self._schema)]
+        self._writer.write_batch(pyarrow.RecordBatch.from_arrays(arrays, schema=self._schema))
+        return self._sink.drain()
+
+    def finish(self) -> bytes:
+        if self._writer is None:
+            self._open()
+        self._writer.close()
+        return self._sink.drain()
+
+
+def export_writer(fmt: str, db: BaseDB, stream: RowStream):
+    types = db.column_types(stream.description)
+    if fmt == "csv":
+        return CsvExportWriter(stream.columns, types)
+    return ArrowExportWriter(stream.columns, types, parquet=fmt == "parquet")
+
+
+async def stream_export(db: BaseDB, stream: RowStream, writer) -> AsyncIterator[bytes]:
+    """Yield an export file, encoding one driver fetch at a time on the db's executor.
+
+    As with stream_rows, a failure after the first byte cannot change the
+    status code: the file is left truncated (Arrow readers and Parquet
+    readers reject it, CSV simply ends early) and the error is logged.
+    """
+
+    def step() -> Optional[bytes]:
+        rows = stream.fetch()
+        return writer.write(rows) if rows else None
+
+    job = None
+    try:
+        header = writer.start()
+        if header:
+            yield header
+        while True:
+            # Shielded for the same reason as in stream_rows
+            job = asyncio.ensure_future(db.run(step))
+            chunk = await asyncio.shield(job)
+            job = None
+            if chunk is None:
+                break
+            if chunk:
+                yield chunk
+        yield await db.run(writer.finish)
+    except asyncio.CancelledError:
+        logger.info("export stream cancelled by client")
+        raise
+    except Exception as e:
+        logger.error(f"export stream failed: {e}")
+    finally:
+        if job is not None and not job.done():
+            await asyncio.wait([job])
+        await db.run(db.close_stream, stream)
@@ -0,0 +1,83 @@
+from typing import Any, Dict, List, Literal, Sequence, Tuple
+
+from . import tracing
+
+# Response layouts for query results:
+#   objects  - "records": [{column: value, ...}, ...] (default)
+#   rows     - "columns": [...] once, "rows": [[value, ...], ...]
+#   columnar - "columns": [...] once, "data": [[column 1 values], [column 2 values], ...]
+ResultFormat = Literal["objects", "rows", "columnar"]
+
+
+def plain_rows(rows: Sequence[Any]) -> List[Any]:
+    """Rows as plain tuples or lists (pyodbc.Row is a sequence but neither)."""
+    if rows and type(rows[0]) not in (tuple, list):
+        return [tuple(r) for r in rows]
+    return list(rows)
+
+
+def shape_rows(columns: List[str], rows: Sequence[Any], fmt: str) -> Dict[str, Any]:
+    """Response fields holding a result set in the requested layout.
+
+    Only the objects layout builds a dict per row; rows and columnar reuse
+    the row sequences and name each column once.
+    """
+    with tracing.span("shape_rows", {"format": fmt}):
+        if fmt == "rows":
+            return {"columns": columns, "rows": plain_rows(rows)}
+        if fmt == "columnar":
+            data = [list(col) for col in zip(*rows)] if rows else [[] for _ in columns]
+            return {"columns": columns, "data": data}
+        return {"records": [dict(zip(columns, r)) for r in rows]}
+
+
+def column_index(columns: List[str], name: str) -> int:
+    """Position of a column, tolerating driver case folding (Oracle upper-cases)."""
+    lowered = name.lower()
+    for i, col in enumerate(columns):
+        if col == name or col.lower() == lowered:
+            return i
+    raise KeyError(name)
+
+
+def merge_results(results: Sequence[Tuple[List[str], Sequence[Any]]],
+                  sources: Sequence[Any] = ()) -> Tuple[List[str], List[list]]:
+    """Concatenate result sets into one (columns, rows), unioning columns by name.
+
+    Names are matched case-insensitively (Oracle upper-cases, PostgreSQL lower-cases)
+    and keep the spelling of their first appearance; a column a result set lacks is
+    None in its rows. With sources, a leading "_source" column tags each row.
+    """
+    columns: List[str] = ["_source"] if sources else []
+    positions: Dict[str, int] = {}
+    mappings = []
+    for cols, _ in results:
+        mapping = []
+        for col in cols:
+            key = col.lower()
+            if key not in positions:
+                positions[key] = len(columns)
+                columns.append(col)
+            mapping.append(positions[key])
+        mappings.append(mapping)
+    width = len(columns)
+    merged: List[list] = []
+    for n, ((_, rows), mapping) in enumerate(zip(results, mappings)):
+        for row in rows:
+            out = [None] * width
+            if sources:
+                out[0] = sources[n]
+            for i, value in zip(mapping, row):
+                out[i] = value
+            merged.append(out)
+    return columns, merged
+
+
+def sort_rows(rows: List[Any], keys: Sequence[Tuple[int, bool]]) -> List[Any]:
+    """Sort rows by (column index, descending) keys, most significant first; NULLs sort last."""
+    for index, descending in reversed(keys):
+        present = [r for r in rows if r[index] is not None]
+        missing = [r for r in rows if r[index] is None]
+        present.sort(key=lambda r: r[index], reverse=descending)
+        rows = present + missing
+    return rows
@@ -0,0 +1,113 @@
+"""Deep health check: a ping of every configured server, behind GET /health/deep.
+
+All servers are probed concurrently, each through its connection pool and
+limited to HEALTH_CHECK_TIMEOUT. A round's results are reused for
+HEALTH_CHECK_CACHE_TTL seconds, and callers arriving while a round runs
+wait for that round, so frequent load-balancer polls cost the databases at
+most one ping per server per TTL (per worker). The last success and the
+last failure with its reason are kept per (dbtype, server) across rounds.
+A failure's "error" is only the exception class; the driver's message,
+which can name hosts, ports, users and DSNs, is kept apart as
+"error_detail" for authenticated callers (see redact_errors()).
+"""
+import asyncio
+import logging
+import time
+from typing import Any, Dict, Optional, Set, Tuple
+
+from . import drivers
+from .config import HEALTH_CHECK_CACHE_TTL, HEALTH_CHECK_TIMEOUT, configured_servers
+
+logger = logging.getLogger(__name__)
+
+# Probes that outlived their timeout; kept referenced until their connection is released
+_abandoned: Set[asyncio.Future] = set()
+
+
+def redact_errors(servers: Dict[str, Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """Per-server results without the driver's error messages, for callers without an API key."""
+    return {key: {k: v for k, v in entry.items() if k != "error_detail"} for key, entry in servers.items()}
+
+
+def _ping(db):
+    db.ping_connection(db.connect())
+
+
+async def _release_when_done(db, task: asyncio.Future):
+    """Wait out an abandoned probe, then hand its connection back (discarded: its state is unknown)."""
+    try:
+        await task
+    except Exception:
+        pass
+    await db.aclose(discard=True)
+
+
+class HealthCheck:
+    """Latest probe result per (dbtype, server), refreshed at most once per HEALTH_CHECK_CACHE_TTL."""
+
+    def __init__(self, ttl: float = HEALTH_CHECK_CACHE_TTL, timeout: float = HEALTH_CHECK_TIMEOUT):
+        self.ttl = ttl
+        self.timeout = timeout
+        self.servers: Dict[str, Dict[str, Any]] = {}
+        self.checked_at: Optional[float] = None
+        self._checked: Optional[float] = None
+        self._round: Optional[asyncio.Future] = None
+
+    async def results(self) -> Tuple[Dict[str, Dict[str, Any]], bool]:
+        """(result per "dbtype:server", whether they come from the cache)."""
+        if self._checked is not None and time.monotonic() - self._checked < self.ttl:
+            return self.servers, True
+        if self._round is None or self._round.done():
+            self._round = asyncio.ensure_future(self._probe_all())
+        # Shielded: a caller that disconnects must not cancel the round other callers wait for
+        await asyncio.shield(self._round)
+        return self.servers, False
+
+    async def _probe_all(self):
+        targets = configured_servers()
+        await asyncio.gather(*(self._probe(dbtype, server, config) for dbtype, server, config in targets))
+        # Servers removed from the configuration are not reported any more
+        keys = {f"{dbtype}:{server}" for dbtype, server, _ in targets}
+        self.servers = {k: v for k, v in self.servers.items() if k in keys}
+        self.checked_at = time.time()
+        self._checked = time.monotonic()
+
+    async def _probe(self, dbtype: str, server: str, config: Dict[str, Any]):
+        key = f"{dbtype}:{server}"
+        entry = self.servers.get(key) or {
+            "dbtype": dbtype, "server": server, "status": None, "latency_ms": None,
+            "last_success": None, "last_failure": None, "error": None, "error_detail": None,
+        }
+        loop = asyncio.get_running_loop()
+        started = time.perf_counter()
+        db = None
+        task = None
+        try:
+            cls = await asyncio.wait_for(loop.run_in_executor(None, drivers.client_class, dbtype), self.timeout)
+            db = cls(config, server)
+            task = asyncio.ensure_future(db.run(_ping, db))
+            # Shielded: on timeout the worker thread is still using the connection
+            remaining = self.timeout - (time.perf_counter() - started)
+            await asyncio.wait_for(asyncio.shield(task), max(remaining, 0))
+            entry.update(status="ok", last_success=time.time())
+        except asyncio.TimeoutError:
+            logger.warning(f"Health probe of {key} timed out after {self.timeout}s")
+            entry.update(status="timeout", last_failure=time.time(), error=f"No answer within {self.timeout}s",
+                         error_detail=None)
+        except Exception as e:
+            logger.warning(f"Health probe of {key} failed: {e}")
+            entry.update(status="error", last_failure=time.time(), error=type(e).__name__,
+                         error_detail=str(e).strip())
+        finally:
+            entry["latency_ms"] = round((time.perf_counter() - started) * 1000, 1)
+            if task is not None and not task.done():
+                db.interrupt()
+                cleanup = asyncio.ensure_future(_release_when_done(db, task))
+                _abandoned.add(cleanup)
+                cleanup.add_done_callback(_abandoned.discard)
+            elif db is not None:
+                await db.aclose(discard=entry["status"] != "ok")
+        self.servers[key] = entry
+
+
+health_check = HealthCheck()
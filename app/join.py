@@ -0,0 +1,295 @@
+import asyncio
+import logging
+import os
+import pickle
+import shutil
+import sys
+import tempfile
+from typing import Any, Callable, Dict, List, Literal, Optional, Sequence, Set, Tuple
+
+from .db_base import BaseDB, RowStream
+
+logger = logging.getLogger(__name__)
+
+JoinType = Literal["inner", "left", "right", "full"]
+
+
+def _approx_rows_size(rows: Sequence[Any]) -> int:
+    """Rough in-memory size of a chunk of rows, extrapolated from its first rows."""
+    if not rows:
+        return 0
+    sample = rows[:20]
+    per_row = sum(sys.getsizeof(r) + sum(sys.getsizeof(v) for v in r) for r in sample) / len(sample)
+    return int(per_row * len(rows))
+
+
+def _key_getter(indexes: Sequence[int]) -> Callable[[Any], Any]:
+    """Join key of a row; None when any key column is NULL (NULL never matches, as in SQL)."""
+    if len(indexes) == 1:
+        i = indexes[0]
+        return lambda row: row[i]
+
+    def key(row):
+        values = tuple(row[i] for i in indexes)
+        return None if None in values else values
+    return key
+
+
+async def _both(*calls):
+    """Await calls concurrently; a failure or cancellation is raised only once every call has finished.
+
+    Each call runs on an executor thread that may still be reading its
+    cursor or writing spill files; the caller's cleanup (close_stream,
+    removing the spill directory) must not start before it is done.
+    """
+    tasks = [asyncio.ensure_future(c) for c in calls]
+    try:
+        outcomes = await asyncio.shield(asyncio.gather(*tasks, return_exceptions=True))
+    except asyncio.CancelledError:
+        await asyncio.wait(tasks)
+        raise
+    for outcome in outcomes:
+        if isinstance(outcome, BaseException):
+            raise outcome
+
+
+class JoinSide:
+    """One input of the join: an open RowStream plus what has been read from it so far."""
+
+    def __init__(self, name: str, db: BaseDB, stream: RowStream, key_indexes: Sequence[int]):
+        self.name = name
+        self.db = db
+        self.stream = stream
+        self.key = _key_getter(key_indexes)
+        self.width = len(stream.columns)
+        self.buffered: List[Any] = []
+        self.buffered_bytes = 0
+        self.rows_read = 0
+
+    @property
+    def exhausted(self) -> bool:
+        return self.stream.exhausted
+
+    async def read_chunk(self):
+        rows = await self.db.run(self.stream.fetch)
+        self.rows_read += len(rows)
+        self.buffered.extend(rows)
+        self.buffered_bytes += _approx_rows_size(rows)
+
+
+class HashJoin:
+    """Equi-join of two result streams from (possibly) different servers.
+
+    Both sides are read chunk by chunk in lock step until one is exhausted:
+    that side is the smaller one and becomes the build side of an in-memory
+    hash table; the other side's buffered rows, then the rest of its stream,
+    are probed against it. If the buffered rows pass memory_limit first, both
+    sides are hash-partitioned into spill files and joined one partition pair
+    at a time (a Grace hash join), so memory holds about 1/partitions of the
+    smaller side.
+
+    Output rows are the left columns followed by the right columns; the side
+    whose rows must all appear (left/right/full joins) gets NULLs for the
+    other side's columns when nothing matches.
+    """
+
+    def __init__(self, left: JoinSide, right: JoinSide, how: JoinType, max_rows: int,
+                 memory_limit: int, partitions: int, spill_dir: Optional[str] = None):
+        self.left = left
+        self.right = right
+        self.how = how
+        self.max_rows = max_rows
+        self.memory_limit = memory_limit
+        self.partitions = partitions
+        self.spill_dir = spill_dir or None
+        self.rows: List[list] = []
+        self.truncated = False
+        self.build_side: Optional[str] = None
+        self.spilled = False
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "build_side": self.build_side,
+            "spilled": self.spilled,
+            "partitions": self.partitions if self.spilled else None,
+            "left_rows": self.left.rows_read,
+            "right_rows": self.right.rows_read,
+        }
+
+    def _preserves(self, side: JoinSide) -> bool:
+        return self.how == "full" or self.how == side.name
+
+    # -- in-memory building blocks (run on worker threads) ----------------
+
+    def _full(self) -> bool:
+        if len(self.rows) >= self.max_rows:
+            self.truncated = True
+            return True
+        return False
+
+    def _emit(self, build: JoinSide, build_row: Any, probe: JoinSide, probe_row: Any):
+        left_row, right_row = (build_row, probe_row) if build is self.left else (probe_row, build_row)
+        self.rows.append(
+            (list(left_row) if left_row is not None else [None] * self.left.width)
+            + (list(right_row) if right_row is not None else [None] * self.right.width)
+        )
+
+    @staticmethod
+    def _build(side: JoinSide, rows: List[Any]) -> Tuple[Dict[Any, List[Any]], List[Any]]:
+        """Hash table of rows by join key, plus the rows with a NULL key."""
+        table: Dict[Any, List[Any]] = {}
+        unkeyed: List[Any] = []
+        key = side.key
+        for row in rows:
+            k = key(row)
+            if k is None:
+                unkeyed.append(row)
+            else:
+                bucket = table.get(k)
+                if bucket is None:
+                    table[k] = [row]
+                else:
+                    bucket.append(row)
+        return table, unkeyed
+
+    def _probe(self, build: JoinSide, table: Dict[Any, List[Any]], probe: JoinSide, rows: List[Any],
+               matched: Optional[Set[Any]]) -> bool:
+        """Join probe rows against the table; returns False once max_rows is reached."""
+        key = probe.key
+        keep_unmatched = self._preserves(probe)
+        for row in rows:
+            k = key(row)
+            matches = table.get(k) if k is not None else None
+            if matches:
+                if matched is not None:
+                    matched.add(k)
+                for build_row in matches:
+                    if self._full():
+                        return False
+                    self._emit(build, build_row, probe, row)
+            elif keep_unmatched:
+                if self._full():
+                    return False
+                self._emit(build, None, probe, row)
+        return True
+
+    def _unmatched(self, build: JoinSide, table: Dict[Any, List[Any]], unkeyed: List[Any], matched: Set[Any]):
+        """Emit build rows no probe row matched (when the build side is preserved)."""
+        for k, rows in table.items():
+            if k in matched:
+                continue
+            for row in rows:
+                if self._full():
+                    return
+                self._emit(build, row, None, None)
+        for row in unkeyed:
+            if self._full():
+                return
+            self._emit(build, row, None, None)
+
+    # -- driver ------------------------------------------------------------
+
+    async def run(self) -> List[list]:
+        left, right = self.left, self.right
+        # Lock-step reads: the first side to run out is the smaller one
+        while not (left.exhausted or right.exhausted):
+            await _both(left.read_chunk(), right.read_chunk())
+            if left.buffered_bytes + right.buffered_bytes > self.memory_limit:
+                await self._grace_join()
+                return self.rows
+
+        if left.exhausted and right.exhausted:
+            build = left if len(left.buffered) <= len(right.buffered) else right
+        else:
+            build = left if left.exhausted else right
+        probe = right if build is left else left
+        self.build_side = build.name
+        await self._memory_join(build, probe)
+        return self.rows
+
+    async def _memory_join(self, build: JoinSide, probe: JoinSide):
+        table, unkeyed = await build.db.run(self._build, build, build.buffered)
+        build.buffered = []
+        matched: Optional[Set[Any]] = set() if self._preserves(build) else None
+        rows, probe.buffered = probe.buffered, []
+        while True:
+            more = await probe.db.run(self._probe, build, table, probe, rows, matched)
+            if not more or probe.exhausted:
+                break
+            rows = await probe.db.run(probe.stream.fetch)
+            probe.rows_read += len(rows)
+            if not rows:
+                break
+        if matched is not None and not self.truncated:
+            await build.db.run(self._unmatched, build, table, unkeyed, matched)
+
+    # -- spilling ----------------------------------------------------------
+
+    def _spill(self, side: JoinSide, directory: str):
+        """Write every row of a side (buffered, then the rest of its stream) to partition files."""
+        files = [open(os.path.join(directory, f"{side.name}-{p}"), "wb") for p in range(self.partitions)]
+        try:
+            rows, side.buffered = side.buffered, []
+            while rows:
+                buckets: List[List[Any]] = [[] for _ in files]
+                key = side.key
+                for row in rows:
+                    buckets[hash(key(row)) % self.partitions].append(tuple(row))
+                for f, bucket in zip(files, buckets):
+                    if bucket:
+                        pickle.dump(bucket, f, protocol=pickle.HIGHEST_PROTOCOL)
+                if side.exhausted:
+                    break
+                rows = side.stream.fetch()
+                side.rows_read += len(rows)
+        finally:
+            for f in files:
+                f.close()
+
+    @staticmethod
+    def _load(path: str) -> List[Any]:
+        rows: List[Any] = []
+        with open(path, "rb") as f:
+            while True:
+                try:
+                    rows.extend(pickle.load(f))
+                except EOFError:
+                    return rows
+
+    def _join_partition(self, directory: str, partition: int) -> bool:
+        """Join one partition pair in memory, building on its smaller file; False once max_rows is reached."""
+        paths = {side: os.path.join(directory, f"{side.name}-{partition}") for side in (self.left, self.right)}
+        sizes = {side: os.path.getsize(path) for side, path in paths.items()}
+        build = self.left if sizes[self.left] <= sizes[self.right] else self.right
+        probe = self.right if build is self.left else self.left
+        if sizes[build] > self.memory_limit:
+            logger.warning(f"join partition {partition} ({sizes[build]} bytes on disk) exceeds the memory limit")
+        table, unkeyed = self._build(build, self._load(paths[build]))
+        matched: Optional[Set[Any]] = set() if self._preserves(build) else None
+        if not self._probe(build, table, probe, self._load(paths[probe]), matched):
+            return False
+        if matched is not None:
+            self._unmatched(build, table, unkeyed, matched)
+        return not self.truncated
+
+    async def _grace_join(self):
+        self.spilled = True
+        self.build_side = "partitioned"
+        logger.info(f"join: buffered rows passed {self.memory_limit} bytes, spilling to {self.partitions} partitions")
+        directory = tempfile.mkdtemp(prefix="join-", dir=self.spill_dir)
+        try:
+            await _both(
+                self.left.db.run(self._spill, self.left, directory),
+                self.right.db.run(self._spill, self.right, directory),
+            )
+            for partition in range(self.partitions):
+                if not await self.left.db.run(self._join_partition, directory, partition):
+                    break
+        finally:
+            shutil.rmtree(directory, ignore_errors=True)
+
+
+def join_columns(left: List[str], right: List[str], right_label: str) -> List[str]:
+    """Output column names: right-side names that clash with a left one are prefixed with its label."""
+    taken = {c.lower() for c in left}
+    return list(left) + [f"{right_label}.{c}" if c.lower() in taken else c for c in right]
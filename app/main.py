@@ -1,17 +1,42 @@
-from fastapi import FastAPI, Depends, HTTPException, Query
+from fastapi import FastAPI, Depends, HTTPException, Query, Security
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from pydantic import BaseModel, Field
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Literal, Optional, Any
 from .config import (
     APP_MODE,
-    get_mysql_config, get_pg_config, get_oracle_config, get_mssql_config,
-    MYSQL_CONFIGS, PG_CONFIGS, ORACLE_CONFIGS, MSSQL_CONFIGS,
-    MYSQL_CONFIG, PG_CONFIG, ORACLE_CONFIG, MSSQL_CONFIG
+    SQL_STREAM_FETCH_SIZE, EXPORT_BATCH_SIZE,
+    SQL_DEFAULT_COUNT_MODE, SQL_COUNT_CACHE_TTL, SQL_COUNT_CACHE_SIZE,
+    RECORD_CACHE_TTL, RECORD_CACHE_TABLE_TTLS, RECORD_CACHE_MAX_ENTRIES, RECORD_CACHE_MAX_BYTES,
+    BULK_INSERT_BATCH_SIZE, BULK_INSERT_MAX_ROWS, GET_RECORDS_MAX_KEYS, BATCH_MAX_OPERATIONS,
+    FANOUT_MAX_TARGETS, FANOUT_TIMEOUT, FANOUT_MAX_ROWS,
+    JOIN_MAX_ROWS, JOIN_MEMORY_LIMIT, JOIN_SPILL_PARTITIONS, JOIN_SPILL_DIR,
+    METRICS_REQUIRE_API_KEY, SLOW_QUERY_THRESHOLD, SLOW_QUERY_LOG_SIZE, DB_PRELOAD_DRIVERS, WARMUP_ENABLED,
+    HEALTH_CHECK_CACHE_TTL, HEALTH_CHECK_TIMEOUT, HEALTH_REQUIRE_API_KEY,
+    get_db_config,
+    MYSQL_CONFIGS, PG_CONFIGS, ORACLE_CONFIGS, MSSQL_CONFIGS, SQLITE_CONFIGS,
+    MYSQL_CONFIG, PG_CONFIG, ORACLE_CONFIG, MSSQL_CONFIG, SQLITE_CONFIG
 )
-from .auth import verify_api_key
-from .db_mysql import MySQLDB
-from .db_postgres import PostgresDB
+from .auth import api_key_header, api_key_valid, verify_api_key
+from . import drivers, health as deep_health, metrics, slowlog, tracing, warmup
+from .db_base import BulkInsertError
+from .pool import close_all_pools
+from .streaming import STREAM_MEDIA_TYPES, stream_rows
+from .join import HashJoin, JoinSide, join_columns
+from .export import ARROW_FORMATS, EXPORT_EXTENSIONS, EXPORT_MEDIA_TYPES, export_writer, pyarrow, stream_export
+from .dialects import (
+    KEYSET_PARAM_PREFIX, WINDOW_TOTAL_COLUMN, InvalidToken, UnsupportedQuery, decode_keyset_token, encode_keyset_token,
+    compile_lookup, compile_statement, get_dialect, is_identifier, row_value, strip_order_by,
+)
+from .cache import RecordCache, TTLCache
+from .formats import ResultFormat, column_index, merge_results, shape_rows, sort_rows
+from .serialization import FastJSONResponse, convert_rows
+import asyncio
+import json
 import logging
+import os
+import time
 
 logger = logging.getLogger(__name__)
 
@@ -21,6 +46,8 @@ app = FastAPI(
     redoc_url="/redoc" if APP_MODE == "DEV" else None,
     openapi_url="/openapi.json" if APP_MODE == "DEV" else None,
 )
+# Every endpoint call is a span of the request trace (see tracing.py)
+app.router.route_class = tracing.TracedRoute
 
 # Allow CORS for dev convenience (customize domains as needed)
 app.add_middleware(
@@ -31,10 +58,179 @@ app.add_middleware(
     allow_headers=["*"]
 )
 
+# Prometheus request latency / size / exception metrics (no-op without prometheus_client)
+app.add_middleware(metrics.MetricsMiddleware)
+
+# Per-request spans: Server-Timing header and optional OTLP/JSON trace file
+app.add_middleware(tracing.TracingMiddleware)
+
+# Read-through cache for /getRecord, invalidated per table by the write endpoints
+record_cache = RecordCache(RECORD_CACHE_MAX_ENTRIES, RECORD_CACHE_MAX_BYTES, RECORD_CACHE_TTL, RECORD_CACHE_TABLE_TTLS)
+
+_background_tasks: set = set()
+
+@app.on_event("startup")
+async def start_metrics_monitor():
+    if metrics.prometheus_client is not None:
+        task = asyncio.ensure_future(metrics.monitor_event_loop())
+        _background_tasks.add(task)
+
+@app.on_event("startup")
+def load_drivers():
+    """Preload DB_PRELOAD_DRIVERS and log which drivers are loaded and how long each took."""
+    drivers.preload(drivers.DRIVERS if "all" in DB_PRELOAD_DRIVERS else DB_PRELOAD_DRIVERS)
+    report = "; ".join(f"{dbtype} {drivers.describe(load)}" for dbtype, load in drivers.load_report().items())
+    logger.info(f"Database drivers: {report}")
+
+@app.on_event("startup")
+async def start_warmup():
+    # In the background so the worker answers /ready (503) and /health while it warms up
+    if WARMUP_ENABLED:
+        task = asyncio.ensure_future(warmup.warm_up())
+        _background_tasks.add(task)
+
+@app.on_event("shutdown")
+def shutdown_pools():
+    close_all_pools()
+
+@app.on_event("shutdown")
+async def stop_metrics_monitor():
+    for task in _background_tasks:
+        task.cancel()
+    metrics.mark_process_dead()
+
+SUPPORTED_DBTYPES = list(drivers.DRIVERS)
+
+def get_db(dbtype: str, server: Optional[str]):
+    """Return a client for (dbtype, server) that borrows from that server's connection pool."""
+    name, cfg = get_db_config(dbtype, server)
+    metrics.track_target(dbtype, name)
+    # The driver is imported on the first request for its dbtype (see drivers.py)
+    return drivers.client_class(dbtype)(cfg, name)
+
 @app.get("/health")
 async def health():
     return {"status": "ok", "mode": APP_MODE}
 
+async def _health_auth(api_key: Optional[str] = Security(api_key_header)) -> bool:
+    """Whether the caller sent a valid X-API-KEY (required when HEALTH_REQUIRE_API_KEY is set)."""
+    if HEALTH_REQUIRE_API_KEY:
+        return await verify_api_key(api_key)
+    return api_key_valid(api_key)
+
+@app.get("/health/deep")
+async def health_deep(authenticated: bool = Depends(_health_auth)):
+    """
+    Ping every configured (dbtype, server) concurrently, each within HEALTH_CHECK_TIMEOUT seconds.
+
+    Results are cached per worker for HEALTH_CHECK_CACHE_TTL seconds (cached / age_s say whether this
+    answer came from a previous round), so polling never adds load on the databases. Each server
+    reports status (ok, error, timeout), latency_ms, last_success and last_failure (Unix times) and
+    the error (exception class) of its last failure; callers with a valid X-API-KEY also get the
+    driver's message as error_detail. Status is "ok" when every probe succeeded, "degraded" when
+    some failed and "down" (HTTP 503) when all failed. Requires X-API-KEY only when
+    HEALTH_REQUIRE_API_KEY is set.
+    """
+    servers, cached = await deep_health.health_check.results()
+    failed = sum(1 for s in servers.values() if s["status"] != "ok")
+    if not failed:
+        status = "ok"
+    elif failed < len(servers):
+        status = "degraded"
+    else:
+        status = "down"
+    body = {
+        "status": status,
+        "worker_pid": os.getpid(),
+        "cached": cached,
+        "checked_at": deep_health.health_check.checked_at,
+        "age_s": round(time.time() - deep_health.health_check.checked_at, 1),
+        "cache_ttl_s": HEALTH_CHECK_CACHE_TTL,
+        "timeout_s": HEALTH_CHECK_TIMEOUT,
+        "servers": servers if authenticated else deep_health.redact_errors(servers),
+    }
+    return JSONResponse(status_code=503 if status == "down" else 200, content=body)
+
+@app.get("/ready")
+async def ready(api_key: Optional[str] = Security(api_key_header)):
+    """
+    Readiness of this worker (see worker_pid): 503 until the startup warm-up has finished.
+
+    Reports per (dbtype, server) the warm-up status (ok, error, timeout) and timings in ms: driver
+    load, opening the pooled connections, preparing the configured statement shapes and the total.
+    Servers that failed to warm up make the status "degraded" but do not hold readiness back.
+    A failure's error is the exception class; callers with a valid X-API-KEY also get error_detail.
+    """
+    if not WARMUP_ENABLED:
+        return {"status": "ready", "worker_pid": os.getpid(), "warmup": "disabled"}
+    report = warmup.warmup.report()
+    report["worker_pid"] = os.getpid()
+    if not api_key_valid(api_key):
+        report["servers"] = deep_health.redact_errors(report["servers"])
+    if not warmup.warmup.done:
+        return JSONResponse(status_code=503, content=report)
+    return report
+
+async def _metrics_auth(api_key: Optional[str] = Security(api_key_header)):
+    if METRICS_REQUIRE_API_KEY:
+        await verify_api_key(api_key)
+    return True
+
+@app.get("/metrics")
+def prometheus_metrics(_: bool = Depends(_metrics_auth)):
+    """
+    Prometheus metrics: request latency by route/dbtype/server, query execute and fetch times, rows,
+    response sizes, errors, pool connections and wait times, and event-loop lag.
+
+    With several workers (PROMETHEUS_MULTIPROC_DIR set) the samples of all workers are aggregated.
+    Requires X-API-KEY only when METRICS_REQUIRE_API_KEY is set.
+    """
+    if metrics.prometheus_client is None:
+        raise HTTPException(status_code=503, detail="Metrics unavailable: prometheus_client is not installed")
+    body, content_type = metrics.render_latest()
+    return Response(content=body, media_type=content_type)
+
+@app.get("/admin/slow-queries")
+async def slow_queries(
+    _: bool = Depends(verify_api_key),
+    dbtype: str | None = Query(None, description="Only statements run on this database type"),
+    server: str | None = Query(None, description="Only statements run on this server name"),
+    since: float | None = Query(None, description="Only statements recorded at or after this Unix timestamp"),
+    limit: int = Query(50, ge=1, le=1000, description="Most fingerprints returned (largest total time first)"),
+    recent: int = Query(0, ge=0, le=1000, description="Also return this many of the latest individual entries"),
+):
+    """
+    Statements that took at least SLOW_QUERY_THRESHOLD seconds, grouped by normalised SQL fingerprint.
+
+    Each fingerprint reports count, total/p50/p95/max duration in ms, the most rows seen, the
+    dbtype:server targets and the hashes of the API keys that ran it. The log is an in-memory ring
+    buffer of the last SLOW_QUERY_LOG_SIZE entries kept by each worker; this answers for the worker
+    that served the request (see worker_pid).
+    """
+    entries = slowlog.slow_queries.entries(dbtype, server, since)
+    response = {
+        "status": "success",
+        "worker_pid": os.getpid(),
+        "threshold_ms": SLOW_QUERY_THRESHOLD * 1000,
+        "capacity": SLOW_QUERY_LOG_SIZE,
+        "recorded_total": slowlog.slow_queries.recorded,
+        "entry_count": len(entries),
+        "fingerprints": slowlog.aggregate(entries)[:limit],
+    }
+    if recent:
+        response["recent"] = [slowlog.entry_dict(e) for e in reversed(entries[-recent:])]
+    return response
+
+@app.get("/admin/drivers")
+async def driver_status(_: bool = Depends(verify_api_key)):
+    """
+    Database drivers loaded by this worker (see worker_pid), with import and client-init times in ms.
+
+    Drivers load on the first request for their dbtype unless listed in DB_PRELOAD_DRIVERS;
+    "not loaded" means this worker has not needed that dbtype yet.
+    """
+    return {"status": "success", "worker_pid": os.getpid(), "drivers": drivers.load_report()}
+
 @app.get("/connections")
 async def list_connections(_: bool = Depends(verify_api_key)):
     """
@@ -54,7 +250,8 @@ async def list_connections(_: bool = Depends(verify_api_key)):
         "oracle": {},
         "mysql": {},
         "postgres": {},
-        "mssql": {}
+        "mssql": {},
+        "sqlite": {}
     }
 
     # Helper function to mask sensitive data
@@ -137,6 +334,24 @@ async def list_connections(_: bool = Depends(verify_api_key)):
             "is_default": True
         }
 
+    # SQLite databases
+    if SQLITE_CONFIGS:
+        for name, config in SQLITE_CONFIGS.items():
+            connections["sqlite"][name] = {
+                "name": name,
+                "type": "sqlite",
+                "config": mask_config(config),
+                "is_default": False
+            }
+    # Check if default SQLite path is set
+    if SQLITE_CONFIG.get("path"):
+        connections["sqlite"]["default"] = {
+            "name": "default",
+            "type": "sqlite",
+            "config": mask_config(SQLITE_CONFIG),
+            "is_default": True
+        }
+
     # Count total connections
     total_connections = sum(len(v) for v in connections.values())
 
@@ -147,7 +362,8 @@ async def list_connections(_: bool = Depends(verify_api_key)):
             "oracle": len(connections["oracle"]),
             "mysql": len(connections["mysql"]),
             "postgres": len(connections["postgres"]),
-            "mssql": len(connections["mssql"])
+            "mssql": len(connections["mssql"]),
+            "sqlite": len(connections["sqlite"])
         }
     }
 
@@ -157,62 +373,81 @@ async def list_connections(_: bool = Depends(verify_api_key)):
         "connections": connections
     }
 
+@app.get("/admin/cache")
+async def cache_stats(_: bool = Depends(verify_api_key)):
+    """Hit/miss/eviction counters for this worker's result, count and compiled-statement caches."""
+    statements = compile_statement.cache_info()
+    return {
+        "status": "success",
+        "record_cache": record_cache.stats(),
+        "count_cache": _count_cache.stats(),
+        "statement_cache": {
+            "entries": statements.currsize,
+            "max_entries": statements.maxsize,
+            "hits": statements.hits,
+            "misses": statements.misses
+        }
+    }
+
 @app.get("/mysql/sample")
 async def mysql_sample(_: bool = Depends(verify_api_key), server: str | None = Query(None)):
-    cfg = get_mysql_config(server)
-    db = MySQLDB(cfg)
+    db = get_db("mysql", server)
     try:
-        rows = db.query("SELECT 1 as one")
+        rows = await db.aquery("SELECT 1 as one")
         return {"server": server or "default", "data": rows}
     finally:
-        db.close()
+        await db.aclose()
 
 @app.get("/postgres/sample")
 async def postgres_sample(_: bool = Depends(verify_api_key), server: str | None = Query(None)):
-    cfg = get_pg_config(server)
-    db = PostgresDB(cfg)
+    db = get_db("postgres", server)
     try:
-        rows = db.query("SELECT 1 as one")
+        rows = await db.aquery("SELECT 1 as one")
         return {"server": server or "default", "data": rows}
     finally:
-        db.close()
+        await db.aclose()
 
 @app.get("/oracle/sample")
 async def oracle_sample(_: bool = Depends(verify_api_key), server: str | None = Query(None)):
     try:
-        from .db_oracle import OracleDB
-    except Exception as e:
+        db = get_db("oracle", server)
+    except ImportError as e:
         raise HTTPException(status_code=500, detail=f"Oracle driver not available: {e}")
-    cfg = get_oracle_config(server)
-    db = OracleDB(cfg)
     try:
-        rows = db.query("SELECT 1 AS one FROM dual")
+        rows = await db.aquery("SELECT 1 AS one FROM dual")
         return {"server": server or "default", "data": rows}
     finally:
-        db.close()
+        await db.aclose()
 
 @app.get("/mssql/sample")
 async def mssql_sample(_: bool = Depends(verify_api_key), server: str | None = Query(None)):
     try:
-        from .db_mssql import MSSQLDB
-    except Exception as e:
+        db = get_db("mssql", server)
+    except ImportError as e:
         raise HTTPException(status_code=500, detail=f"MS SQL ODBC driver not available: {e}")
-    cfg = get_mssql_config(server)
-    db = MSSQLDB(cfg)
     try:
-        rows = db.query("SELECT 1 as one")
+        rows = await db.aquery("SELECT 1 as one")
+        return {"server": server or "default", "data": rows}
+    finally:
+        await db.aclose()
+
+@app.get("/sqlite/sample")
+async def sqlite_sample(_: bool = Depends(verify_api_key), server: str | None = Query(None)):
+    db = get_db("sqlite", server)
+    try:
+        rows = await db.aquery("SELECT 1 as one")
         return {"server": server or "default", "data": rows}
     finally:
-        db.close()
+        await db.aclose()
 
 @app.get("/mixed/sample")
 async def mixed_sample(_: bool = Depends(verify_api_key), mysql_server: str | None = Query(None), pg_server: str | None = Query(None)):
     """Demonstrates combining data from multiple DBs, with server selection via query params."""
-    mysql = MySQLDB(get_mysql_config(mysql_server))
-    pg = PostgresDB(get_pg_config(pg_server))
+    mysql = get_db("mysql", mysql_server)
+    pg = get_db("postgres", pg_server)
     try:
-        m = mysql.query("SELECT 1 as mysql_one")
-        p = pg.query("SELECT 2 as pg_two")
+        m = await mysql.aquery("SELECT 1 as mysql_one")
+        p = await pg.aquery("SELECT 2 as pg_two")
         return {
             "mysql_server": mysql_server or "default",
             "postgres_server": pg_server or "default",
@@ -221,16 +456,17 @@ async def mixed_sample(_: bool = Depends(verify_api_key), mysql_server: str | No
             "sum": (m[0]["mysql_one"] + p[0]["pg_two"]) if m and p else None
         }
     finally:
-        mysql.close()
-        pg.close()
+        await mysql.aclose()
+        await pg.aclose()
 
 # Pydantic models for getRecord endpoint
 class GetRecordRequest(BaseModel):
-    dbtype: str = Field(..., description="Database type: oracle, mysql, postgres, or mssql")
+    dbtype: str = Field(..., description="Database type: oracle, mysql, postgres, mssql, or sqlite")
     server: Optional[str] = Field(None, description="Server name from config (optional if only one server configured)")
     table: str = Field(..., description="Table name to query")
     parameters: Dict[str, Any] = Field(..., description="WHERE conditions as key-value pairs, e.g., {'user_id': 123, 'status': 'active'}")
     fields: Optional[str] = Field(None, description="Comma-separated field names (default: *)")
+    use_cache: bool = Field(True, description="Serve from the result cache when enabled for this table (set false to force a database read)")
 
     class Config:
         json_schema_extra = {
@@ -252,78 +488,52 @@ async def get_record(request: GetRecordRequest, _: bool = Depends(verify_api_key
     Returns an error if multiple records are found or no records exist.
 
     Parameters:
-    - dbtype: Database type (oracle, mysql, postgres, mssql)
+    - dbtype: Database type (oracle, mysql, postgres, mssql, sqlite)
     - server: Server name from config (optional if only one configured)
     - table: Table name
     - parameters: WHERE conditions as key-value pairs (e.g., {"user_id": 123, "status": "active"})
     - fields: Comma-separated field names (default: *)
+    - use_cache: Allow a cached result (tables with a RECORD_CACHE_TTL / RECORD_CACHE_TABLE_TTLS entry)
     """
 
     # Validate dbtype
     dbtype = request.dbtype.lower()
-    if dbtype not in ["oracle", "mysql", "postgres", "mssql"]:
+    if dbtype not in SUPPORTED_DBTYPES:
         raise HTTPException(
             status_code=400,
-            detail=f"Invalid dbtype '{request.dbtype}'. Must be one of: oracle, mysql, postgres, mssql"
+            detail=f"Invalid dbtype '{request.dbtype}'. Must be one of: {', '.join(SUPPORTED_DBTYPES)}"
         )
 
     # Build field list
     fields = request.fields.strip() if request.fields else "*"
 
-    # Build WHERE clause and parameters based on database type
-    # Different databases use different parameter placeholders
-    where_parts = []
-    params = []
-
     if not request.parameters:
         raise HTTPException(status_code=400, detail="At least one parameter is required")
 
-    # Process parameters as dictionary
-    for i, (field_name, value) in enumerate(request.parameters.items(), 1):
-        # Use appropriate placeholder based on database type
-        if dbtype == "oracle":
-            where_parts.append(f"{field_name} = :{i}")
-            params.append(value)
-        elif dbtype in ["mysql", "postgres"]:
-            where_parts.append(f"{field_name} = %s")
-            params.append(value)
-        elif dbtype == "mssql":
-            where_parts.append(f"{field_name} = ?")
-            params.append(value)
-
-    where_clause = " AND ".join(where_parts)
+    # Build SQL query; each (table, fields, parameter columns) shape is compiled once
+    # with the database's placeholder style and reused from the statement cache
+    params = list(request.parameters.values())
+    sql = compile_statement(dbtype, "select", request.table, where=tuple(request.parameters), fields=fields)
 
-    # Build SQL query
-    sql = f"SELECT {fields} FROM {request.table} WHERE {where_clause}"
+    logger.info(f"getRecord: dbtype={dbtype}, server={request.server}, table={request.table}")
+    logger.debug(f"SQL: {sql}")
 
-    logger.info(f"getRecord: dbtype={dbtype}, server={request.server}, table={request.table}, sql={sql}")
+    # Serve repeated lookups from the result cache when this table has a TTL
+    server_name, _ = get_db_config(dbtype, request.server)
+    cache_key = RecordCache.make_key(dbtype, server_name, request.table, fields, request.parameters)
+    cached = record_cache.get(cache_key) if request.use_cache else None
+    generation = record_cache.generation(dbtype, server_name, request.table)
 
-    # Execute query based on database type
+    # Execute query on a pooled connection for (dbtype, server)
     db = None
     rows = []
     try:
-        if dbtype == "oracle":
-            from .db_oracle import OracleDB
-            cfg = get_oracle_config(request.server)
-            db = OracleDB(cfg)
-            # Oracle uses tuples for parameters
-            rows = db.query(sql, tuple(params))
-
-        elif dbtype == "mysql":
-            cfg = get_mysql_config(request.server)
-            db = MySQLDB(cfg)
-            rows = db.query(sql, tuple(params))
-
-        elif dbtype == "postgres":
-            cfg = get_pg_config(request.server)
-            db = PostgresDB(cfg)
-            rows = db.query(sql, tuple(params))
-
-        elif dbtype == "mssql":
-            from .db_mssql import MSSQLDB
-            cfg = get_mssql_config(request.server)
-            db = MSSQLDB(cfg)
-            rows = db.query(sql, tuple(params))
+        if cached is not None:
+            rows = cached
+        else:
+            db = get_db(dbtype, request.server)
+            rows = await db.aquery(sql, tuple(params), prepare=True)
+            record_cache.put(cache_key, rows, generation)
 
         # Validate result: expect at least one record
         if len(rows) == 0:
@@ -346,7 +556,8 @@ async def get_record(request: GetRecordRequest, _: bool = Depends(verify_api_key
             "server": request.server or "default",
             "table": request.table,
             "record": rows[0],
-            "multiple_records": multiple_records
+            "multiple_records": multiple_records,
+            "cached": cached is not None
         }
 
     except HTTPException:
@@ -357,11 +568,153 @@ async def get_record(request: GetRecordRequest, _: bool = Depends(verify_api_key
         raise HTTPException(status_code=500, detail=f"Database query failed: {str(e)}")
     finally:
         if db:
-            db.close()
+            await db.aclose()
+
+# Pydantic models for getRecords endpoint
+class GetRecordsRequest(BaseModel):
+    dbtype: str = Field(..., description="Database type: oracle, mysql, postgres, mssql, or sqlite")
+    server: Optional[str] = Field(None, description="Server name from config (optional if only one server configured)")
+    table: str = Field(..., description="Table name to query")
+    keys: List[Dict[str, Any]] = Field(..., description="Parameter sets to look up, all with the same columns, e.g., [{'user_id': 1}, {'user_id': 2}]")
+    fields: Optional[str] = Field(None, description="Comma-separated field names (default: *)")
+    format: ResultFormat = Field("objects", description="Result layout: objects (record dicts), rows (columns once + record arrays) or columnar (columns once + column arrays)")
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "dbtype": "oracle",
+                "server": "yustart",
+                "table": "users",
+                "keys": [{"user_id": 12345}, {"user_id": 12346}],
+                "fields": "user_id,username,email"
+            }
+        }
+
+@app.post("/getRecords")
+async def get_records(request: GetRecordsRequest, _: bool = Depends(verify_api_key)):
+    """
+    Get many records from one table in a few round trips.
+
+    Parameters:
+    - dbtype: Database type (oracle, mysql, postgres, mssql, sqlite)
+    - server: Server name from config (optional if only one configured)
+    - table: Table name
+    - keys: WHERE conditions per record; every entry uses the same columns
+    - fields: Comma-separated field names (default: *)
+    - format: objects (default), rows or columnar (see /sqlExec)
+
+    Keys are looked up in chunks sized to each database's limits, one UNION ALL
+    query per chunk whose branches are the /getRecord lookups of its keys. Each
+    row carries its key's position, so matching follows the database's rules.
+    Results follow the order of keys; keys without a match have "found": false.
+    """
+
+    # Validate dbtype
+    dbtype = request.dbtype.lower()
+    if dbtype not in SUPPORTED_DBTYPES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid dbtype '{request.dbtype}'. Must be one of: {', '.join(SUPPORTED_DBTYPES)}"
+        )
+
+    if not request.keys:
+        raise HTTPException(status_code=400, detail="At least one key is required")
+
+    if len(request.keys) > GET_RECORDS_MAX_KEYS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Too many keys ({len(request.keys)}); at most {GET_RECORDS_MAX_KEYS} per request"
+        )
+
+    key_columns = tuple(request.keys[0])
+    if not key_columns:
+        raise HTTPException(status_code=400, detail="Keys must contain at least one column")
+    column_set = set(key_columns)
+    for i, key in enumerate(request.keys, 1):
+        if key.keys() != column_set:
+            raise HTTPException(status_code=400, detail=f"Key {i} has different columns than key 1")
+
+    fields = request.fields.strip() if request.fields else "*"
+
+    # Distinct keys only (as sent: the database decides what matches); duplicates share one result
+    distinct: Dict[str, int] = {}
+    lookups: List[tuple] = []
+    positions: List[int] = []
+    for key in request.keys:
+        values = tuple(key[col] for col in key_columns)
+        pos = distinct.setdefault(json.dumps(values, default=str), len(lookups))
+        if pos == len(lookups):
+            lookups.append(values)
+        positions.append(pos)
+
+    chunk_size = get_dialect(dbtype).lookup_chunk_size(len(key_columns))
+    logger.info(
+        f"getRecords: dbtype={dbtype}, server={request.server}, table={request.table}, "
+        f"keys={len(request.keys)}, distinct={len(lookups)}, chunk_size={chunk_size}"
+    )
+
+    db = None
+    columns: List[str] = []
+    matches: Dict[int, List[tuple]] = {}
+    try:
+        db = get_db(dbtype, request.server)
+        for start in range(0, len(lookups), chunk_size):
+            chunk = lookups[start:start + chunk_size]
+            sql = compile_lookup(dbtype, request.table, key_columns, len(chunk), fields)
+            params = tuple(v for values in chunk for v in values)
+            columns, rows = await db.aquery_rows(sql, params, prepare=len(chunk) == chunk_size, convert=True,
+                                                 fetch_rows=len(chunk))
+            # The last column is the position of the row's key within the chunk
+            for row in rows:
+                matches.setdefault(start + int(row[-1]), []).append(row)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"getRecords error: {e}")
+        raise HTTPException(status_code=500, detail=f"Database query failed: {str(e)}")
+    finally:
+        if db:
+            await db.aclose()
+
+    # Leave the key position column out of records
+    width = len(columns) - 1
+    columns = columns[:width]
+    results = []
+    records = []
+    for key, pos in zip(request.keys, positions):
+        rows = matches.get(pos, [])
+        record = tuple(rows[0][:width]) if rows else None
+        records.append(record)
+        results.append({"parameters": key, "found": bool(rows), "multiple_records": len(rows) > 1})
+    found = sum(1 for r in results if r["found"])
+
+    response = {
+        "status": "success",
+        "dbtype": dbtype,
+        "server": request.server or "default",
+        "table": request.table,
+        "requested": len(results),
+        "found": found,
+        "missing": len(results) - found
+    }
+    if request.format == "columnar":
+        # One entry per requested key in every column array (null where the key was not found)
+        response["columns"] = columns
+        response["data"] = [[r[i] if r is not None else None for r in records] for i in range(len(columns))]
+    else:
+        if request.format == "rows":
+            response["columns"] = columns
+        for result, record in zip(results, records):
+            if record is not None and request.format == "objects":
+                record = dict(zip(columns, record))
+            result["record"] = record
+    response["results"] = results
+    # Values are already JSON-ready from the column converters; skip jsonable_encoder
+    return FastJSONResponse(response)
 
 # Pydantic models for insertRecord endpoint
 class InsertRecordRequest(BaseModel):
-    dbtype: str = Field(..., description="Database type: oracle, mysql, postgres, or mssql")
+    dbtype: str = Field(..., description="Database type: oracle, mysql, postgres, mssql, or sqlite")
     server: Optional[str] = Field(None, description="Server name from config (optional if only one server configured)")
     table: str = Field(..., description="Table name to insert into")
     data: Dict[str, Any] = Field(..., description="Column-value pairs to insert, e.g., {'username': 'john', 'email': 'john@example.com'}")
@@ -387,7 +740,7 @@ async def insert_record(request: InsertRecordRequest, _: bool = Depends(verify_a
     Insert a single record into any database.
 
     Parameters:
-    - dbtype: Database type (oracle, mysql, postgres, mssql)
+    - dbtype: Database type (oracle, mysql, postgres, mssql, sqlite)
     - server: Server name from config (optional if only one configured)
     - table: Table name
     - data: Column-value pairs to insert
@@ -397,131 +750,167 @@ async def insert_record(request: InsertRecordRequest, _: bool = Depends(verify_a
 
     # Validate dbtype
     dbtype = request.dbtype.lower()
-    if dbtype not in ["oracle", "mysql", "postgres", "mssql"]:
+    if dbtype not in SUPPORTED_DBTYPES:
         raise HTTPException(
             status_code=400,
-            detail=f"Invalid dbtype '{request.dbtype}'. Must be one of: oracle, mysql, postgres, mssql"
+            detail=f"Invalid dbtype '{request.dbtype}'. Must be one of: {', '.join(SUPPORTED_DBTYPES)}"
         )
 
     if not request.data:
         raise HTTPException(status_code=400, detail="Data dictionary cannot be empty")
 
-    # Build INSERT statement
-    columns = list(request.data.keys())
+    # Build INSERT statement (compiled once per table and column set)
     values = list(request.data.values())
-
-    # Create placeholders based on database type
-    if dbtype == "oracle":
-        placeholders = [f":{i}" for i in range(1, len(columns) + 1)]
-    elif dbtype in ["mysql", "postgres"]:
-        placeholders = ["%s"] * len(columns)
-    elif dbtype == "mssql":
-        placeholders = ["?"] * len(columns)
-
-    # Build SQL
-    columns_str = ", ".join(columns)
-    placeholders_str = ", ".join(placeholders)
-    sql = f"INSERT INTO {request.table} ({columns_str}) VALUES ({placeholders_str})"
+    sql = compile_statement(dbtype, "insert", request.table, columns=tuple(request.data))
 
     logger.info(f"insertRecord: dbtype={dbtype}, server={request.server}, table={request.table}")
     logger.debug(f"SQL: {sql}")
     logger.debug(f"Values: {values}")
 
-    # Execute insert based on database type
+    # Execute insert on a pooled connection for (dbtype, server)
     db = None
     try:
-        if dbtype == "oracle":
-            from .db_oracle import OracleDB
-            cfg = get_oracle_config(request.server)
-            db = OracleDB(cfg)
-            cursor = db.conn.cursor()
-            cursor.execute(sql, tuple(values))
-            db.conn.commit()
-            rows_affected = cursor.rowcount
-            cursor.close()
-
-            return {
-                "status": "success",
-                "dbtype": dbtype,
-                "server": request.server or "default",
-                "table": request.table,
-                "rows_affected": rows_affected,
-                "message": f"Successfully inserted {rows_affected} record(s)"
-            }
+        db = get_db(dbtype, request.server)
+        rows_affected, last_id = await db.aexecute(sql, tuple(values), prepare=True)
+        record_cache.invalidate_table(dbtype, db.server, request.table)
 
-        elif dbtype == "mysql":
-            cfg = get_mysql_config(request.server)
-            db = MySQLDB(cfg)
-            cursor = db.conn.cursor()
-            cursor.execute(sql, tuple(values))
-            db.conn.commit()
-            rows_affected = cursor.rowcount
-            last_id = cursor.lastrowid
-            cursor.close()
-
-            result = {
-                "status": "success",
-                "dbtype": dbtype,
-                "server": request.server or "default",
-                "table": request.table,
-                "rows_affected": rows_affected,
-                "message": f"Successfully inserted {rows_affected} record(s)"
-            }
-            if last_id:
-                result["inserted_id"] = last_id
-            return result
-
-        elif dbtype == "postgres":
-            cfg = get_pg_config(request.server)
-            db = PostgresDB(cfg)
-            cursor = db.conn.cursor()
-            cursor.execute(sql, tuple(values))
-            db.conn.commit()
-            rows_affected = cursor.rowcount
-            cursor.close()
-
-            return {
-                "status": "success",
-                "dbtype": dbtype,
-                "server": request.server or "default",
-                "table": request.table,
-                "rows_affected": rows_affected,
-                "message": f"Successfully inserted {rows_affected} record(s)"
-            }
+        result = {
+            "status": "success",
+            "dbtype": dbtype,
+            "server": request.server or "default",
+            "table": request.table,
+            "rows_affected": rows_affected,
+            "message": f"Successfully inserted {rows_affected} record(s)"
+        }
+        if last_id:
+            result["inserted_id"] = last_id
+        return result
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"insertRecord error: {e}")
+        if db:
+            await db.arollback()
+        raise HTTPException(status_code=500, detail=f"Insert failed: {str(e)}")
+    finally:
+        if db:
+            await db.aclose()
+
+# Pydantic models for insertRecords endpoint
+class InsertRecordsRequest(BaseModel):
+    dbtype: str = Field(..., description="Database type: oracle, mysql, postgres, mssql, or sqlite")
+    server: Optional[str] = Field(None, description="Server name from config (optional if only one server configured)")
+    table: str = Field(..., description="Table name to insert into")
+    rows: List[Dict[str, Any]] = Field(..., description="Rows to insert; every row must have the same columns")
+    batch_size: Optional[int] = Field(None, ge=1, le=50000, description=f"Rows per batch, each committed in its own transaction (default: {BULK_INSERT_BATCH_SIZE})")
 
-        elif dbtype == "mssql":
-            from .db_mssql import MSSQLDB
-            cfg = get_mssql_config(request.server)
-            db = MSSQLDB(cfg)
-            cursor = db.conn.cursor()
-            cursor.execute(sql, tuple(values))
-            db.conn.commit()
-            rows_affected = cursor.rowcount
-            cursor.close()
-
-            return {
-                "status": "success",
-                "dbtype": dbtype,
-                "server": request.server or "default",
-                "table": request.table,
-                "rows_affected": rows_affected,
-                "message": f"Successfully inserted {rows_affected} record(s)"
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "dbtype": "postgres",
+                "server": "default",
+                "table": "users",
+                "rows": [
+                    {"username": "johndoe", "email": "john@example.com"},
+                    {"username": "janedoe", "email": "jane@example.com"}
+                ],
+                "batch_size": 1000
             }
+        }
+
+@app.post("/insertRecords")
+async def insert_records(request: InsertRecordsRequest, _: bool = Depends(verify_api_key)):
+    """
+    Bulk insert many rows into one table.
+
+    Parameters:
+    - dbtype: Database type (oracle, mysql, postgres, mssql, sqlite)
+    - server: Server name from config (optional if only one configured)
+    - table: Table name
+    - rows: Column-value pairs per row (same columns in every row)
+    - batch_size: Rows per batch (default: BULK_INSERT_BATCH_SIZE)
+
+    Rows are loaded with each database's bulk path (Oracle array DML, MS SQL
+    fast_executemany, MySQL multi-row VALUES, PostgreSQL COPY FROM STDIN).
+    Each batch is its own transaction: if a batch fails it is rolled back,
+    loading stops, and the batches before it remain committed.
+    """
+
+    # Validate dbtype
+    dbtype = request.dbtype.lower()
+    if dbtype not in SUPPORTED_DBTYPES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid dbtype '{request.dbtype}'. Must be one of: {', '.join(SUPPORTED_DBTYPES)}"
+        )
+
+    if not request.rows:
+        raise HTTPException(status_code=400, detail="Rows list cannot be empty")
+
+    if len(request.rows) > BULK_INSERT_MAX_ROWS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Too many rows ({len(request.rows)}); at most {BULK_INSERT_MAX_ROWS} per request"
+        )
+
+    # Every row must have the same column set so a batch is a single statement shape
+    columns = tuple(request.rows[0])
+    if not columns:
+        raise HTTPException(status_code=400, detail="Rows must contain at least one column")
+    column_set = set(columns)
+    values = []
+    for i, row in enumerate(request.rows, 1):
+        if row.keys() != column_set:
+            raise HTTPException(status_code=400, detail=f"Row {i} has different columns than row 1")
+        values.append(tuple(row[col] for col in columns))
+
+    batch_size = request.batch_size or BULK_INSERT_BATCH_SIZE
+
+    logger.info(
+        f"insertRecords: dbtype={dbtype}, server={request.server}, table={request.table}, "
+        f"rows={len(values)}, batch_size={batch_size}"
+    )
+
+    # Load on a pooled connection for (dbtype, server)
+    db = None
+    try:
+        db = get_db(dbtype, request.server)
+        counts = await db.abulk_insert(request.table, columns, values, batch_size)
+
+        return {
+            "status": "success",
+            "dbtype": dbtype,
+            "server": request.server or "default",
+            "table": request.table,
+            "rows_affected": sum(counts),
+            "batch_size": batch_size,
+            "batches": [{"batch": i, "rows_affected": n} for i, n in enumerate(counts, 1)],
+            "message": f"Successfully inserted {sum(counts)} record(s) in {len(counts)} batch(es)"
+        }
 
     except HTTPException:
         raise
+    except BulkInsertError as e:
+        logger.error(f"insertRecords error in batch {e.batch}: {e}")
+        raise HTTPException(
+            status_code=500,
+            detail=(
+                f"Insert failed in batch {e.batch}: {str(e)}. "
+                f"{sum(e.committed)} record(s) in {len(e.committed)} earlier batch(es) were committed"
+            )
+        )
     except Exception as e:
-        logger.error(f"insertRecord error: {e}")
-        if db and hasattr(db, 'conn') and db.conn:
-            db.conn.rollback()
+        logger.error(f"insertRecords error: {e}")
         raise HTTPException(status_code=500, detail=f"Insert failed: {str(e)}")
     finally:
         if db:
-            db.close()
+            record_cache.invalidate_table(dbtype, db.server, request.table)
+            await db.aclose()
 
 # Pydantic models for updateRecord endpoint
 class UpdateRecordRequest(BaseModel):
-    dbtype: str = Field(..., description="Database type: oracle, mysql, postgres, or mssql")
+    dbtype: str = Field(..., description="Database type: oracle, mysql, postgres, mssql, or sqlite")
     server: Optional[str] = Field(None, description="Server name from config (optional if only one server configured)")
     table: str = Field(..., description="Table name to update")
     data: Dict[str, Any] = Field(..., description="Column-value pairs to update, e.g., {'email': 'newemail@example.com', 'status': 'active'}")
@@ -549,7 +938,7 @@ async def update_record(request: UpdateRecordRequest, _: bool = Depends(verify_a
     Update record(s) in any database.
 
     Parameters:
-    - dbtype: Database type (oracle, mysql, postgres, mssql)
+    - dbtype: Database type (oracle, mysql, postgres, mssql, sqlite)
     - server: Server name from config (optional if only one configured)
     - table: Table name
     - data: Column-value pairs to update
@@ -561,10 +950,10 @@ async def update_record(request: UpdateRecordRequest, _: bool = Depends(verify_a
 
     # Validate dbtype
     dbtype = request.dbtype.lower()
-    if dbtype not in ["oracle", "mysql", "postgres", "mssql"]:
+    if dbtype not in SUPPORTED_DBTYPES:
         raise HTTPException(
             status_code=400,
-            detail=f"Invalid dbtype '{request.dbtype}'. Must be one of: oracle, mysql, postgres, mssql"
+            detail=f"Invalid dbtype '{request.dbtype}'. Must be one of: {', '.join(SUPPORTED_DBTYPES)}"
         )
 
     if not request.data:
@@ -573,75 +962,22 @@ async def update_record(request: UpdateRecordRequest, _: bool = Depends(verify_a
     if not request.where:
         raise HTTPException(status_code=400, detail="WHERE conditions cannot be empty (to prevent updating all records)")
 
-    # Build UPDATE statement
-    set_columns = list(request.data.keys())
-    set_values = list(request.data.values())
-    where_columns = list(request.where.keys())
-    where_values = list(request.where.values())
+    # All values combined for parameterized query: SET values first, then WHERE values
+    all_values = list(request.data.values()) + list(request.where.values())
 
-    # All values combined for parameterized query
-    all_values = set_values + where_values
-
-    # Build SET clause with appropriate placeholders
-    if dbtype == "oracle":
-        set_parts = [f"{col} = :{i}" for i, col in enumerate(set_columns, 1)]
-        where_parts = [f"{col} = :{i}" for i, col in enumerate(where_columns, len(set_columns) + 1)]
-    elif dbtype in ["mysql", "postgres"]:
-        set_parts = [f"{col} = %s" for col in set_columns]
-        where_parts = [f"{col} = %s" for col in where_columns]
-    elif dbtype == "mssql":
-        set_parts = [f"{col} = ?" for col in set_columns]
-        where_parts = [f"{col} = ?" for col in where_columns]
-
-    # Build SQL
-    set_clause = ", ".join(set_parts)
-    where_clause = " AND ".join(where_parts)
-    sql = f"UPDATE {request.table} SET {set_clause} WHERE {where_clause}"
+    # Build UPDATE statement (compiled once per table, SET columns and WHERE columns)
+    sql = compile_statement(dbtype, "update", request.table, columns=tuple(request.data), where=tuple(request.where))
 
     logger.info(f"updateRecord: dbtype={dbtype}, server={request.server}, table={request.table}")
     logger.debug(f"SQL: {sql}")
     logger.debug(f"Values: {all_values}")
 
-    # Execute update based on database type
+    # Execute update on a pooled connection for (dbtype, server)
     db = None
     try:
-        if dbtype == "oracle":
-            from .db_oracle import OracleDB
-            cfg = get_oracle_config(request.server)
-            db = OracleDB(cfg)
-            cursor = db.conn.cursor()
-            cursor.execute(sql, tuple(all_values))
-            db.conn.commit()
-            rows_affected = cursor.rowcount
-            cursor.close()
-
-        elif dbtype == "mysql":
-            cfg = get_mysql_config(request.server)
-            db = MySQLDB(cfg)
-            cursor = db.conn.cursor()
-            cursor.execute(sql, tuple(all_values))
-            db.conn.commit()
-            rows_affected = cursor.rowcount
-            cursor.close()
-
-        elif dbtype == "postgres":
-            cfg = get_pg_config(request.server)
-            db = PostgresDB(cfg)
-            cursor = db.conn.cursor()
-            cursor.execute(sql, tuple(all_values))
-            db.conn.commit()
-            rows_affected = cursor.rowcount
-            cursor.close()
-
-        elif dbtype == "mssql":
-            from .db_mssql import MSSQLDB
-            cfg = get_mssql_config(request.server)
-            db = MSSQLDB(cfg)
-            cursor = db.conn.cursor()
-            cursor.execute(sql, tuple(all_values))
-            db.conn.commit()
-            rows_affected = cursor.rowcount
-            cursor.close()
+        db = get_db(dbtype, request.server)
+        rows_affected, _ = await db.aexecute(sql, tuple(all_values), prepare=True)
+        record_cache.invalidate_table(dbtype, db.server, request.table)
 
         return {
             "status": "success",
@@ -656,16 +992,16 @@ async def update_record(request: UpdateRecordRequest, _: bool = Depends(verify_a
         raise
     except Exception as e:
         logger.error(f"updateRecord error: {e}")
-        if db and hasattr(db, 'conn') and db.conn:
-            db.conn.rollback()
+        if db:
+            await db.arollback()
         raise HTTPException(status_code=500, detail=f"Update failed: {str(e)}")
     finally:
         if db:
-            db.close()
+            await db.aclose()
 
 # Pydantic models for deleteRecord endpoint
 class DeleteRecordRequest(BaseModel):
-    dbtype: str = Field(..., description="Database type: oracle, mysql, postgres, or mssql")
+    dbtype: str = Field(..., description="Database type: oracle, mysql, postgres, mssql, or sqlite")
     server: Optional[str] = Field(None, description="Server name from config (optional if only one server configured)")
     table: str = Field(..., description="Table name to delete from")
     where: Dict[str, Any] = Field(..., description="WHERE conditions as key-value pairs, e.g., {'user_id': 12345}")
@@ -688,7 +1024,7 @@ async def delete_record(request: DeleteRecordRequest, _: bool = Depends(verify_a
     Delete record(s) from any database.
 
     Parameters:
-    - dbtype: Database type (oracle, mysql, postgres, mssql)
+    - dbtype: Database type (oracle, mysql, postgres, mssql, sqlite)
     - server: Server name from config (optional if only one configured)
     - table: Table name
     - where: WHERE conditions to identify which records to delete
@@ -699,75 +1035,29 @@ async def delete_record(request: DeleteRecordRequest, _: bool = Depends(verify_a
 
     # Validate dbtype
     dbtype = request.dbtype.lower()
-    if dbtype not in ["oracle", "mysql", "postgres", "mssql"]:
+    if dbtype not in SUPPORTED_DBTYPES:
         raise HTTPException(
             status_code=400,
-            detail=f"Invalid dbtype '{request.dbtype}'. Must be one of: oracle, mysql, postgres, mssql"
+            detail=f"Invalid dbtype '{request.dbtype}'. Must be one of: {', '.join(SUPPORTED_DBTYPES)}"
         )
 
     if not request.where:
         raise HTTPException(status_code=400, detail="WHERE conditions cannot be empty (to prevent deleting all records)")
 
-    # Build DELETE statement
-    where_columns = list(request.where.keys())
+    # Build DELETE statement (compiled once per table and WHERE column set)
     where_values = list(request.where.values())
-
-    # Build WHERE clause with appropriate placeholders
-    if dbtype == "oracle":
-        where_parts = [f"{col} = :{i}" for i, col in enumerate(where_columns, 1)]
-    elif dbtype in ["mysql", "postgres"]:
-        where_parts = [f"{col} = %s" for col in where_columns]
-    elif dbtype == "mssql":
-        where_parts = [f"{col} = ?" for col in where_columns]
-
-    # Build SQL
-    where_clause = " AND ".join(where_parts)
-    sql = f"DELETE FROM {request.table} WHERE {where_clause}"
+    sql = compile_statement(dbtype, "delete", request.table, where=tuple(request.where))
 
     logger.info(f"deleteRecord: dbtype={dbtype}, server={request.server}, table={request.table}")
     logger.debug(f"SQL: {sql}")
     logger.debug(f"Values: {where_values}")
 
-    # Execute delete based on database type
+    # Execute delete on a pooled connection for (dbtype, server)
     db = None
     try:
-        if dbtype == "oracle":
-            from .db_oracle import OracleDB
-            cfg = get_oracle_config(request.server)
-            db = OracleDB(cfg)
-            cursor = db.conn.cursor()
-            cursor.execute(sql, tuple(where_values))
-            db.conn.commit()
-            rows_affected = cursor.rowcount
-            cursor.close()
-
-        elif dbtype == "mysql":
-            cfg = get_mysql_config(request.server)
-            db = MySQLDB(cfg)
-            cursor = db.conn.cursor()
-            cursor.execute(sql, tuple(where_values))
-            db.conn.commit()
-            rows_affected = cursor.rowcount
-            cursor.close()
-
-        elif dbtype == "postgres":
-            cfg = get_pg_config(request.server)
-            db = PostgresDB(cfg)
-            cursor = db.conn.cursor()
-            cursor.execute(sql, tuple(where_values))
-            db.conn.commit()
-            rows_affected = cursor.rowcount
-            cursor.close()
-
-        elif dbtype == "mssql":
-            from .db_mssql import MSSQLDB
-            cfg = get_mssql_config(request.server)
-            db = MSSQLDB(cfg)
-            cursor = db.conn.cursor()
-            cursor.execute(sql, tuple(where_values))
-            db.conn.commit()
-            rows_affected = cursor.rowcount
-            cursor.close()
+        db = get_db(dbtype, request.server)
+        rows_affected, _ = await db.aexecute(sql, tuple(where_values), prepare=True)
+        record_cache.invalidate_table(dbtype, db.server, request.table)
 
         return {
             "status": "success",
@@ -782,21 +1072,30 @@ async def delete_record(request: DeleteRecordRequest, _: bool = Depends(verify_a
         raise
     except Exception as e:
         logger.error(f"deleteRecord error: {e}")
-        if db and hasattr(db, 'conn') and db.conn:
-            db.conn.rollback()
+        if db:
+            await db.arollback()
         raise HTTPException(status_code=500, detail=f"Delete failed: {str(e)}")
     finally:
         if db:
-            db.close()
+            await db.aclose()
 
 # Pydantic model for sqlExec endpoint
 class SqlExecRequest(BaseModel):
-    dbtype: str = Field(..., description="Database type: oracle, mysql, postgres, or mssql")
+    dbtype: str = Field(..., description="Database type: oracle, mysql, postgres, mssql, or sqlite")
     server: Optional[str] = Field(None, description="Server name from config (optional if only one server configured)")
     sql: str = Field(..., description="SQL query with named parameters (e.g., WHERE firstname = :firstname)")
     parameters: Optional[Dict[str, Any]] = Field(None, description="Parameter values as key-value pairs (e.g., {'firstname': 'patrick'})")
     page: Optional[int] = Field(1, ge=1, description="Page number (default: 1)")
     page_size: Optional[int] = Field(100, ge=1, le=300, description="Records per page (default: 100, max: 300)")
+    stream: Optional[Literal["ndjson", "json"]] = Field(None, description="Stream every row as NDJSON lines or one JSON array instead of paginating (page/page_size are ignored)")
+    fetch_size: Optional[int] = Field(None, ge=1, le=10000, description="Rows fetched per database round trip (default: SQL_STREAM_FETCH_SIZE when streaming, the page size otherwise)")
+    keyset: Optional[List[str]] = Field(None, description="Keyset pagination: ordering key column(s); replaces page/OFFSET with a continuation token")
+    keyset_order: Literal["asc", "desc"] = Field("asc", description="Sort direction of the keyset columns")
+    continuation_token: Optional[str] = Field(None, description="next_token from the previous keyset page")
+    count_mode: Optional[Literal["exact", "none", "window", "cached", "estimate"]] = Field(
+        None, description="How total_records is computed (default: SQL_DEFAULT_COUNT_MODE, normally exact)"
+    )
+    format: ResultFormat = Field("objects", description="Result layout: objects (records as dicts), rows (columns once + row arrays) or columnar (columns once + column arrays)")
 
     class Config:
         json_schema_extra = {
@@ -820,12 +1119,20 @@ async def sql_exec(request: SqlExecRequest, _: bool = Depends(verify_api_key)):
     Execute a custom SQL query with optional parameters and pagination.
 
     Parameters:
-    - dbtype: Database type (oracle, mysql, postgres, mssql)
+    - dbtype: Database type (oracle, mysql, postgres, mssql, sqlite)
     - server: Server name from config (optional if only one configured)
     - sql: SQL query with named parameters matching the database type
     - parameters: Parameter values as key-value pairs
     - page: Page number (default: 1)
     - page_size: Records per page (default: 100, max: 300)
+    - stream: "ndjson" or "json" to stream all rows through a server-side cursor (no page cap, no count)
+    - fetch_size: Rows per database round trip (streaming, or Oracle page fetches; defaults to the page size)
+    - keyset: Key column(s) for keyset pagination; pass back pagination.next_token as continuation_token
+    - keyset_order: "asc" (default) or "desc"
+    - count_mode: exact (COUNT(*) query), none (has_more only), window (COUNT(*) OVER() in the page query),
+      cached (exact count reused across pages for SQL_COUNT_CACHE_TTL seconds), estimate (planner estimate)
+    - format: objects (default, "records" list of dicts), rows ("columns" + "rows" arrays) or
+      columnar ("columns" + "data" column arrays); ignored when streaming
 
     Parameter Naming Convention:
     - Oracle: Use :parametername (e.g., WHERE id = :user_id)
@@ -833,17 +1140,18 @@ async def sql_exec(request: SqlExecRequest, _: bool = Depends(verify_api_key)):
     - MS SQL: Use :parametername (e.g., WHERE id = :user_id)
 
     Note: For convenience, you can use :parametername syntax for all databases,
-    and it will be automatically converted to the correct format for MySQL/PostgreSQL.
+    and it will be automatically converted to the correct format for MySQL/PostgreSQL
+    (%(name)s) and MS SQL (positional ?).
 
     Returns paginated results with metadata.
     """
 
     # Validate dbtype
     dbtype = request.dbtype.lower()
-    if dbtype not in ["oracle", "mysql", "postgres", "mssql"]:
+    if dbtype not in SUPPORTED_DBTYPES:
         raise HTTPException(
             status_code=400,
-            detail=f"Invalid dbtype '{request.dbtype}'. Must be one of: oracle, mysql, postgres, mssql"
+            detail=f"Invalid dbtype '{request.dbtype}'. Must be one of: {', '.join(SUPPORTED_DBTYPES)}"
         )
 
     # Validate page_size
@@ -859,110 +1167,93 @@ async def sql_exec(request: SqlExecRequest, _: bool = Depends(verify_api_key)):
     logger.debug(f"SQL: {sql}")
     logger.debug(f"Parameters: {params}")
 
-    # Convert parameter syntax if needed
-    # Auto-convert :param to %(param)s for MySQL/PostgreSQL for user convenience
-    if dbtype in ["mysql", "postgres"] and params:
-        import re
-        # Find all :param_name patterns and convert to %(param_name)s
-        for param_name in params.keys():
-            # Replace :param_name with %(param_name)s
-            sql = re.sub(r':' + re.escape(param_name) + r'\b', f'%({param_name})s', sql)
-
-    # Add pagination to SQL query
-    # Different databases have different pagination syntax
-    if dbtype == "oracle":
-        # Oracle uses OFFSET/FETCH (12c+) or ROWNUM
-        # We'll use OFFSET/FETCH for simplicity
-        paginated_sql = f"{sql} OFFSET {offset} ROWS FETCH NEXT {page_size} ROWS ONLY"
-        # Oracle uses named parameters as-is (:param)
-        param_values = params
-    elif dbtype in ["mysql", "postgres"]:
-        # MySQL and PostgreSQL use LIMIT/OFFSET
-        paginated_sql = f"{sql} LIMIT {page_size} OFFSET {offset}"
-        # MySQL/PostgreSQL use %(param)s syntax
-        param_values = params
-    elif dbtype == "mssql":
-        # MS SQL uses OFFSET/FETCH
-        paginated_sql = f"{sql} OFFSET {offset} ROWS FETCH NEXT {page_size} ROWS ONLY"
-        # Convert named parameters to positional for pyodbc
-        param_values = params
+    dialect = get_dialect(dbtype)
+
+    # Streaming mode: no pagination or COUNT; rows are sent as the cursor yields them
+    if request.stream:
+        fetch_size = request.fetch_size or SQL_STREAM_FETCH_SIZE
+        # Auto-convert :param to the driver's placeholder style
+        stream_sql, stream_params = dialect.bind_named(sql, params)
+        db = get_db(dbtype, request.server)
+        try:
+            stream = await db.aopen_stream(stream_sql, stream_params, fetch_size)
+        except Exception as e:
+            logger.error(f"sqlExec stream error: {e}")
+            await db.aclose()
+            raise HTTPException(status_code=500, detail=f"Database query failed: {str(e)}")
+        return StreamingResponse(stream_rows(db, stream, request.stream), media_type=STREAM_MEDIA_TYPES[request.stream])
+
+    if request.keyset:
+        return await _sql_exec_keyset(request, dbtype, dialect, sql, params, page_size)
+
+    count_mode = request.count_mode or SQL_DEFAULT_COUNT_MODE
+    # Without a separate total, one extra row tells us whether another page exists
+    fetch_extra = count_mode in ("none", "estimate")
+
+    # Add pagination to SQL query (OFFSET/FETCH on Oracle and MS SQL, LIMIT/OFFSET on MySQL/PostgreSQL)
+    if count_mode == "window":
+        try:
+            paginated_sql = dialect.window_count_query(sql, page_size, offset)
+        except UnsupportedQuery as e:
+            raise HTTPException(status_code=400, detail=f"count_mode=window cannot wrap this query: {e}")
+    else:
+        paginated_sql = dialect.paginate(sql, page_size + 1 if fetch_extra else page_size, offset)
+
+    # Auto-convert :param to %(param)s for MySQL/PostgreSQL and ? for MS SQL
+    paginated_sql, param_values = dialect.bind_named(paginated_sql, params)
 
     logger.debug(f"Paginated SQL: {paginated_sql}")
 
-    # Build COUNT query to get total records
-    # Extract the main query before ORDER BY for counting
-    import re
-    # Remove ORDER BY clause for count query
-    count_sql = re.sub(r'\s+ORDER\s+BY\s+.*$', '', sql, flags=re.IGNORECASE)
-    # Wrap in COUNT(*)
-    count_query = f"SELECT COUNT(*) as total FROM ({count_sql}) count_subquery"
-
-    logger.debug(f"Count SQL: {count_query}")
-
-    # Execute query based on database type
+    # Execute query on a pooled connection for (dbtype, server)
     db = None
     rows = []
-    total_records = 0
+    total_records = None
     try:
-        if dbtype == "oracle":
-            from .db_oracle import OracleDB
-            cfg = get_oracle_config(request.server)
-            db = OracleDB(cfg)
-            # Get total count first
-            count_result = db.query(count_query, param_values)
-            total_records = count_result[0]['TOTAL'] if count_result else 0
-            # Get paginated results
-            rows = db.query(paginated_sql, param_values)
-
-        elif dbtype == "mysql":
-            cfg = get_mysql_config(request.server)
-            db = MySQLDB(cfg)
-            # Get total count first
-            count_result = db.query(count_query, param_values)
-            total_records = count_result[0]['total'] if count_result else 0
-            # Get paginated results
-            rows = db.query(paginated_sql, param_values)
-
-        elif dbtype == "postgres":
-            cfg = get_pg_config(request.server)
-            db = PostgresDB(cfg)
-            # Get total count first
-            count_result = db.query(count_query, param_values)
-            total_records = count_result[0]['total'] if count_result else 0
-            # Get paginated results
-            rows = db.query(paginated_sql, param_values)
-
-        elif dbtype == "mssql":
-            from .db_mssql import MSSQLDB
-            cfg = get_mssql_config(request.server)
-            db = MSSQLDB(cfg)
-            # Get total count first
-            count_result = db.query(count_query, param_values)
-            total_records = count_result[0]['total'] if count_result else 0
-            # Get paginated results
-            rows = db.query(paginated_sql, param_values)
+        db = get_db(dbtype, request.server)
+        # Get total count first
+        if count_mode in ("exact", "cached", "estimate"):
+            total_records = await _count_total(db, dialect, sql, params, count_mode)
+        # Get paginated results as driver tuples; the response layout is built once at the end
+        with tracing.span("query"):
+            fetch_rows = request.fetch_size or (page_size + 1 if fetch_extra else page_size)
+            columns, rows = await db.aquery_rows(paginated_sql, param_values, convert=True, fetch_rows=fetch_rows)
+
+        if count_mode == "window":
+            columns, rows, total_records = _pop_window_total(columns, rows)
+            if total_records is None and offset == 0:
+                total_records = 0
 
         # Calculate pagination metadata
+        if fetch_extra:
+            has_more = len(rows) > page_size
+            rows = rows[:page_size]
+        elif count_mode == "exact":
+            has_more = len(rows) == page_size  # If we got a full page, there might be more
+        else:
+            has_more = total_records is not None and offset + len(rows) < total_records
         record_count = len(rows)
-        total_pages = (total_records + page_size - 1) // page_size if total_records > 0 else 0
-        has_more = record_count == page_size  # If we got a full page, there might be more
+        if total_records is None:
+            total_pages = None
+        else:
+            total_pages = (total_records + page_size - 1) // page_size if total_records > 0 else 0
 
-        # Return paginated results with metadata
-        return {
+        # Return paginated results with metadata (values are JSON-ready, so skip jsonable_encoder)
+        return FastJSONResponse({
             "status": "success",
             "dbtype": dbtype,
             "server": request.server or "default",
             "pagination": {
                 "page": page,
                 "page_size": page_size,
+                "count_mode": count_mode,
                 "record_count": record_count,
                 "total_records": total_records,
                 "total_pages": total_pages,
                 "has_more": has_more,
                 "next_page": page + 1 if has_more else None
             },
-            "records": rows
-        }
+            **shape_rows(columns, rows, request.format)
+        })
 
     except HTTPException:
         # Re-raise HTTP exceptions
@@ -974,5 +1265,636 @@ async def sql_exec(request: SqlExecRequest, _: bool = Depends(verify_api_key)):
         raise HTTPException(status_code=500, detail=f"Database query failed: {str(e)}")
     finally:
         if db:
-            db.close()
+            await db.aclose()
+
+# count_mode=cached: exact totals keyed by (dbtype, server, sql, parameters)
+_count_cache = TTLCache(SQL_COUNT_CACHE_SIZE, SQL_COUNT_CACHE_TTL)
+
+async def _count_total(db, dialect, sql: str, params: Dict[str, Any], count_mode: str) -> Optional[int]:
+    """Total rows for the exact, cached and estimate count modes (None if no estimate is available)."""
+    with tracing.span("count", {"count_mode": count_mode}):
+        return await _count_rows(db, dialect, sql, params, count_mode)
+
+async def _count_rows(db, dialect, sql: str, params: Dict[str, Any], count_mode: str) -> Optional[int]:
+    if count_mode == "estimate":
+        estimate_sql, estimate_params = dialect.bind_named(strip_order_by(sql), params)
+        return await db.run(dialect.estimate_count, db, estimate_sql, estimate_params)
+
+    cache_key = None
+    if count_mode == "cached":
+        cache_key = (db.dbtype, db.server, sql, json.dumps(params, sort_keys=True, default=str))
+        cached = _count_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+    count_query, count_params = dialect.bind_named(dialect.count_query(sql), params)
+    logger.debug(f"Count SQL: {count_query}")
+    count_result = await db.aquery(count_query, count_params)
+    # Oracle folds the unquoted alias to upper case
+    total = int(row_value(count_result[0], "total")) if count_result else 0
+    if cache_key is not None:
+        _count_cache.set(cache_key, total)
+    return total
+
+def _pop_window_total(columns: List[str], rows: List[tuple]):
+    """Remove the COUNT(*) OVER () column from window-mode results; returns (columns, rows, total or None)."""
+    i = column_index(columns, WINDOW_TOTAL_COLUMN)
+    total = int(rows[0][i]) if rows else None
+    return columns[:i] + columns[i + 1:], [r[:i] + r[i + 1:] for r in rows], total
+
+async def _sql_exec_keyset(request: SqlExecRequest, dbtype: str, dialect, sql: str, params: Dict[str, Any], page_size: int):
+    """Keyset (seek) pagination: every page is an index range scan after the last key seen."""
+    columns = [c.strip() for c in request.keyset if c.strip()]
+    if not columns or not all(is_identifier(c) for c in columns):
+        raise HTTPException(status_code=400, detail="keyset must list plain column names from the query's select list")
+    if any(name.startswith(KEYSET_PARAM_PREFIX) for name in params):
+        raise HTTPException(status_code=400, detail=f"Parameter names starting with '{KEYSET_PARAM_PREFIX}' are reserved for keyset pagination")
+    descending = request.keyset_order == "desc"
+
+    bind = dict(params)
+    if request.continuation_token:
+        try:
+            last_values = decode_keyset_token(request.continuation_token, sql, columns, descending)
+        except InvalidToken as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        bind.update({f"{KEYSET_PARAM_PREFIX}{i}": v for i, v in enumerate(last_values)})
+
+    # Fetch one extra row to learn whether another page exists
+    try:
+        keyset_sql = dialect.keyset_query(sql, columns, bool(request.continuation_token), descending, page_size + 1)
+    except UnsupportedQuery as e:
+        raise HTTPException(status_code=400, detail=f"Keyset pagination cannot wrap this query: {e}")
+    keyset_sql, param_values = dialect.bind_named(keyset_sql, bind)
+    logger.debug(f"Keyset SQL: {keyset_sql}")
+
+    # Keyset pages skip counting unless a separate-count mode is asked for explicitly
+    count_mode = request.count_mode if request.count_mode in ("exact", "cached", "estimate") else "none"
+
+    db = None
+    try:
+        db = get_db(dbtype, request.server)
+        total_records = None
+        if count_mode != "none":
+            total_records = await _count_total(db, dialect, sql, params, count_mode)
+        with tracing.span("query"):
+            result_columns, rows = await db.aquery_rows(keyset_sql, param_values,
+                                                        fetch_rows=request.fetch_size or page_size + 1)
+        has_more = len(rows) > page_size
+        rows = rows[:page_size]
+        next_token = None
+        if has_more:
+            # The token takes the driver's values: converted ones lose bytes and Decimal precision
+            try:
+                last = [rows[-1][column_index(result_columns, c)] for c in columns]
+            except KeyError as e:
+                raise HTTPException(status_code=400, detail=f"Keyset column {e} is not in the query's select list")
+            next_token = encode_keyset_token(sql, columns, descending, last)
+        rows = await db.run(convert_rows, rows, db.column_converters(db.description))
+
+        return FastJSONResponse({
+            "status": "success",
+            "dbtype": dbtype,
+            "server": request.server or "default",
+            "pagination": {
+                "mode": "keyset",
+                "page_size": page_size,
+                "count_mode": count_mode,
+                "record_count": len(rows),
+                "total_records": total_records,
+                "has_more": has_more,
+                "next_token": next_token
+            },
+            **shape_rows(result_columns, rows, request.format)
+        })
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"sqlExec keyset error: {e}")
+        raise HTTPException(status_code=500, detail=f"Database query failed: {str(e)}")
+    finally:
+        if db:
+            await db.aclose()
+
+# Pydantic model for export endpoint
+class ExportRequest(BaseModel):
+    dbtype: str = Field(..., description="Database type: oracle, mysql, postgres, mssql, or sqlite")
+    server: Optional[str] = Field(None, description="Server name from config (optional if only one server configured)")
+    sql: str = Field(..., description="SQL query with named parameters (e.g., WHERE firstname = :firstname)")
+    parameters: Optional[Dict[str, Any]] = Field(None, description="Parameter values as key-value pairs")
+    format: Literal["arrow", "parquet", "csv"] = Field("csv", description="arrow (Arrow IPC stream), parquet or csv")
+    batch_size: Optional[int] = Field(None, ge=1, le=100000, description="Rows per driver fetch and per record batch / row group (default: EXPORT_BATCH_SIZE)")
+    filename: Optional[str] = Field(None, pattern=r"^[\w.-]+$", description="Download file name without extension (default: export)")
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "dbtype": "oracle",
+                "server": "yustart",
+                "sql": "SELECT * FROM enrolments WHERE term = :term",
+                "parameters": {"term": "2024FW"},
+                "format": "parquet"
+            }
+        }
+
+@app.post("/export")
+async def export(request: ExportRequest, _: bool = Depends(verify_api_key)):
+    """
+    Run a query and stream the complete result as a file.
 
+    The cursor is read batch_size rows at a time and each fetch is written out
+    before the next one, so memory stays bounded whatever the result size.
+    Column types come from the cursor description: arrow and parquet keep
+    integers, decimals (with their declared precision and scale), timestamps
+    and binary data typed; csv writes decimals at full precision.
+
+    arrow and parquet need the optional pyarrow package.
+    """
+    dbtype = request.dbtype.lower()
+    if dbtype not in SUPPORTED_DBTYPES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid dbtype '{request.dbtype}'. Must be one of: {', '.join(SUPPORTED_DBTYPES)}"
+        )
+    if request.format in ARROW_FORMATS and pyarrow is None:
+        raise HTTPException(status_code=400, detail=f"Export format '{request.format}' requires the pyarrow package")
+
+    batch_size = request.batch_size or EXPORT_BATCH_SIZE
+    logger.info(f"export: dbtype={dbtype}, server={request.server}, format={request.format}, batch_size={batch_size}")
+    logger.debug(f"SQL: {request.sql}")
+
+    sql, params = get_dialect(dbtype).bind_named(request.sql.strip(), request.parameters or {})
+    db = get_db(dbtype, request.server)
+    try:
+        # Raw driver values: the writers keep Decimal/bytes/timestamps typed
+        stream = await db.aopen_stream(sql, params, batch_size, convert=False)
+        writer = export_writer(request.format, db, stream)
+    except Exception as e:
+        logger.error(f"export error: {e}")
+        await db.aclose()
+        raise HTTPException(status_code=500, detail=f"Database query failed: {str(e)}")
+
+    filename = f"{request.filename or 'export'}.{EXPORT_EXTENSIONS[request.format]}"
+    return StreamingResponse(
+        stream_export(db, stream, writer),
+        media_type=EXPORT_MEDIA_TYPES[request.format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+# Pydantic models for fanout endpoint
+class FanoutTarget(BaseModel):
+    dbtype: str = Field(..., description="Database type: oracle, mysql, postgres, mssql, or sqlite")
+    server: Optional[str] = Field(None, description="Server name from config (optional if only one server configured)")
+    sql: str = Field(..., description="SQL query with named parameters (e.g., WHERE term = :term)")
+    parameters: Optional[Dict[str, Any]] = Field(None, description="Parameter values as key-value pairs")
+    label: Optional[str] = Field(None, description="Name for this target in the response (default: dbtype:server)")
+
+class FanoutRequest(BaseModel):
+    targets: List[FanoutTarget] = Field(..., min_length=1, description="Queries to run concurrently")
+    timeout: Optional[float] = Field(None, gt=0, description="Seconds each target may take (default: FANOUT_TIMEOUT)")
+    max_rows: int = Field(1000, ge=1, le=FANOUT_MAX_ROWS, description="Most rows taken from each target (default: 1000)")
+    merge: bool = Field(False, description="Return one merged result instead of one result per target")
+    order_by: Optional[List[str]] = Field(None, description="merge: column(s) to sort the merged rows by")
+    order: Literal["asc", "desc"] = Field("asc", description="merge: sort direction for order_by")
+    limit: Optional[int] = Field(None, ge=1, description="merge: most rows in the merged result")
+    include_source: bool = Field(True, description="merge: add a _source column with each row's target label")
+    require_all: bool = Field(False, description="Fail the request if any target fails or times out")
+    format: ResultFormat = Field("objects", description="Result layout: objects, rows or columnar")
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "targets": [
+                    {"dbtype": "postgres", "server": "east", "sql": "SELECT region, SUM(amount) AS total FROM sales WHERE day = :day GROUP BY region", "parameters": {"day": "2024-01-01"}},
+                    {"dbtype": "postgres", "server": "west", "sql": "SELECT region, SUM(amount) AS total FROM sales WHERE day = :day GROUP BY region", "parameters": {"day": "2024-01-01"}}
+                ],
+                "timeout": 10,
+                "merge": True,
+                "order_by": ["total"],
+                "order": "desc"
+            }
+        }
+
+# Queries abandoned by a fanout timeout, kept referenced until their connection is released
+_abandoned_queries: set = set()
+
+async def _release_when_done(db, task: asyncio.Future):
+    """Wait out an abandoned query, then hand its connection back (discarded: its state is unknown)."""
+    try:
+        await task
+    except Exception:
+        pass
+    await db.aclose(discard=True)
+
+async def _fanout_target(target: FanoutTarget, label: str, max_rows: int, timeout: float) -> Dict[str, Any]:
+    """Run one fanout query; failures and timeouts are reported in the result instead of raised."""
+    dbtype = target.dbtype.lower()
+    result: Dict[str, Any] = {"label": label, "dbtype": dbtype, "server": target.server or "default"}
+    started = time.perf_counter()
+    db = None
+    task = None
+    try:
+        dialect = get_dialect(dbtype)
+        # One extra row tells us whether the target had more than max_rows
+        sql, params = dialect.bind_named(dialect.paginate(target.sql.strip(), max_rows + 1), target.parameters or {})
+        db = get_db(dbtype, target.server)
+        task = asyncio.ensure_future(db.aquery_rows(sql, params, convert=True, fetch_rows=max_rows + 1))
+        # Shielded: on timeout the worker thread is still using the connection
+        columns, rows = await asyncio.wait_for(asyncio.shield(task), timeout)
+        result.update(status="success", columns=columns, rows=rows[:max_rows], truncated=len(rows) > max_rows)
+    except asyncio.TimeoutError:
+        logger.warning(f"fanout target {label} timed out after {timeout}s")
+        result.update(status="timeout", error=f"No result within {timeout}s")
+    except Exception as e:
+        logger.error(f"fanout target {label} failed: {e}")
+        result.update(status="error", error=str(e))
+    finally:
+        result["elapsed_ms"] = round((time.perf_counter() - started) * 1000, 1)
+        if task is not None and not task.done():
+            db.interrupt()
+            cleanup = asyncio.ensure_future(_release_when_done(db, task))
+            _abandoned_queries.add(cleanup)
+            cleanup.add_done_callback(_abandoned_queries.discard)
+        elif db:
+            await db.aclose()
+    return result
+
+def _fanout_summary(result: Dict[str, Any]) -> Dict[str, Any]:
+    summary = {k: v for k, v in result.items() if k not in ("columns", "rows")}
+    if result["status"] == "success":
+        summary["record_count"] = len(result["rows"])
+    return summary
+
+@app.post("/fanout")
+async def fanout(request: FanoutRequest, _: bool = Depends(verify_api_key)):
+    """
+    Run queries against several databases concurrently.
+
+    Every target runs on its own pooled connection at the same time, so the request takes about as long
+    as the slowest target rather than the sum of all of them. A target that errors or exceeds timeout is
+    reported with status "error" or "timeout" (its query is cancelled where the driver allows it) while
+    the other targets still return, unless require_all is set.
+
+    - merge=false (default): "targets" lists each target's label, status, elapsed_ms and its rows
+      (in the requested format), with truncated=true when it had more than max_rows
+    - merge=true: rows of the successful targets are concatenated into one result, columns matched by
+      name; optionally sorted by order_by/order (NULLs last) and cut to limit. "targets" then holds only
+      the per-target status and timings.
+
+    MS SQL targets need an ORDER BY, as in /sqlExec, because max_rows is applied with OFFSET/FETCH.
+    """
+    if len(request.targets) > FANOUT_MAX_TARGETS:
+        raise HTTPException(status_code=400, detail=f"At most {FANOUT_MAX_TARGETS} targets per request")
+    for target in request.targets:
+        if target.dbtype.lower() not in SUPPORTED_DBTYPES:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Invalid dbtype '{target.dbtype}'. Must be one of: {', '.join(SUPPORTED_DBTYPES)}"
+            )
+    labels = [t.label or f"{t.dbtype.lower()}:{t.server or 'default'}" for t in request.targets]
+    if len(set(labels)) != len(labels):
+        raise HTTPException(status_code=400, detail="Target labels must be unique; set label on targets that share a server")
+    if (request.order_by or request.limit) and not request.merge:
+        raise HTTPException(status_code=400, detail="order_by and limit apply to merged results; set merge=true")
+
+    timeout = request.timeout or FANOUT_TIMEOUT
+    logger.info(f"fanout: {len(request.targets)} targets, timeout={timeout}s, merge={request.merge}")
+    started = time.perf_counter()
+    results = await asyncio.gather(*(
+        _fanout_target(target, label, request.max_rows, timeout)
+        for target, label in zip(request.targets, labels)
+    ))
+    elapsed_ms = round((time.perf_counter() - started) * 1000, 1)
+
+    failed = [r for r in results if r["status"] != "success"]
+    if failed and (request.require_all or len(failed) == len(results)):
+        status_code = 504 if all(r["status"] == "timeout" for r in failed) else 502
+        detail = "; ".join(f"{r['label']}: {r['error']}" for r in failed)
+        raise HTTPException(status_code=status_code, detail=f"Fan-out failed for {len(failed)} target(s): {detail}")
+
+    response: Dict[str, Any] = {
+        "status": "partial" if failed else "success",
+        "mode": "merge" if request.merge else "separate",
+        "elapsed_ms": elapsed_ms,
+    }
+    if not request.merge:
+        response["targets"] = [
+            {**_fanout_summary(r), **shape_rows(r["columns"], r["rows"], request.format)}
+            if r["status"] == "success" else _fanout_summary(r)
+            for r in results
+        ]
+        return FastJSONResponse(response)
+
+    succeeded = [r for r in results if r["status"] == "success"]
+    columns, rows = merge_results(
+        [(r["columns"], r["rows"]) for r in succeeded],
+        [r["label"] for r in succeeded] if request.include_source else (),
+    )
+    if request.order_by:
+        try:
+            keys = [(column_index(columns, name), request.order == "desc") for name in request.order_by]
+        except KeyError as e:
+            raise HTTPException(status_code=400, detail=f"order_by column {e} is not in the merged result")
+        try:
+            rows = sort_rows(rows, keys)
+        except TypeError as e:
+            raise HTTPException(status_code=400, detail=f"Cannot sort merged rows: {e}")
+    truncated = any(r["truncated"] for r in succeeded)
+    if request.limit and len(rows) > request.limit:
+        rows = rows[:request.limit]
+        truncated = True
+
+    response["targets"] = [_fanout_summary(r) for r in results]
+    response["record_count"] = len(rows)
+    response["truncated"] = truncated
+    response.update(shape_rows(columns, rows, request.format))
+    return FastJSONResponse(response)
+
+# Pydantic models for join endpoint
+class JoinInput(BaseModel):
+    dbtype: str = Field(..., description="Database type: oracle, mysql, postgres, mssql, or sqlite")
+    server: Optional[str] = Field(None, description="Server name from config (optional if only one server configured)")
+    sql: str = Field(..., description="SQL query with named parameters")
+    parameters: Optional[Dict[str, Any]] = Field(None, description="Parameter values as key-value pairs")
+    keys: List[str] = Field(..., min_length=1, description="Join column(s) in this query's result, paired by position with the other side's keys")
+
+class JoinRequest(BaseModel):
+    left: JoinInput = Field(..., description="Left side of the join")
+    right: JoinInput = Field(..., description="Right side of the join")
+    how: Literal["inner", "left", "right", "full"] = Field("inner", description="Join type")
+    max_rows: int = Field(1000, ge=1, le=JOIN_MAX_ROWS, description="Most joined rows returned (default: 1000)")
+    fetch_size: Optional[int] = Field(None, ge=1, le=10000, description="Rows fetched per database round trip (default: SQL_STREAM_FETCH_SIZE)")
+    format: ResultFormat = Field("objects", description="Result layout: objects, rows or columnar")
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "left": {
+                    "dbtype": "oracle", "server": "yustart",
+                    "sql": "SELECT student_id, first_name, last_name FROM students WHERE faculty = :faculty",
+                    "parameters": {"faculty": "LE"}, "keys": ["student_id"]
+                },
+                "right": {
+                    "dbtype": "mysql", "server": "Early Alerts",
+                    "sql": "SELECT student_id, status, submitted FROM applications",
+                    "keys": ["student_id"]
+                },
+                "how": "left"
+            }
+        }
+
+@app.post("/join")
+async def join(request: JoinRequest, _: bool = Depends(verify_api_key)):
+    """
+    Join the results of two queries, possibly on different database servers.
+
+    Both queries run concurrently through streaming cursors. The side that turns out smaller is loaded
+    into a hash table keyed by its join columns and the other side is streamed through it, so only the
+    smaller side is held in memory. If the rows read exceed JOIN_MEMORY_LIMIT first, both sides are
+    hash-partitioned to temporary files and joined partition by partition.
+
+    Keys match by value after JSON conversion (e.g. Oracle NUMBER 42 matches MySQL INT 42); NULL keys
+    never match. Output columns are the left columns then the right columns, with right-side names that
+    clash with a left one prefixed "right.". Returns at most max_rows rows (truncated=true if cut).
+    """
+    sides = {"left": request.left, "right": request.right}
+    for side in sides.values():
+        if side.dbtype.lower() not in SUPPORTED_DBTYPES:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Invalid dbtype '{side.dbtype}'. Must be one of: {', '.join(SUPPORTED_DBTYPES)}"
+            )
+    if len(request.left.keys) != len(request.right.keys):
+        raise HTTPException(status_code=400, detail="left.keys and right.keys must name the same number of columns")
+
+    fetch_size = request.fetch_size or SQL_STREAM_FETCH_SIZE
+    logger.info(f"join: {request.left.dbtype}:{request.left.server} {request.how} {request.right.dbtype}:{request.right.server}")
+    started = time.perf_counter()
+
+    dbs = {name: get_db(side.dbtype.lower(), side.server) for name, side in sides.items()}
+
+    async def open_side(name: str):
+        side = sides[name]
+        sql, params = get_dialect(side.dbtype.lower()).bind_named(side.sql.strip(), side.parameters or {})
+        return await dbs[name].aopen_stream(sql, params, fetch_size)
+
+    opened = await asyncio.gather(*(open_side(name) for name in sides), return_exceptions=True)
+    streams = {name: s for name, s in zip(sides, opened) if not isinstance(s, BaseException)}
+    try:
+        for name, result in zip(sides, opened):
+            if isinstance(result, BaseException):
+                logger.error(f"join {name} query failed: {result}")
+                raise HTTPException(status_code=500, detail=f"Database query failed ({name}): {result}")
+        inputs = {}
+        for name, side in sides.items():
+            stream = streams[name]
+            try:
+                indexes = [column_index(stream.columns, key) for key in side.keys]
+            except KeyError as e:
+                raise HTTPException(status_code=400, detail=f"{name} join key {e} is not in the {name} query's columns")
+            inputs[name] = JoinSide(name, dbs[name], stream, indexes)
+
+        hash_join = HashJoin(inputs["left"], inputs["right"], request.how, request.max_rows,
+                             JOIN_MEMORY_LIMIT, JOIN_SPILL_PARTITIONS, JOIN_SPILL_DIR)
+        try:
+            rows = await hash_join.run()
+        except Exception as e:
+            logger.error(f"join error: {e}")
+            raise HTTPException(status_code=500, detail=f"Join failed: {str(e)}")
+
+        columns = join_columns(streams["left"].columns, streams["right"].columns, "right")
+        return FastJSONResponse({
+            "status": "success",
+            "how": request.how,
+            "record_count": len(rows),
+            "truncated": hash_join.truncated,
+            "join": {**hash_join.stats(), "elapsed_ms": round((time.perf_counter() - started) * 1000, 1)},
+            **shape_rows(columns, rows, request.format)
+        })
+    finally:
+        for name, db in dbs.items():
+            if name in streams:
+                await db.run(db.close_stream, streams[name])
+            else:
+                await db.aclose()
+
+# Pydantic models for batch endpoint
+class BatchOperation(BaseModel):
+    op: Literal["getRecord", "insertRecord", "updateRecord", "deleteRecord", "sqlExec"] = Field(..., description="Operation to run")
+    table: Optional[str] = Field(None, description="Table name (getRecord, insertRecord, updateRecord, deleteRecord)")
+    parameters: Optional[Dict[str, Any]] = Field(None, description="getRecord: WHERE conditions; sqlExec: named parameter values")
+    fields: Optional[str] = Field(None, description="getRecord: comma-separated field names (default: *)")
+    data: Optional[Dict[str, Any]] = Field(None, description="insertRecord/updateRecord: column-value pairs")
+    where: Optional[Dict[str, Any]] = Field(None, description="updateRecord/deleteRecord: WHERE conditions")
+    sql: Optional[str] = Field(None, description="sqlExec: SQL with :name parameters")
+    max_rows: int = Field(100, ge=1, le=300, description="sqlExec: most rows returned (default: 100, max: 300)")
+
+class BatchRequest(BaseModel):
+    dbtype: str = Field(..., description="Database type: oracle, mysql, postgres, mssql, or sqlite")
+    server: Optional[str] = Field(None, description="Server name from config (optional if only one server configured)")
+    operations: List[BatchOperation] = Field(..., description="Operations to run in order in one transaction")
+    on_error: Literal["rollback", "stop"] = Field("rollback", description="rollback: undo every operation if one fails; stop: commit the operations before the failure and skip the rest")
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "dbtype": "mysql",
+                "server": "default",
+                "on_error": "rollback",
+                "operations": [
+                    {"op": "getRecord", "table": "accounts", "parameters": {"account_id": 1}},
+                    {"op": "updateRecord", "table": "accounts", "data": {"status": "closed"}, "where": {"account_id": 1}},
+                    {"op": "insertRecord", "table": "account_log", "data": {"account_id": 1, "action": "close"}},
+                    {"op": "deleteRecord", "table": "sessions", "where": {"account_id": 1}}
+                ]
+            }
+        }
+
+# Fields each batch operation needs (mirrors the validation of the single-operation endpoints)
+_BATCH_REQUIRED_FIELDS = {
+    "getRecord": ("table", "parameters"),
+    "insertRecord": ("table", "data"),
+    "updateRecord": ("table", "data", "where"),
+    "deleteRecord": ("table", "where"),
+    "sqlExec": ("sql",),
+}
+
+@app.post("/batch")
+async def batch(request: BatchRequest, _: bool = Depends(verify_api_key)):
+    """
+    Run several operations against one (dbtype, server) in a single transaction.
+
+    Parameters:
+    - dbtype: Database type (oracle, mysql, postgres, mssql, sqlite)
+    - server: Server name from config (optional if only one configured)
+    - operations: Ordered list of getRecord / insertRecord / updateRecord / deleteRecord / sqlExec
+      operations, with the same fields as the single-operation endpoints
+    - on_error: "rollback" (default) undoes everything if any operation fails;
+      "stop" commits the operations that succeeded before the failure and skips the rest
+
+    All operations share one connection and are committed once at the end.
+    Returns per-operation results; if an operation fails the response status
+    is that operation's error status and the body still lists every result.
+    """
+
+    # Validate dbtype
+    dbtype = request.dbtype.lower()
+    if dbtype not in SUPPORTED_DBTYPES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid dbtype '{request.dbtype}'. Must be one of: {', '.join(SUPPORTED_DBTYPES)}"
+        )
+
+    if not request.operations:
+        raise HTTPException(status_code=400, detail="At least one operation is required")
+
+    if len(request.operations) > BATCH_MAX_OPERATIONS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Too many operations ({len(request.operations)}); at most {BATCH_MAX_OPERATIONS} per request"
+        )
+
+    # Reject malformed operations before touching the database
+    for i, op in enumerate(request.operations, 1):
+        missing = [name for name in _BATCH_REQUIRED_FIELDS[op.op] if not getattr(op, name)]
+        if missing:
+            raise HTTPException(status_code=400, detail=f"Operation {i} ({op.op}) requires: {', '.join(missing)}")
+
+    logger.info(
+        f"batch: dbtype={dbtype}, server={request.server}, operations={len(request.operations)}, on_error={request.on_error}"
+    )
+
+    db = None
+    try:
+        db = get_db(dbtype, request.server)
+        results, failed, committed = await db.run(_run_batch, db, dbtype, request.operations, request.on_error)
+    except Exception as e:
+        logger.error(f"batch error: {e}")
+        raise HTTPException(status_code=500, detail=f"Batch failed: {str(e)}")
+    finally:
+        if db:
+            await db.aclose()
+
+    # Writes are visible once committed; drop cached getRecord results for the tables touched
+    if committed:
+        for op, result in zip(request.operations, results):
+            if op.op in ("insertRecord", "updateRecord", "deleteRecord") and result["status"] == "success":
+                record_cache.invalidate_table(dbtype, db.server, op.table)
+
+    body = {
+        "status": "success" if failed is None else "error",
+        "dbtype": dbtype,
+        "server": request.server or "default",
+        "on_error": request.on_error,
+        "committed": committed,
+        "results": results
+    }
+    if failed is None:
+        return body
+    return JSONResponse(status_code=results[failed]["status_code"], content=jsonable_encoder(body))
+
+def _run_batch(db, dbtype: str, operations: List[BatchOperation], on_error: str):
+    """Run batch operations on one connection (blocking; called on the db executor).
+
+    Returns (results, index of the failed operation or None, whether anything was committed).
+    """
+    dialect = get_dialect(dbtype)
+    use_savepoint = on_error == "stop" and dialect.savepoints
+    results: List[Dict[str, Any]] = []
+    failed = None
+    for i, op in enumerate(operations):
+        if failed is not None:
+            results.append({"index": i + 1, "op": op.op, "status": "skipped"})
+            continue
+        savepoint = f"batch_op_{i + 1}"
+        try:
+            if use_savepoint:
+                db.execute(dialect.savepoint(savepoint), commit=False)
+            result = _run_batch_operation(db, dbtype, dialect, op)
+            results.append({"index": i + 1, "op": op.op, "status": "success", **result})
+        except Exception as e:
+            failed = i
+            status_code = e.status_code if isinstance(e, HTTPException) else 500
+            error = e.detail if isinstance(e, HTTPException) else str(e)
+            logger.error(f"batch operation {i + 1} ({op.op}) failed: {error}")
+            results.append({"index": i + 1, "op": op.op, "status": "error", "status_code": status_code, "error": error})
+            if use_savepoint:
+                # Undo just the failed statement so the earlier operations can still commit
+                db.execute(dialect.rollback_to_savepoint(savepoint), commit=False)
+
+    if failed is None or (on_error == "stop" and failed > 0):
+        db.commit()
+        return results, failed, True
+    db.rollback()
+    return results, failed, False
+
+def _run_batch_operation(db, dbtype: str, dialect, op: BatchOperation) -> Dict[str, Any]:
+    if op.op == "getRecord":
+        fields = op.fields.strip() if op.fields else "*"
+        sql = compile_statement(dbtype, "select", op.table, where=tuple(op.parameters), fields=fields)
+        rows = db.query(sql, tuple(op.parameters.values()), prepare=True)
+        if not rows:
+            raise HTTPException(status_code=404, detail="No record found matching the specified parameters")
+        return {"table": op.table, "record": rows[0], "multiple_records": len(rows) > 1}
+    if op.op == "insertRecord":
+        sql = compile_statement(dbtype, "insert", op.table, columns=tuple(op.data))
+        rows_affected, last_id = db.execute(sql, tuple(op.data.values()), commit=False, prepare=True)
+        result = {"table": op.table, "rows_affected": rows_affected}
+        if last_id:
+            result["inserted_id"] = last_id
+        return result
+    if op.op == "updateRecord":
+        sql = compile_statement(dbtype, "update", op.table, columns=tuple(op.data), where=tuple(op.where))
+        values = tuple(op.data.values()) + tuple(op.where.values())
+        rows_affected, _ = db.execute(sql, values, commit=False, prepare=True)
+        return {"table": op.table, "rows_affected": rows_affected}
+    if op.op == "deleteRecord":
+        sql = compile_statement(dbtype, "delete", op.table, where=tuple(op.where))
+        rows_affected, _ = db.execute(sql, tuple(op.where.values()), commit=False, prepare=True)
+        return {"table": op.table, "rows_affected": rows_affected}
+    # sqlExec: the same :name parameter convention as /sqlExec, without pagination
+    sql, params = dialect.bind_named(op.sql.strip(), op.parameters or {})
+    rows, count = db.execute_sql(sql, params, op.max_rows)
+    if rows is None:
+        return {"rows_affected": count}
+    return {"record_count": len(rows), "truncated": count > len(rows), "records": rows}
@@ -0,0 +1,225 @@
+import asyncio
+import contextvars
+import logging
+import os
+import time
+from typing import Optional, Set, Tuple
+
+from .config import METRICS_SAMPLE_INTERVAL
+
+# With several uvicorn workers each process writes its samples to files in this
+# directory and /metrics aggregates them (prometheus_client multiprocess mode).
+# It must be emptied before the workers start (the Docker CMD does this).
+MULTIPROC_DIR = os.getenv("PROMETHEUS_MULTIPROC_DIR") or None
+if MULTIPROC_DIR:
+    os.makedirs(MULTIPROC_DIR, exist_ok=True)
+
+try:
+    import prometheus_client
+    from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram, multiprocess
+except ImportError:  # optional: without it the app runs uninstrumented and /metrics is unavailable
+    prometheus_client = None
+
+logger = logging.getLogger(__name__)
+
+# (dbtype, server) pairs the current request borrowed connections for (see track_target)
+_request_targets: contextvars.ContextVar[Optional[Set[Tuple[str, str]]]] = contextvars.ContextVar(
+    "metrics_request_targets", default=None
+)
+
+if prometheus_client is not None:
+    REQUEST_DURATION = Histogram(
+        "multidb_http_request_duration_seconds",
+        "HTTP request latency, including streamed bodies",
+        ["route", "method", "status", "dbtype", "server"],
+    )
+    RESPONSE_SIZE = Histogram(
+        "multidb_http_response_size_bytes",
+        "HTTP response body size",
+        ["route"],
+        buckets=(256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216, 67108864),
+    )
+    REQUEST_EXCEPTIONS = Counter(
+        "multidb_http_exceptions_total",
+        "Requests that ended in an unhandled exception, by exception class",
+        ["route", "exception"],
+    )
+    DB_EXECUTE_DURATION = Histogram(
+        "multidb_db_execute_duration_seconds",
+        "Time in cursor.execute()",
+        ["dbtype", "server"],
+    )
+    DB_FETCH_DURATION = Histogram(
+        "multidb_db_fetch_duration_seconds",
+        "Time fetching result rows (per fetchall or streamed chunk)",
+        ["dbtype", "server"],
+    )
+    DB_ROWS = Counter(
+        "multidb_db_rows_total",
+        "Rows fetched from the database",
+        ["dbtype", "server"],
+    )
+    DB_ERRORS = Counter(
+        "multidb_db_errors_total",
+        "Failed database calls, by exception class",
+        ["dbtype", "server", "error"],
+    )
+    POOL_CONNECTIONS = Gauge(
+        "multidb_pool_connections",
+        "Pooled connections by state (in_use, idle)",
+        ["dbtype", "server", "state"],
+        multiprocess_mode="livesum",
+    )
+    POOL_WAITING = Gauge(
+        "multidb_pool_waiting",
+        "Callers waiting for a pooled connection",
+        ["dbtype", "server"],
+        multiprocess_mode="livesum",
+    )
+    POOL_WAIT = Histogram(
+        "multidb_pool_acquire_wait_seconds",
+        "Time spent waiting to borrow a pooled connection",
+        ["dbtype", "server"],
+        buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0),
+    )
+    EVENT_LOOP_LAG = Gauge(
+        "multidb_event_loop_lag_seconds",
+        "How late the event loop woke up for the last lag probe",
+        multiprocess_mode="livemax",
+    )
+
+
+# -- recording helpers (no-ops without prometheus_client) --------------------
+
+def track_target(dbtype: str, server: str):
+    """Note that the current request uses (dbtype, server); labels its latency sample."""
+    targets = _request_targets.get()
+    if targets is not None:
+        targets.add((dbtype, server))
+
+
+def observe_query(dbtype: str, server: Optional[str], execute: Optional[float], fetch: Optional[float], rows: int):
+    if prometheus_client is None:
+        return
+    server = server or "default"
+    if execute is not None:
+        DB_EXECUTE_DURATION.labels(dbtype, server).observe(execute)
+    if fetch is not None:
+        DB_FETCH_DURATION.labels(dbtype, server).observe(fetch)
+        DB_ROWS.labels(dbtype, server).inc(rows)
+
+
+def observe_db_error(dbtype: str, server: Optional[str], error: BaseException):
+    if prometheus_client is not None:
+        DB_ERRORS.labels(dbtype, server or "default", type(error).__name__).inc()
+
+
+def observe_pool_wait(dbtype: str, server: str, seconds: float):
+    if prometheus_client is not None:
+        POOL_WAIT.labels(dbtype, server).observe(seconds)
+
+
+def update_pool_gauges():
+    """Copy this worker's pool stats into the pool gauges."""
+    if prometheus_client is None:
+        return
+    from .pool import all_pools
+
+    for (dbtype, server), pool in all_pools().items():
+        stats = pool.stats()
+        POOL_CONNECTIONS.labels(dbtype, server, "in_use").set(stats["in_use"])
+        POOL_CONNECTIONS.labels(dbtype, server, "idle").set(stats["idle"])
+        POOL_WAITING.labels(dbtype, server).set(stats["waiting"])
+
+
+async def monitor_event_loop():
+    """Measure event-loop lag and refresh pool gauges every METRICS_SAMPLE_INTERVAL seconds."""
+    loop = asyncio.get_running_loop()
+    while True:
+        started = loop.time()
+        await asyncio.sleep(METRICS_SAMPLE_INTERVAL)
+        EVENT_LOOP_LAG.set(max(0.0, loop.time() - started - METRICS_SAMPLE_INTERVAL))
+        try:
+            update_pool_gauges()
+        except Exception as e:
+            logger.warning(f"Updating pool gauges failed: {e}")
+
+
+def mark_process_dead():
+    """Drop this worker's live gauges from the multiprocess directory on shutdown."""
+    if prometheus_client is not None and MULTIPROC_DIR:
+        multiprocess.mark_process_dead(os.getpid())
+
+
+def render_latest() -> Tuple[bytes, str]:
+    """Exposition text for every worker (multiprocess mode) or this process."""
+    update_pool_gauges()
+    if MULTIPROC_DIR:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = prometheus_client.REGISTRY
+    return prometheus_client.generate_latest(registry), CONTENT_TYPE_LATEST
+
+
+# -- ASGI middleware ----------------------------------------------------------
+
+def _target_labels(targets: Set[Tuple[str, str]]) -> Tuple[str, str]:
+    if not targets:
+        return "", ""
+    if len(targets) == 1:
+        return next(iter(targets))
+    dbtypes = {dbtype for dbtype, _ in targets}
+    return (dbtypes.pop() if len(dbtypes) == 1 else "multiple"), "multiple"
+
+
+class MetricsMiddleware:
+    """Times every HTTP request until its last body chunk is sent.
+
+    Latency is labelled with the route template (not the raw path, to keep
+    label values bounded) and with the (dbtype, server) the request used,
+    or "multiple" for fan-out and join requests.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or prometheus_client is None:
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        targets: Set[Tuple[str, str]] = set()
+        token = _request_targets.set(targets)
+        status = 500
+        size = 0
+
+        async def send_wrapper(message):
+            nonlocal status, size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        route = None
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except Exception as e:
+            route = _route(scope)
+            REQUEST_EXCEPTIONS.labels(route, type(e).__name__).inc()
+            raise
+        finally:
+            _request_targets.reset(token)
+            route = route or _route(scope)
+            dbtype, server = _target_labels(targets)
+            REQUEST_DURATION.labels(route, scope["method"], str(status), dbtype, server).observe(
+                time.perf_counter() - started
+            )
+            RESPONSE_SIZE.labels(route).observe(size)
+
+
+def _route(scope) -> str:
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
@@ -0,0 +1,355 @@
+import asyncio
+import threading
+import time
+import logging
+import weakref
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+from .config import DB_POOL_REAP_INTERVAL
+
+logger = logging.getLogger(__name__)
+
+
+class PoolTimeout(RuntimeError):
+    """Raised when no connection becomes available within acquire_timeout."""
+
+
+class PoolClosed(RuntimeError):
+    """Raised when acquiring from a pool that has been shut down."""
+
+
+class _PooledConnection:
+    __slots__ = ("conn", "created_at", "last_used", "state")
+
+    def __init__(self, conn: Any):
+        now = time.monotonic()
+        self.conn = conn
+        self.created_at = now
+        self.last_used = now
+        # Driver-specific per-connection data (e.g. prepared statements); dies with the connection
+        self.state: Dict[str, Any] = {}
+
+
+class ConnectionPool:
+    """Thread-safe pool of DB-API connections for a single (dbtype, server).
+
+    The pool is driver-agnostic: the db_* client supplies callables to open,
+    ping, reset and close a raw connection. Connections are handed out LIFO so
+    the warmest ones get reused and the surplus ages out via reap().
+    """
+
+    def __init__(
+        self,
+        name: str,
+        connect: Callable[[], Any],
+        *,
+        ping: Optional[Callable[[Any], None]] = None,
+        reset: Optional[Callable[[Any], None]] = None,
+        close: Optional[Callable[[Any], None]] = None,
+        on_acquire: Optional[Callable[[float], None]] = None,
+        min_size: int = 0,
+        max_size: int = 5,
+        idle_timeout: float = 300.0,
+        max_lifetime: float = 1800.0,
+        acquire_timeout: float = 30.0,
+        ping_interval: float = 30.0,
+    ):
+        self.name = name
+        self._connect = connect
+        self._ping = ping
+        self._reset = reset
+        self._close = close or (lambda conn: conn.close())
+        # Called with the seconds each successful acquire() took (for metrics)
+        self._on_acquire = on_acquire
+        self.min_size = min_size
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.max_lifetime = max_lifetime
+        self.acquire_timeout = acquire_timeout
+        self.ping_interval = ping_interval
+
+        self._cond = threading.Condition()
+        self._idle: Deque[_PooledConnection] = deque()
+        self._in_use: Dict[int, _PooledConnection] = {}
+        self._size = 0  # idle + in use + currently opening
+        self._waiting = 0
+        self._closed = False
+        self._executor: Optional[ThreadPoolExecutor] = None
+        # Async admission, one semaphore per event loop; see reserve()
+        self._slots: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = (
+            weakref.WeakKeyDictionary()
+        )
+        self._reserving = 0
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        """Worker threads for blocking driver calls, bounded to max_size like the pool itself.
+
+        Every thread can hold at most one connection, so blocking work for this
+        server never queues on the event loop and never waits on another
+        server's slow queries.
+        """
+        if self._executor is None:
+            with self._cond:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.max_size,
+                        thread_name_prefix=f"db-{self.name}",
+                    )
+        return self._executor
+
+    async def reserve(self) -> Tuple[asyncio.Semaphore, float]:
+        """Wait for one of max_size slots on the running loop; returns the semaphore and the seconds waited.
+
+        Async clients hold a slot from their first executor call until their
+        connection is back (BaseDB.run / aclose). The executor is bounded to
+        max_size threads as well, so without this, calls queued in acquire()
+        could occupy every thread while the calls that would release a
+        connection wait behind them until acquire_timeout.
+        """
+        loop = asyncio.get_running_loop()
+        slots = self._slots.get(loop)
+        if slots is None:
+            slots = self._slots[loop] = asyncio.Semaphore(self.max_size)
+        started = time.monotonic()
+        self._reserving += 1
+        try:
+            await asyncio.wait_for(slots.acquire(), self.acquire_timeout)
+        except asyncio.TimeoutError:
+            raise PoolTimeout(
+                f"Timed out after {self.acquire_timeout}s waiting for a connection "
+                f"from pool {self.name} (max_size={self.max_size})"
+            ) from None
+        finally:
+            self._reserving -= 1
+        return slots, time.monotonic() - started
+
+    # -- internal helpers -------------------------------------------------
+
+    def _expired(self, entry: _PooledConnection, now: float) -> bool:
+        return bool(self.max_lifetime) and now - entry.created_at >= self.max_lifetime
+
+    def _discard(self, entry: _PooledConnection):
+        try:
+            self._close(entry.conn)
+        except Exception as e:
+            logger.debug(f"Pool {self.name}: error closing connection: {e}")
+
+    def _open(self) -> _PooledConnection:
+        try:
+            conn = self._connect()
+        except Exception:
+            with self._cond:
+                self._size -= 1
+                self._cond.notify()
+            raise
+        return _PooledConnection(conn)
+
+    # -- public API -------------------------------------------------------
+
+    def acquire(self, queued: float = 0.0) -> Any:
+        """Borrow a connection, opening one if the pool is below max_size.
+
+        queued is time the caller already spent waiting for the pool (a
+        reserve() slot); it is included in the wait reported to on_acquire.
+        """
+        started = time.monotonic() - queued
+        deadline = started + self.acquire_timeout
+        while True:
+            entry = None
+            stale: List[_PooledConnection] = []
+            with self._cond:
+                if self._closed:
+                    raise PoolClosed(f"Connection pool {self.name} is closed")
+                now = time.monotonic()
+                while self._idle:
+                    candidate = self._idle.pop()
+                    if self._expired(candidate, now):
+                        self._size -= 1
+                        stale.append(candidate)
+                        continue
+                    entry = candidate
+                    break
+                if entry is None and self._size < self.max_size:
+                    self._size += 1
+                elif entry is None:
+                    remaining = deadline - now
+                    if remaining <= 0:
+                        raise PoolTimeout(
+                            f"Timed out after {self.acquire_timeout}s waiting for a connection "
+                            f"from pool {self.name} (max_size={self.max_size})"
+                        )
+                    self._waiting += 1
+                    try:
+                        self._cond.wait(remaining)
+                    finally:
+                        self._waiting -= 1
+                    continue
+            for old in stale:
+                self._discard(old)
+
+            if entry is None:
+                entry = self._open()
+            elif self._ping and now - entry.last_used >= self.ping_interval:
+                try:
+                    self._ping(entry.conn)
+                except Exception as e:
+                    logger.warning(f"Pool {self.name}: dropping dead connection ({e})")
+                    self._discard(entry)
+                    with self._cond:
+                        self._size -= 1
+                        self._cond.notify()
+                    continue
+
+            with self._cond:
+                entry.last_used = time.monotonic()
+                self._in_use[id(entry.conn)] = entry
+            if self._on_acquire:
+                self._on_acquire(entry.last_used - started)
+            return entry.conn
+
+    def release(self, conn: Any, discard: bool = False):
+        """Return a borrowed connection; broken or expired connections are closed instead."""
+        with self._cond:
+            entry = self._in_use.pop(id(conn), None)
+        if entry is None:
+            # Not ours (or released twice) - just make sure it does not leak
+            self._discard(_PooledConnection(conn))
+            return
+
+        if not discard and self._reset:
+            try:
+                self._reset(conn)
+            except Exception as e:
+                logger.warning(f"Pool {self.name}: connection failed reset, discarding ({e})")
+                discard = True
+
+        with self._cond:
+            if discard or self._closed or self._expired(entry, time.monotonic()):
+                self._size -= 1
+                keep = False
+            else:
+                entry.last_used = time.monotonic()
+                self._idle.append(entry)
+                keep = True
+            self._cond.notify()
+        if not keep:
+            self._discard(entry)
+
+    def state(self, conn: Any) -> Dict[str, Any]:
+        """Per-connection scratch space for a connection currently checked out."""
+        with self._cond:
+            return self._in_use[id(conn)].state
+
+    def fill(self) -> int:
+        """Open connections until the pool holds at least min_size; returns how many were opened."""
+        opened = 0
+        while True:
+            with self._cond:
+                if self._closed or self._size >= self.min_size:
+                    return opened
+                self._size += 1
+            entry = self._open()
+            with self._cond:
+                self._idle.appendleft(entry)
+                self._cond.notify()
+            opened += 1
+
+    def reap(self):
+        """Close idle connections past idle_timeout (keeping min_size) or past max_lifetime."""
+        doomed: List[_PooledConnection] = []
+        with self._cond:
+            now = time.monotonic()
+            keep: Deque[_PooledConnection] = deque()
+            # Oldest idle connections sit at the left of the deque
+            while self._idle:
+                entry = self._idle.popleft()
+                idle_for = now - entry.last_used
+                surplus = self._size - len(doomed) > self.min_size
+                if self._expired(entry, now) or (self.idle_timeout and idle_for >= self.idle_timeout and surplus):
+                    doomed.append(entry)
+                else:
+                    keep.append(entry)
+            self._idle = keep
+            self._size -= len(doomed)
+        for entry in doomed:
+            self._discard(entry)
+        if doomed:
+            logger.debug(f"Pool {self.name}: reaped {len(doomed)} connection(s)")
+
+    def close(self):
+        """Close idle connections and refuse new checkouts; in-use ones close on release."""
+        with self._cond:
+            self._closed = True
+            idle = list(self._idle)
+            self._idle.clear()
+            self._size -= len(idle)
+            self._cond.notify_all()
+            executor, self._executor = self._executor, None
+        for entry in idle:
+            self._discard(entry)
+        if executor is not None:
+            executor.shutdown(wait=False)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            return {
+                "size": self._size,
+                "idle": len(self._idle),
+                "in_use": len(self._in_use),
+                "waiting": self._waiting + self._reserving,
+                "min_size": self.min_size,
+                "max_size": self.max_size,
+                "closed": self._closed,
+            }
+
+
+# -- registry ---------------------------------------------------------------
+
+_pools: Dict[Tuple[str, str], ConnectionPool] = {}
+_registry_lock = threading.Lock()
+_reaper: Optional[threading.Thread] = None
+
+
+def _reap_forever():
+    while True:
+        time.sleep(DB_POOL_REAP_INTERVAL)
+        for pool in list(_pools.values()):
+            try:
+                pool.reap()
+                pool.fill()
+            except Exception as e:
+                logger.warning(f"Pool {pool.name}: maintenance failed: {e}")
+
+
+def get_pool(dbtype: str, server: str, factory: Callable[[], ConnectionPool]) -> ConnectionPool:
+    """Return the pool for (dbtype, server), creating it with factory() on first use."""
+    global _reaper
+    key = (dbtype, server)
+    pool = _pools.get(key)
+    if pool is not None:
+        return pool
+    with _registry_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = factory()
+            _pools[key] = pool
+            logger.info(f"Created connection pool {pool.name} (min={pool.min_size}, max={pool.max_size})")
+        if _reaper is None and DB_POOL_REAP_INTERVAL > 0:
+            _reaper = threading.Thread(target=_reap_forever, name="db-pool-reaper", daemon=True)
+            _reaper.start()
+    return pool
+
+
+def all_pools() -> Dict[Tuple[str, str], ConnectionPool]:
+    return dict(_pools)
+
+
+def close_all_pools():
+    with _registry_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.close()
@@ -0,0 +1,119 @@
+import base64
+import datetime
+import decimal
+import json
+import uuid
+from typing import Any, Callable, List, NamedTuple, Optional, Sequence
+
+from fastapi.responses import Response
+
+from . import tracing
+
+try:
+    import orjson
+except ImportError:  # optional: fall back to the standard library encoder
+    orjson = None
+
+# Per-column value converter (None = the encoder handles the value natively)
+Converter = Optional[Callable[[Any], Any]]
+
+
+class ColumnType(NamedTuple):
+    """Logical type of a result column, derived from cursor.description.
+
+    kind is one of int, float, decimal, bool, string, binary, date, datetime,
+    time, interval or json; None means unknown (typed from the data).
+    precision and scale are only set for decimals the database declared them for.
+    """
+
+    kind: Optional[str]
+    precision: Optional[int] = None
+    scale: Optional[int] = None
+
+
+def json_default(value: Any) -> Any:
+    """Encode driver values the same way FastAPI's jsonable_encoder would."""
+    if isinstance(value, (datetime.datetime, datetime.date, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, decimal.Decimal):
+        return decimal_to_number(value)
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return bytes_to_text(value)
+    if isinstance(value, datetime.timedelta):
+        return value.total_seconds()
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    if hasattr(value, "read"):  # LOB locators
+        return read_lob(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(value: Any) -> bytes:
+    """Serialise to JSON bytes with orjson when installed, else the json module."""
+    if orjson is not None:
+        return orjson.dumps(value, default=json_default)
+    return json.dumps(value, default=json_default, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+class FastJSONResponse(Response):
+    """JSON response rendered by dumps(), skipping FastAPI's jsonable_encoder pass.
+
+    Route handlers return it directly with result rows already passed
+    through their column converters.
+    """
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        with tracing.span("json.encode") as span:
+            body = dumps(content)
+            if span is not None:
+                span.attributes["http.response.body.size"] = len(body)
+            return body
+
+
+# -- column converters (picked once per result set from cursor.description) --
+
+def decimal_to_number(value: decimal.Decimal) -> Any:
+    return int(value) if value.as_tuple().exponent >= 0 else float(value)
+
+
+def bytes_to_text(value: Any) -> Any:
+    if isinstance(value, str):
+        return value
+    value = bytes(value)
+    try:
+        return value.decode()
+    except UnicodeDecodeError:
+        return base64.b64encode(value).decode("ascii")
+
+
+def read_lob(value: Any) -> Any:
+    data = value.read() if hasattr(value, "read") else value
+    return bytes_to_text(data) if isinstance(data, (bytes, bytearray, memoryview)) else data
+
+
+def timedelta_to_seconds(value: datetime.timedelta) -> float:
+    return value.total_seconds()
+
+
+def set_to_list(value: Any) -> Any:
+    return sorted(value) if isinstance(value, (set, frozenset)) else value
+
+
+def convert_rows(rows: Sequence[Any], converters: Sequence[Converter]) -> List[Any]:
+    """Apply per-column converters to driver rows; rows come back unchanged if none apply."""
+    active = [(i, f) for i, f in enumerate(converters) if f is not None]
+    if not active:
+        return rows if isinstance(rows, list) else list(rows)
+    out = []
+    for row in rows:
+        row = list(row)
+        for i, convert in active:
+            value = row[i]
+            if value is not None:
+                row[i] = convert(value)
+        out.append(row)
+    return out
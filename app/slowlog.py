@@ -0,0 +1,145 @@
+import collections
+import functools
+import hashlib
+import logging
+import re
+import threading
+import time
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence
+
+from .auth import caller_key_hash
+from .config import SLOW_QUERY_LOG_SIZE, SLOW_QUERY_THRESHOLD
+
+logger = logging.getLogger(__name__)
+
+_COMMENT_RE = re.compile(r"--[^\n]*|/\*.*?\*/", re.DOTALL)
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+# Bind placeholders of every driver style: %(name)s, %s, $1, :name / :1 (not ::casts), ?
+_PLACEHOLDER_RE = re.compile(r"%\(\w+\)s|%s|\$\d+|(?<![:\w]):\w+|\?")
+_NUMBER_RE = re.compile(r"(?<![\w$#.])\d+(?:\.\d+)?(?:[eE][-+]?\d+)?")
+_VALUE_LIST_RE = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+_ROW_LIST_RE = re.compile(r"\(\?, \.\.\.\)(?:\s*,\s*\(\?, \.\.\.\))+")
+_SPACE_RE = re.compile(r"\s+")
+FINGERPRINT_MAX_LENGTH = 2000
+
+
+@functools.lru_cache(maxsize=1024)
+def fingerprint(sql: str) -> str:
+    """Normalised statement shape: literals and placeholders become ?, value lists collapse, case and spacing fold.
+
+    Statements that differ only in their values (or in how many IN-list
+    items / VALUES rows they have) share a fingerprint.
+    """
+    text = _COMMENT_RE.sub(" ", sql)
+    text = _STRING_RE.sub("?", text)
+    text = _PLACEHOLDER_RE.sub("?", text)
+    text = _NUMBER_RE.sub("?", text)
+    text = _VALUE_LIST_RE.sub("(?, ...)", text)
+    text = _ROW_LIST_RE.sub("(?, ...)", text)
+    text = _SPACE_RE.sub(" ", text).strip().lower()
+    return text[:FINGERPRINT_MAX_LENGTH]
+
+
+def fingerprint_id(text: str) -> str:
+    return hashlib.sha1(text.encode()).hexdigest()[:16]
+
+
+class SlowQuery(NamedTuple):
+    timestamp: float
+    dbtype: str
+    server: str
+    fingerprint: str
+    duration: float
+    rows: Optional[int]
+    api_key_hash: Optional[str]
+
+
+class SlowQueryLog:
+    """Most recent slow statements of this worker, oldest dropped first.
+
+    record() is called from the pool executors' threads, so the buffer is
+    guarded by a lock.
+    """
+
+    def __init__(self, threshold: float, size: int):
+        self.threshold = threshold
+        self._entries: "collections.deque[SlowQuery]" = collections.deque(maxlen=max(size, 1))
+        self._enabled = size > 0
+        self._lock = threading.Lock()
+        self.recorded = 0
+
+    def record(self, dbtype: str, server: Optional[str], sql: str, duration: float, rows: Optional[int]):
+        if duration < self.threshold or not self._enabled:
+            return
+        text = fingerprint(sql)
+        server = server or "default"
+        entry = SlowQuery(time.time(), dbtype, server, text, duration, rows, caller_key_hash())
+        with self._lock:
+            self._entries.append(entry)
+            self.recorded += 1
+        logger.warning(
+            f"Slow query {fingerprint_id(text)} on {dbtype}:{server}: {duration * 1000:.0f} ms, rows={rows}"
+        )
+
+    def entries(self, dbtype: Optional[str] = None, server: Optional[str] = None,
+                since: Optional[float] = None) -> List[SlowQuery]:
+        with self._lock:
+            entries = list(self._entries)
+        return [
+            e for e in entries
+            if (dbtype is None or e.dbtype == dbtype)
+            and (server is None or e.server == server)
+            and (since is None or e.timestamp >= since)
+        ]
+
+
+def _percentile(ordered: Sequence[float], pct: float) -> float:
+    """Nearest-rank percentile of an ascending sequence."""
+    rank = max(1, -(-len(ordered) * pct // 100))
+    return ordered[int(rank) - 1]
+
+
+def entry_dict(entry: SlowQuery) -> Dict[str, Any]:
+    return {
+        "timestamp": entry.timestamp,
+        "dbtype": entry.dbtype,
+        "server": entry.server,
+        "fingerprint_id": fingerprint_id(entry.fingerprint),
+        "fingerprint": entry.fingerprint,
+        "duration_ms": round(entry.duration * 1000, 3),
+        "rows": entry.rows,
+        "api_key_hash": entry.api_key_hash,
+    }
+
+
+def aggregate(entries: Sequence[SlowQuery]) -> List[Dict[str, Any]]:
+    """Per-fingerprint count and duration percentiles (ms), most total time first."""
+    groups: Dict[str, List[SlowQuery]] = {}
+    for e in entries:
+        groups.setdefault(e.fingerprint, []).append(e)
+    result = []
+    for text, group in groups.items():
+        durations = sorted(e.duration for e in group)
+        rows = [e.rows for e in group if e.rows is not None]
+        result.append({
+            "fingerprint_id": fingerprint_id(text),
+            "fingerprint": text,
+            "count": len(group),
+            "total_ms": round(sum(durations) * 1000, 3),
+            "p50_ms": round(_percentile(durations, 50) * 1000, 3),
+            "p95_ms": round(_percentile(durations, 95) * 1000, 3),
+            "max_ms": round(durations[-1] * 1000, 3),
+            "max_rows": max(rows) if rows else None,
+            "targets": sorted({f"{e.dbtype}:{e.server}" for e in group}),
+            "api_key_hashes": sorted({e.api_key_hash for e in group if e.api_key_hash}),
+            "last_seen": max(e.timestamp for e in group),
+        })
+    result.sort(key=lambda g: g["total_ms"], reverse=True)
+    return result
+
+
+slow_queries = SlowQueryLog(SLOW_QUERY_THRESHOLD, SLOW_QUERY_LOG_SIZE)
+
+
+def record(dbtype: str, server: Optional[str], sql: str, duration: float, rows: Optional[int]):
+    slow_queries.record(dbtype, server, sql, duration, rows)
@@ -0,0 +1,58 @@
+import asyncio
+import logging
+from typing import AsyncIterator
+
+from .db_base import BaseDB, RowStream
+from .serialization import dumps
+
+logger = logging.getLogger(__name__)
+
+STREAM_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "json": "application/json",
+}
+
+
+async def stream_rows(db: BaseDB, stream: RowStream, fmt: str) -> AsyncIterator[bytes]:
+    """Yield a RowStream as NDJSON lines or one JSON array, a chunk per driver fetch.
+
+    Each fetch runs on the db's executor; the connection is released when the
+    stream ends, fails or the client disconnects. A failure after the first
+    byte cannot change the status code, so NDJSON ends with an {"error": ...}
+    line and a JSON array is left unterminated.
+    """
+    cols = stream.columns
+    fetch = None
+    first = True
+    try:
+        if fmt == "json":
+            yield b"["
+        while True:
+            # Shield the fetch so a client disconnect never leaves the cursor mid-call
+            # while close_stream() runs on another executor thread.
+            fetch = asyncio.ensure_future(db.run(stream.fetch))
+            rows = await asyncio.shield(fetch)
+            fetch = None
+            if not rows:
+                break
+            if fmt == "ndjson":
+                chunk = b"".join(dumps(dict(zip(cols, r))) + b"\n" for r in rows)
+            else:
+                chunk = b",".join(dumps(dict(zip(cols, r))) for r in rows)
+                if not first:
+                    chunk = b"," + chunk
+            first = False
+            yield chunk
+        if fmt == "json":
+            yield b"]"
+    except asyncio.CancelledError:
+        logger.info("sqlExec stream cancelled by client")
+        raise
+    except Exception as e:
+        logger.error(f"sqlExec stream failed: {e}")
+        if fmt == "ndjson":
+            yield dumps({"error": f"Database query failed: {e}"}) + b"\n"
+    finally:
+        if fetch is not None and not fetch.done():
+            await asyncio.wait([fetch])
+        await db.run(db.close_stream, stream)
@@ -0,0 +1,227 @@
+import contextlib
+import contextvars
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterator, List, Optional
+
+from fastapi.routing import APIRoute
+
+from .config import SERVER_TIMING_ENABLED, TRACE_EXPORT_FILE, TRACE_MAX_SPANS
+
+logger = logging.getLogger(__name__)
+
+SERVICE_NAME = "multi-db-api"
+
+
+class Span:
+    """One timed phase of a request; times are perf_counter_ns() values."""
+
+    __slots__ = ("name", "span_id", "parent_id", "start", "end", "attributes", "error")
+
+    def __init__(self, name: str, parent_id: Optional[str], attributes: Optional[Dict[str, Any]]):
+        self.name = name
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.start = time.perf_counter_ns()
+        self.end: Optional[int] = None
+        self.attributes = attributes or {}
+        self.error: Optional[str] = None
+
+    @property
+    def duration_ms(self) -> float:
+        return ((self.end or time.perf_counter_ns()) - self.start) / 1e6
+
+
+class Trace:
+    """Spans recorded for one HTTP request (possibly from several worker threads)."""
+
+    def __init__(self, name: str):
+        self.trace_id = os.urandom(16).hex()
+        # perf_counter for durations, anchored to wall-clock time for export
+        self.wall_start = time.time_ns()
+        self.root = Span(name, None, None)
+        self.spans: List[Span] = []
+        self.dropped = 0
+
+    def start_span(self, name: str, parent_id: Optional[str], attributes: Optional[Dict[str, Any]]) -> Optional[Span]:
+        if len(self.spans) >= TRACE_MAX_SPANS:
+            self.dropped += 1
+            return None
+        span = Span(name, parent_id or self.root.span_id, attributes)
+        self.spans.append(span)  # list.append is atomic, so worker threads can record too
+        return span
+
+    def server_timing(self) -> str:
+        """Server-Timing header value: finished spans summed per name, plus the time so far as total."""
+        totals: Dict[str, float] = {}
+        for span in self.spans:
+            if span.end is not None:
+                totals[span.name] = totals.get(span.name, 0.0) + span.duration_ms
+        entries = [f"{name};dur={ms:.1f}" for name, ms in totals.items()]
+        entries.append(f"total;dur={self.root.duration_ms:.1f}")
+        return ", ".join(entries)
+
+    def _unix_ns(self, perf_ns: int) -> str:
+        return str(self.wall_start + (perf_ns - self.root.start))
+
+    def _otlp_span(self, span: Span, kind: int) -> Dict[str, Any]:
+        data: Dict[str, Any] = {
+            "traceId": self.trace_id,
+            "spanId": span.span_id,
+            "name": span.name,
+            "kind": kind,
+            "startTimeUnixNano": self._unix_ns(span.start),
+            "endTimeUnixNano": self._unix_ns(span.end or span.start),
+            "attributes": [_otlp_attribute(k, v) for k, v in span.attributes.items()],
+            "status": {"code": 2, "message": span.error} if span.error else {"code": 0},
+        }
+        if span.parent_id:
+            data["parentSpanId"] = span.parent_id
+        return data
+
+    def to_otlp(self) -> Dict[str, Any]:
+        """The trace as an OTLP/JSON ExportTraceServiceRequest (what the OpenTelemetry file exporter writes)."""
+        spans = [self._otlp_span(self.root, 2)] + [self._otlp_span(s, 1) for s in self.spans]
+        return {
+            "resourceSpans": [{
+                "resource": {"attributes": [_otlp_attribute("service.name", SERVICE_NAME)]},
+                "scopeSpans": [{"scope": {"name": __name__}, "spans": spans}],
+            }]
+        }
+
+
+def _otlp_attribute(key: str, value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        typed = {"boolValue": value}
+    elif isinstance(value, int):
+        typed = {"intValue": str(value)}
+    elif isinstance(value, float):
+        typed = {"doubleValue": value}
+    else:
+        typed = {"stringValue": str(value)}
+    return {"key": key, "value": typed}
+
+
+_current_trace: contextvars.ContextVar[Optional[Trace]] = contextvars.ContextVar("current_trace", default=None)
+_current_span: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("current_span", default=None)
+
+
+@contextlib.contextmanager
+def span(name: str, attributes: Optional[Dict[str, Any]] = None) -> Iterator[Optional[Span]]:
+    """Time the enclosed block as a child of the current span; a no-op outside a traced request.
+
+    The context (and so the parent span) follows calls made through
+    BaseDB.run(), which copies it onto the worker thread.
+    """
+    trace = _current_trace.get()
+    current = trace.start_span(name, _current_span.get(), attributes) if trace is not None else None
+    if current is None:
+        yield None
+        return
+    token = _current_span.set(current.span_id)
+    try:
+        yield current
+    except BaseException as e:
+        current.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        _current_span.reset(token)
+        current.end = time.perf_counter_ns()
+
+
+# -- file exporter ------------------------------------------------------------
+
+_export_lock = threading.Lock()
+_exporter: Optional[ThreadPoolExecutor] = None
+
+
+def _write_trace(trace: Trace):
+    line = json.dumps(trace.to_otlp(), separators=(",", ":"))
+    try:
+        with _export_lock, open(TRACE_EXPORT_FILE, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+    except OSError as e:
+        logger.warning(f"Writing trace to {TRACE_EXPORT_FILE} failed: {e}")
+
+
+def export_trace(trace: Trace):
+    """Append the trace to TRACE_EXPORT_FILE as one OTLP/JSON line, off the event loop."""
+    global _exporter
+    if _exporter is None:
+        _exporter = ThreadPoolExecutor(max_workers=1, thread_name_prefix="trace-export")
+    _exporter.submit(_write_trace, trace)
+
+
+# -- ASGI middleware ----------------------------------------------------------
+
+class TracingMiddleware:
+    """Records a trace per HTTP request.
+
+    The Server-Timing header is added when the response starts, so it
+    covers the phases finished by then (for streamed responses: up to the
+    first chunk). With TRACE_EXPORT_FILE set, the complete trace is written
+    once the last body chunk has been sent.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not (SERVER_TIMING_ENABLED or TRACE_EXPORT_FILE):
+            await self.app(scope, receive, send)
+            return
+
+        trace = Trace(f"{scope['method']} {scope['path']}")
+        trace_token = _current_trace.set(trace)
+        span_token = _current_span.set(trace.root.span_id)
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if SERVER_TIMING_ENABLED:
+                    headers = list(message.get("headers", []))
+                    headers.append((b"server-timing", trace.server_timing().encode("latin-1")))
+                    message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except BaseException as e:
+            trace.root.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            _current_span.reset(span_token)
+            _current_trace.reset(trace_token)
+            trace.root.end = time.perf_counter_ns()
+            route = getattr(scope.get("route"), "path", None)
+            if route:
+                trace.root.name = f"{scope['method']} {route}"
+            trace.root.attributes.update({
+                "http.request.method": scope["method"],
+                "url.path": scope["path"],
+                "http.response.status_code": status,
+            })
+            if trace.dropped:
+                trace.root.attributes["spans.dropped"] = trace.dropped
+            if TRACE_EXPORT_FILE:
+                export_trace(trace)
+
+
+class TracedRoute(APIRoute):
+    """APIRoute that runs each call (body parsing, dependencies, endpoint, rendering) in a "handler" span."""
+
+    def get_route_handler(self):
+        handler = super().get_route_handler()
+        attributes = {"code.function": self.name}
+
+        async def traced_handler(request):
+            with span("handler", dict(attributes)):
+                return await handler(request)
+
+        return traced_handler
@@ -0,0 +1,150 @@
+"""Startup warm-up of every configured server, reported by GET /ready.
+
+Without it the first requests on each worker pay for the driver import,
+connection setup and statement preparation. warm_up() runs once in the
+background after startup and handles all servers concurrently. For each:
+
+1. load the dbtype's driver (drivers.client_class)
+2. open max(min_size, 1) pooled connections in parallel
+3. compile the server's "warmup" statement shapes into the CRUD statement
+   cache, and prepare the SELECT shapes on every opened connection by
+   running them once with NULL keys (which match no rows)
+
+A failing or slow server is reported, never fatal: once every server has
+finished or passed WARMUP_TIMEOUT, the worker is ready. As in health.py,
+a failure's "error" is the exception class and the driver's message is
+kept as "error_detail" for authenticated callers.
+"""
+import asyncio
+import logging
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from . import drivers
+from .config import WARMUP_TIMEOUT, configured_servers
+from .dialects import compile_statement
+
+logger = logging.getLogger(__name__)
+
+
+def _ms(seconds: float) -> float:
+    return round(seconds * 1000, 1)
+
+
+class Warmup:
+    """Progress of this worker's warm-up and the outcome per (dbtype, server)."""
+
+    def __init__(self):
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.servers: Dict[str, Dict[str, Any]] = {}
+
+    @property
+    def done(self) -> bool:
+        return self.finished_at is not None
+
+    def report(self) -> Dict[str, Any]:
+        if self.started_at is None:
+            state = "not started"
+        elif not self.done:
+            state = "warming up"
+        elif all(s["status"] == "ok" for s in self.servers.values()):
+            state = "ready"
+        else:
+            state = "degraded"
+        elapsed = None
+        if self.started_at is not None:
+            elapsed = _ms((self.finished_at or time.monotonic()) - self.started_at)
+        return {"status": state, "elapsed_ms": elapsed, "servers": {k: dict(v) for k, v in self.servers.items()}}
+
+
+warmup = Warmup()
+
+
+def statement_shapes(dbtype: str, config: Dict[str, Any]) -> List[Tuple[str, int]]:
+    """(sql, bind count) of each SELECT shape in config["warmup"]; every shape is compiled on the way.
+
+    Entries look like {"op": "select", "table": "users", "where": ["id"],
+    "fields": "id, email"}; "columns" lists INSERT/UPDATE columns. The calls
+    match the endpoints' own, so they land on the same compile_statement()
+    cache entries.
+    """
+    selects = []
+    for entry in config.get("warmup") or []:
+        op = str(entry.get("op", "select")).lower()
+        table = entry["table"]
+        columns = tuple(entry.get("columns") or ())
+        where = tuple(entry.get("where") or ())
+        if op == "select":
+            fields = str(entry.get("fields") or "*").strip()
+            selects.append((compile_statement(dbtype, "select", table, where=where, fields=fields), len(where)))
+        elif op == "insert":
+            compile_statement(dbtype, "insert", table, columns=columns)
+        elif op == "update":
+            compile_statement(dbtype, "update", table, columns=columns, where=where)
+        elif op == "delete":
+            compile_statement(dbtype, "delete", table, where=where)
+        else:
+            raise ValueError(f"Unknown warmup statement type '{op}'")
+    return selects
+
+
+async def _each(calls):
+    """Await calls concurrently, then raise the first failure: every client must be idle before it is closed."""
+    for outcome in await asyncio.gather(*calls, return_exceptions=True):
+        if isinstance(outcome, Exception):
+            raise outcome
+
+
+async def warm_server(dbtype: str, server: str, config: Dict[str, Any], result: Dict[str, Any]):
+    """Warm one server, filling result with its timings and status as it goes."""
+    loop = asyncio.get_running_loop()
+    started = time.monotonic()
+    clients = []
+    try:
+        cls = await loop.run_in_executor(None, drivers.client_class, dbtype)
+        result["driver_ms"] = _ms(time.monotonic() - started)
+
+        mark = time.monotonic()
+        shapes = statement_shapes(dbtype, config)
+        client = cls(config, server)
+        if client.pool is not None:
+            clients = [client] + [cls(config, server) for _ in range(max(client.pool.min_size, 1) - 1)]
+            # Every client holds its connection until the end, so each connect() opens a new one
+            await _each(c.run(c.connect) for c in clients)
+            result["connections"] = len(clients)
+            result["connect_ms"] = _ms(time.monotonic() - mark)
+
+            mark = time.monotonic()
+            for sql, binds in shapes:
+                await _each(c.aquery(sql, (None,) * binds, prepare=True) for c in clients)
+            result["statements"] = len(shapes)
+            result["prepare_ms"] = _ms(time.monotonic() - mark)
+        result["status"] = "ok"
+    except Exception as e:
+        logger.warning(f"Warm-up of {dbtype}:{server} failed: {e}")
+        result.update(status="error", error=type(e).__name__, error_detail=str(e).strip())
+    finally:
+        for c in clients:
+            await c.aclose()
+        result["total_ms"] = _ms(time.monotonic() - started)
+
+
+async def warm_up():
+    """Warm every configured server concurrently; finishes once each is done or past WARMUP_TIMEOUT."""
+    warmup.started_at = time.monotonic()
+    tasks = {}
+    for dbtype, server, config in configured_servers():
+        result = warmup.servers[f"{dbtype}:{server}"] = {"dbtype": dbtype, "server": server, "status": "warming up"}
+        tasks[asyncio.ensure_future(warm_server(dbtype, server, config, result))] = result
+    if tasks:
+        _, pending = await asyncio.wait(tasks, timeout=WARMUP_TIMEOUT)
+        for task in pending:
+            # Left running: a late server still updates its entry when it gets there
+            result = tasks[task]
+            result["status"] = "timeout"
+            logger.warning(f"Warm-up of {result['dbtype']}:{result['server']} still running after {WARMUP_TIMEOUT}s")
+    warmup.finished_at = time.monotonic()
+    report = warmup.report()
+    logger.info(f"Warm-up {report['status']} in {report['elapsed_ms']} ms: "
+                + ", ".join(f"{k} {v['status']}" for k, v in report["servers"].items()))
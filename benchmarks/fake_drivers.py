@@ -0,0 +1,239 @@
+"""In-process stand-ins for the database servers, used by the load benchmark.
+
+install() replaces open_connection() on the real OracleDB / MySQLDB /
+PostgresDB / MSSQLDB classes so every pool, cursor, converter and dialect
+code path of the app still runs; only the network round trip is simulated.
+The driver packages must be importable (their type constants describe the
+fake result columns), as they are for the app itself.
+
+A fake cursor answers by statement shape:
+- COUNT(*) queries return FakeProfile.total_rows
+- lookups (WHERE col = ? / IN (...) / UNION ALL of keys) return one row per bound key
+- other SELECTs return FakeProfile.rows rows, capped by LIMIT / FETCH NEXT
+- DML reports one affected row per VALUES tuple or parameter set
+Every execute() sleeps FakeProfile.latency and every fetch round trip
+FakeProfile.fetch_latency, blocking the calling thread like a real driver.
+"""
+import collections
+import datetime
+import decimal
+import re
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence
+
+from app.dialects import LOOKUP_POSITION_COLUMN, WINDOW_TOTAL_COLUMN
+
+DBTYPES = ("oracle", "mysql", "postgres", "mssql")
+
+# DB-API description entry; psycopg2 exposes precision/scale by name, mysql-connector's flags are d[7]
+Column = collections.namedtuple(
+    "Column", "name type_code display_size internal_size precision scale null_ok flags", defaults=(0,)
+)
+
+_LIMIT_RE = re.compile(r"\blimit\s+(\d+)|\bfetch\s+(?:next|first)\s+(\d+)\s+rows|\btop\s*\(?\s*(\d+)")
+_PREPARE_RE = re.compile(r"^\s*prepare\s+(\w+)\s+as\s+(.*)$", re.IGNORECASE | re.DOTALL)
+_EXECUTE_RE = re.compile(r"^\s*execute\s+(\w+)", re.IGNORECASE)
+
+
+@dataclass
+class FakeProfile:
+    latency: float = 0.002          # seconds per execute()
+    fetch_latency: float = 0.0      # seconds per fetchmany()/fetchall() round trip
+    connect_latency: float = 0.02   # seconds per new connection
+    rows: int = 100                 # rows returned by an unbounded SELECT
+    total_rows: int = 10000         # answer to COUNT(*)
+
+
+def _column_types(dbtype: str) -> Dict[str, Any]:
+    """Driver type codes for the fake columns: int, string, decimal, timestamp."""
+    if dbtype == "oracle":
+        import oracledb
+        return {"int": (oracledb.DB_TYPE_NUMBER, 10, 0), "str": (oracledb.DB_TYPE_VARCHAR, None, None),
+                "dec": (oracledb.DB_TYPE_NUMBER, 12, 2), "ts": (oracledb.DB_TYPE_TIMESTAMP, None, None)}
+    if dbtype == "mysql":
+        from mysql.connector.constants import FieldType
+        return {"int": (FieldType.LONGLONG, None, None), "str": (FieldType.VAR_STRING, None, None),
+                "dec": (FieldType.NEWDECIMAL, 12, 2), "ts": (FieldType.DATETIME, None, None)}
+    if dbtype == "postgres":
+        return {"int": (20, None, None), "str": (1043, None, None), "dec": (1700, 12, 2), "ts": (1114, None, None)}
+    return {"int": (int, None, None), "str": (str, None, None),
+            "dec": (decimal.Decimal, 12, 2), "ts": (datetime.datetime, None, None)}
+
+
+class FakeCursor:
+    def __init__(self, conn: "FakeConnection", name: Optional[str] = None):
+        self.conn = conn
+        self.name = name
+        self.arraysize = 100
+        self.itersize = 2000
+        self.description: Optional[List[Column]] = None
+        self.rowcount = -1
+        self.lastrowid: Optional[int] = None
+        self.fast_executemany = False
+        self._rows: List[tuple] = []
+        self._pos = 0
+
+    # -- result shapes --------------------------------------------------------
+
+    def _describe(self, names: Sequence[str], kinds: Sequence[str]) -> List[Column]:
+        types = self.conn.types
+        return [Column(n, types[k][0], None, None, types[k][1], types[k][2], True) for n, k in zip(names, kinds)]
+
+    def _row(self, i: int) -> tuple:
+        amount = decimal.Decimal(i * 7 % 100000) / 100
+        if self.conn.dbtype == "oracle":
+            amount = float(amount)  # oracledb returns NUMBER as int/float unless fetch_decimals is set
+        created = datetime.datetime(2024, 1, 1) + datetime.timedelta(minutes=i)
+        return (i, f"name {i}", f"user{i}@example.com", amount, created, None if i % 3 else "note")
+
+    def _result(self, sql: str, params: Any):
+        lowered = sql.lower()
+        profile = self.conn.profile
+        if "count(*)" in lowered and "over (" not in lowered:
+            self.description = self._describe(["total"], ["int"])
+            self._rows = [(profile.total_rows,)]
+            return
+        names = ["id", "name", "email", "amount", "created_at", "notes"]
+        kinds = ["int", "str", "str", "dec", "ts", "str"]
+        values = list(params.values()) if isinstance(params, dict) else list(params or ())
+        limit = _LIMIT_RE.search(lowered)
+        if LOOKUP_POSITION_COLUMN in lowered:
+            # /getRecords: one row per key, tagged with the key's position
+            self.description = self._describe(names + [LOOKUP_POSITION_COLUMN], kinds + ["int"])
+            self._rows = [self._row(v) + (pos,) for pos, v in enumerate(values) if isinstance(v, int)]
+            return
+        if " in (" in lowered and values:
+            ids = [v for v in values if isinstance(v, int)]
+        elif limit is None and "where" in lowered and values:
+            ids = [values[0]] if isinstance(values[0], int) else [1]
+        else:
+            count = profile.rows
+            if limit is not None:
+                count = min(count, int(next(g for g in limit.groups() if g)))
+            ids = range(1, count + 1)
+        rows = [self._row(i) for i in ids]
+        if "over (" in lowered:
+            names.append(WINDOW_TOTAL_COLUMN)
+            kinds.append("int")
+            rows = [r + (profile.total_rows,) for r in rows]
+        self.description = self._describe(names, kinds)
+        self._rows = rows
+
+    # -- DB-API ---------------------------------------------------------------
+
+    def execute(self, sql: str, params: Any = None):
+        time.sleep(self.conn.profile.latency)
+        self.conn.in_transaction = True
+        self._pos = 0
+        self._rows = []
+        self.description = None
+        prepared = _PREPARE_RE.match(sql)
+        if prepared:
+            self.conn.prepared[prepared.group(1)] = prepared.group(2)
+            return
+        executed = _EXECUTE_RE.match(sql)
+        if executed and executed.group(1) in self.conn.prepared:
+            sql = self.conn.prepared[executed.group(1)]
+        head = sql.lstrip().split(None, 1)[0].lower() if sql.strip() else ""
+        if head in ("select", "with"):
+            self._result(sql, params)
+            self.rowcount = len(self._rows)
+        elif head in ("insert", "update", "delete", "merge"):
+            values_at = sql.lower().find(" values ")
+            self.rowcount = max(1, sql[values_at:].count("(")) if values_at >= 0 else 1
+            self.lastrowid = 1
+        else:
+            self.rowcount = 0
+
+    def executemany(self, sql: str, seq_of_params: Sequence[Any]):
+        time.sleep(self.conn.profile.latency)
+        self.conn.in_transaction = True
+        self.description = None
+        self.rowcount = len(seq_of_params)
+
+    def copy_expert(self, sql: str, file):
+        time.sleep(self.conn.profile.latency)
+        self.conn.in_transaction = True
+        self.rowcount = sum(1 for _ in file)
+
+    def fetchmany(self, size: Optional[int] = None) -> List[tuple]:
+        if self.conn.profile.fetch_latency:
+            time.sleep(self.conn.profile.fetch_latency)
+        size = size or self.arraysize
+        rows = self._rows[self._pos:self._pos + size]
+        self._pos += len(rows)
+        return rows
+
+    def fetchall(self) -> List[tuple]:
+        return self.fetchmany(max(len(self._rows) - self._pos, 1))
+
+    def fetchone(self) -> Optional[tuple]:
+        rows = self.fetchmany(1)
+        return rows[0] if rows else None
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    """Connection with the attributes each driver's pool hooks look at (ping, transaction state, cancel)."""
+
+    def __init__(self, dbtype: str, profile: FakeProfile):
+        time.sleep(profile.connect_latency)
+        self.dbtype = dbtype
+        self.profile = profile
+        self.types = _column_types(dbtype)
+        self.prepared: Dict[str, str] = {}
+        self.in_transaction = False
+        self.closed = 0
+        self.stmtcachesize = 0
+
+    @property
+    def transaction_in_progress(self) -> bool:  # oracledb
+        return self.in_transaction
+
+    def get_transaction_status(self) -> int:  # psycopg2: 0 is TRANSACTION_STATUS_IDLE
+        return 2 if self.in_transaction else 0
+
+    def cursor(self, name: Optional[str] = None, **kwargs) -> FakeCursor:
+        return FakeCursor(self, name)
+
+    def ping(self, reconnect: bool = False):
+        time.sleep(self.profile.latency)
+
+    def commit(self):
+        self.in_transaction = False
+
+    def rollback(self):
+        self.in_transaction = False
+
+    def cancel(self):
+        pass
+
+    def close(self):
+        self.closed = 1
+
+
+def db_classes() -> Dict[str, type]:
+    """The app's client class per dbtype whose driver can be imported here."""
+    classes = {}
+    for dbtype, module, name in (
+        ("oracle", "app.db_oracle", "OracleDB"),
+        ("mysql", "app.db_mysql", "MySQLDB"),
+        ("postgres", "app.db_postgres", "PostgresDB"),
+        ("mssql", "app.db_mssql", "MSSQLDB"),
+    ):
+        try:
+            classes[dbtype] = getattr(__import__(module, fromlist=[name]), name)
+        except ImportError:
+            pass
+    return classes
+
+
+def install(profile: FakeProfile) -> List[str]:
+    """Point every importable client class at fake connections; returns the dbtypes patched."""
+    classes = db_classes()
+    for dbtype, cls in classes.items():
+        cls.open_connection = classmethod(lambda cls, config, dbtype=dbtype: FakeConnection(dbtype, profile))
+    return sorted(classes)
@@ -0,0 +1,298 @@
+"""End-to-end load benchmark: the real app under uvicorn, fake database drivers, concurrent HTTP clients.
+
+    python -m benchmarks.load_bench [--dbtype mysql] [--duration 10] [--concurrency 32]
+                                    [--latency-ms 2] [--rows 100] [--only sqlExec,getRecord] [--json out.json]
+
+The server runs in a child process with benchmarks.fake_drivers installed, so
+pooling, statement caching, converters, serialisation and middleware all run
+as in production while every database round trip costs --latency-ms. With
+--dbtype sqlite the queries run for real against temporary SQLite files
+seeded with --rows rows (the --*-ms options do not apply). Each
+scenario is driven for --duration seconds by --concurrency keep-alive clients
+and reported as requests/s, p50/p99 latency, errors and the server's RSS.
+Save runs with --json and pass one as --compare to print the change per scenario.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import multiprocessing
+import os
+import socket
+import sqlite3
+import statistics
+import tempfile
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+
+from benchmarks.fake_drivers import FakeProfile
+
+API_KEY = "bench-key"
+TABLE = "bench_items"
+# /getRecord results for this table are cached (see RECORD_CACHE_TABLE_TTLS below)
+CACHED_TABLE = "bench_cached"
+
+Scenario = Tuple[str, str, str, Optional[Dict[str, Any]]]  # name, method, path, JSON body
+
+
+def scenarios(dbtype: str) -> List[Scenario]:
+    select = f"SELECT id, name, email, amount, created_at, notes FROM {TABLE} WHERE amount > :amount ORDER BY id"
+    row = {"name": "bench", "email": "bench@example.com", "amount": 12.5}
+    return [
+        ("health", "GET", "/health", None),
+        ("connections", "GET", "/connections", None),
+        ("sample", "GET", f"/{dbtype}/sample", None),
+        ("getRecord", "POST", "/getRecord",
+         {"dbtype": dbtype, "table": TABLE, "parameters": {"id": 42}, "use_cache": False}),
+        ("getRecord cached", "POST", "/getRecord", {"dbtype": dbtype, "table": CACHED_TABLE, "parameters": {"id": 42}}),
+        ("getRecords 50", "POST", "/getRecords",
+         {"dbtype": dbtype, "table": TABLE, "keys": [{"id": i} for i in range(1, 51)]}),
+        ("insertRecord", "POST", "/insertRecord", {"dbtype": dbtype, "table": TABLE, "data": row}),
+        ("insertRecords 500", "POST", "/insertRecords", {"dbtype": dbtype, "table": TABLE, "rows": [row] * 500}),
+        ("updateRecord", "POST", "/updateRecord",
+         {"dbtype": dbtype, "table": TABLE, "data": {"amount": 1}, "where": {"id": 42}}),
+        ("deleteRecord", "POST", "/deleteRecord", {"dbtype": dbtype, "table": TABLE, "where": {"id": 42}}),
+        ("sqlExec exact", "POST", "/sqlExec",
+         {"dbtype": dbtype, "sql": select, "parameters": {"amount": 0}, "count_mode": "exact"}),
+        ("sqlExec cached count", "POST", "/sqlExec",
+         {"dbtype": dbtype, "sql": select, "parameters": {"amount": 0}, "count_mode": "cached"}),
+        ("sqlExec window", "POST", "/sqlExec",
+         {"dbtype": dbtype, "sql": select, "parameters": {"amount": 0}, "count_mode": "window"}),
+        ("sqlExec rows format", "POST", "/sqlExec",
+         {"dbtype": dbtype, "sql": select, "parameters": {"amount": 0}, "count_mode": "none", "format": "rows"}),
+        ("sqlExec keyset", "POST", "/sqlExec",
+         {"dbtype": dbtype, "sql": select, "parameters": {"amount": 0}, "keyset": ["id"]}),
+        ("sqlExec stream", "POST", "/sqlExec",
+         {"dbtype": dbtype, "sql": select, "parameters": {"amount": 0}, "stream": "ndjson"}),
+        ("export csv", "POST", "/export", {"dbtype": dbtype, "sql": select, "parameters": {"amount": 0}}),
+        ("fanout 2", "POST", "/fanout", {
+            "targets": [{"dbtype": dbtype, "server": s, "sql": select, "parameters": {"amount": 0}} for s in ("a", "b")],
+            "merge": True, "order_by": ["id"],
+        }),
+        ("join", "POST", "/join", {
+            "left": {"dbtype": dbtype, "server": "a", "sql": select, "parameters": {"amount": 0}, "keys": ["id"]},
+            "right": {"dbtype": dbtype, "server": "b", "sql": select, "parameters": {"amount": 0}, "keys": ["id"]},
+        }),
+        ("batch 4 ops", "POST", "/batch", {"dbtype": dbtype, "operations": [
+            {"op": "getRecord", "table": TABLE, "parameters": {"id": 1}},
+            {"op": "updateRecord", "table": TABLE, "data": {"amount": 2}, "where": {"id": 1}},
+            {"op": "insertRecord", "table": TABLE, "data": row},
+            {"op": "sqlExec", "sql": select, "parameters": {"amount": 0}, "max_rows": 20},
+        ]}),
+        ("admin cache", "GET", "/admin/cache", None),
+        ("admin slow-queries", "GET", "/admin/slow-queries", None),
+        ("metrics", "GET", "/metrics", None),
+    ]
+
+
+# -- server process -------------------------------------------------------------
+
+def server_environment() -> Dict[str, str]:
+    """Settings for the server process: the benchmark key, servers a and b for every dbtype, one cached table."""
+    servers = json.dumps({"a": {"host": "fake-a"}, "b": {"host": "fake-b"}})
+    return {
+        "API_KEYS": json.dumps([API_KEY]),
+        "APP_MODE": "PROD",
+        "MYSQL_CONFIGS": servers, "PG_CONFIGS": servers, "MSSQL_CONFIGS": servers, "ORACLE_CONFIGS": servers,
+        "RECORD_CACHE_TABLE_TTLS": json.dumps({CACHED_TABLE: 60}),
+    }
+
+
+def seed_sqlite(path: str, rows: int):
+    """Create the benchmark tables in a SQLite file, with the columns the fake drivers return."""
+    conn = sqlite3.connect(path)
+    try:
+        for table in (TABLE, CACHED_TABLE):
+            conn.execute(f"CREATE TABLE {table} (id INTEGER PRIMARY KEY, name TEXT, email TEXT, "
+                         f"amount REAL, created_at TEXT, notes TEXT)")
+            conn.executemany(
+                f"INSERT INTO {table} (name, email, amount, created_at, notes) VALUES (?, ?, ?, ?, ?)",
+                [(f"name {i}", f"user{i}@example.com", i * 7 % 100000 / 100, f"2024-01-01T00:{i % 60:02d}:00",
+                  None if i % 3 else "note") for i in range(1, rows + 1)],
+            )
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def sqlite_environment(directory: str, rows: int) -> Dict[str, str]:
+    """SQLITE_PATH and servers a and b as seeded files in directory."""
+    paths = {name: os.path.join(directory, f"{name}.db") for name in ("default", "a", "b")}
+    for path in paths.values():
+        seed_sqlite(path, rows)
+    return {
+        "SQLITE_PATH": paths["default"],
+        "SQLITE_CONFIGS": json.dumps({name: {"path": paths[name]} for name in ("a", "b")}),
+    }
+
+
+def _serve(port: int, profile: FakeProfile, ready):
+    import uvicorn
+    from benchmarks import fake_drivers
+    from app.main import app
+
+    logging.getLogger().setLevel(logging.ERROR)
+    ready.put(fake_drivers.install(profile))
+    uvicorn.run(app, host="127.0.0.1", port=port, log_level="error", access_log=False)
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def rss_mb(pid: int) -> Tuple[Optional[float], Optional[float]]:
+    """(current, peak) resident set size of a process in MiB, from /proc (None elsewhere)."""
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            fields = dict(line.split(":", 1) for line in f if ":" in line)
+        return int(fields["VmRSS"].split()[0]) / 1024, int(fields["VmHWM"].split()[0]) / 1024
+    except (OSError, KeyError, ValueError):
+        return None, None
+
+
+# -- load generator ---------------------------------------------------------------
+
+async def drive(client: httpx.AsyncClient, scenario: Scenario, duration: float, concurrency: int) -> Dict[str, Any]:
+    name, method, path, body = scenario
+    latencies: List[float] = []
+    errors = 0
+    statuses: Dict[int, int] = {}
+    deadline = time.perf_counter() + duration
+
+    async def worker():
+        nonlocal errors
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            try:
+                response = await client.request(method, path, json=body)
+                await response.aread()
+                statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+                if response.status_code >= 400:
+                    errors += 1
+            except httpx.HTTPError:
+                errors += 1
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    ordered = sorted(latencies)
+    return {
+        "scenario": name,
+        "requests": len(latencies),
+        "errors": errors,
+        "statuses": statuses,
+        "rps": len(latencies) / elapsed if elapsed else 0.0,
+        "p50_ms": statistics.median(ordered) * 1000 if ordered else None,
+        "p99_ms": ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))] * 1000 if ordered else None,
+    }
+
+
+async def run(args, port: int, pid: int) -> List[Dict[str, Any]]:
+    only = {s.strip().lower() for s in args.only.split(",")} if args.only else None
+    selected = [s for s in scenarios(args.dbtype) if only is None or any(o in s[0].lower() for o in only)]
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    results = []
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", headers={"X-API-KEY": API_KEY},
+                                 limits=limits, timeout=60) as client:
+        for scenario in selected:
+            if args.warmup:
+                await drive(client, scenario, args.warmup, args.concurrency)
+            result = await drive(client, scenario, args.duration, args.concurrency)
+            result["rss_mb"], result["peak_rss_mb"] = rss_mb(pid)
+            results.append(result)
+            print(format_row(result), flush=True)
+    return results
+
+
+def format_row(r: Dict[str, Any], baseline: Optional[Dict[str, Any]] = None) -> str:
+    def ms(v):
+        return f"{v:9.2f}" if v is not None else f"{'-':>9}"
+    line = (f"  {r['scenario']:22} {r['rps']:9.1f} {ms(r['p50_ms'])} {ms(r['p99_ms'])} "
+            f"{r['errors']:7d} {r['rss_mb'] or 0:8.1f}")
+    if r["errors"]:
+        line += f"  statuses={r['statuses']}"
+    if baseline:
+        change = (r["rps"] / baseline["rps"] - 1) * 100 if baseline["rps"] else 0.0
+        line += f"  req/s {change:+6.1f}%  p99 {ms(baseline['p99_ms']).strip()} -> {ms(r['p99_ms']).strip()} ms"
+    return line
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dbtype", default="mysql", choices=["oracle", "mysql", "postgres", "mssql", "sqlite"])
+    parser.add_argument("--duration", type=float, default=10, help="Seconds per scenario")
+    parser.add_argument("--warmup", type=float, default=1, help="Unmeasured seconds before each scenario")
+    parser.add_argument("--concurrency", type=int, default=32, help="Concurrent keep-alive clients")
+    parser.add_argument("--latency-ms", type=float, default=2, help="Simulated time per execute()")
+    parser.add_argument("--fetch-latency-ms", type=float, default=0, help="Simulated time per fetch round trip")
+    parser.add_argument("--connect-ms", type=float, default=20, help="Simulated time to open a connection")
+    parser.add_argument("--rows", type=int, default=100, help="Rows returned by an unbounded SELECT (sqlite: rows seeded per table)")
+    parser.add_argument("--only", help="Comma-separated substrings of the scenario names to run")
+    parser.add_argument("--json", help="Write the results to this file")
+    parser.add_argument("--compare", help="Results file from an earlier --json run to compare against")
+    args = parser.parse_args()
+    # Keep per-request client logging out of the report
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    profile = FakeProfile(
+        latency=args.latency_ms / 1000, fetch_latency=args.fetch_latency_ms / 1000,
+        connect_latency=args.connect_ms / 1000, rows=args.rows,
+    )
+    port = _free_port()
+    # The app reads its configuration at import time; the spawned server inherits this environment
+    os.environ.update(server_environment())
+    scratch = None
+    if args.dbtype == "sqlite":
+        scratch = tempfile.TemporaryDirectory(prefix="load-bench-")
+        os.environ.update(sqlite_environment(scratch.name, args.rows))
+    # spawn: the server imports the app in a clean interpreter
+    context = multiprocessing.get_context("spawn")
+    ready = context.Queue()
+    server = context.Process(target=_serve, args=(port, profile, ready), daemon=True)
+    server.start()
+    try:
+        patched = ready.get(timeout=60)
+        if args.dbtype != "sqlite" and args.dbtype not in patched:
+            raise SystemExit(f"The {args.dbtype} driver cannot be imported here (available: {', '.join(patched)})")
+        # Like a load balancer, wait for /ready: the startup warm-up has opened the pools
+        deadline = time.time() + 30
+        while True:
+            try:
+                if httpx.get(f"http://127.0.0.1:{port}/ready", timeout=1).status_code == 200:
+                    break
+            except httpx.HTTPError:
+                pass
+            if time.time() > deadline:
+                raise SystemExit("server did not become ready")
+            time.sleep(0.1)
+
+        latency = "real sqlite files" if args.dbtype == "sqlite" else f"latency={args.latency_ms}ms"
+        print(f"dbtype={args.dbtype} concurrency={args.concurrency} duration={args.duration}s "
+              f"{latency} rows={args.rows} server pid={server.pid}")
+        print(f"  {'scenario':22} {'req/s':>9} {'p50 ms':>9} {'p99 ms':>9} {'errors':>7} {'RSS MiB':>8}")
+        results = asyncio.run(run(args, port, server.pid))
+    finally:
+        server.terminate()
+        server.join(5)
+        if scratch is not None:
+            scratch.cleanup()
+
+    if args.compare:
+        with open(args.compare) as f:
+            before = {r["scenario"]: r for r in json.load(f)["results"]}
+        print(f"\ncompared with {args.compare}:")
+        for r in results:
+            if r["scenario"] in before:
+                print(format_row(r, before[r["scenario"]]))
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"args": vars(args), "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
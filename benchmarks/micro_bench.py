@@ -0,0 +1,218 @@
+"""Micro-benchmarks for the per-request CPU paths: SQL building and row shaping.
+
+    python -m benchmarks.micro_bench [--only bind,shape] [--repeat 15]
+    python -m benchmarks.micro_bench --save            # record benchmarks/baselines/micro.json
+    python -m benchmarks.micro_bench --check [--threshold 0.25]
+
+No database is needed: every case calls the app's own functions on
+synthetic SQL, parameters and rows of realistic sizes. Each case is timed
+with timeit (--repeat samples of enough calls to take 50 ms) and reported
+as the best time per call.
+
+--check compares against the stored baseline and exits with status 1 when a
+case is slower by more than --threshold (0.25 = 25%) in two measurements in
+a row. Baselines are machine-specific, so times are normalised by a fixed
+pure-Python calibration loop measured in the same run; refresh the baseline
+with --save after intentional changes or on new hardware.
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import timeit
+from typing import Any, Callable, Dict, List, Tuple
+
+from app.dialects import compile_lookup, compile_statement, encode_keyset_token, get_dialect
+from app.formats import shape_rows
+from app.serialization import FastJSONResponse, convert_rows, dumps, orjson
+from app.slowlog import fingerprint
+from benchmarks.serialization_bench import COLUMNS, CONVERTERS, envelope, make_rows
+
+BASELINE_FILE = os.path.join(os.path.dirname(__file__), "baselines", "micro.json")
+CALIBRATION = "calibration"
+
+Case = Tuple[str, Callable[[], Any]]
+
+
+# -- inputs -------------------------------------------------------------------
+
+def report_sql(params: int, padding: int) -> str:
+    """A reporting query with `params` :name placeholders, padded with select-list columns to about `padding` chars."""
+    columns = ["u.id", "u.first_name", "u.last_name", "u.email", "o.amount", "o.created_at"]
+    extra = 0
+    while len(", ".join(columns)) < padding:
+        columns.append(f"o.attribute_{extra:03d}")
+        extra += 1
+    predicates = " AND ".join(f"o.col_{i} = :p{i}" for i in range(params))
+    return (
+        f"SELECT {', '.join(columns)} FROM users u JOIN orders o ON o.user_id = u.id "
+        f"WHERE u.created_at::date > :since AND {predicates} ORDER BY u.id, o.created_at DESC"
+    )
+
+
+def report_params(params: int) -> Dict[str, Any]:
+    values: Dict[str, Any] = {f"p{i}": i for i in range(params)}
+    values["since"] = "2024-01-01"
+    return values
+
+
+def streamed_chunk(columns: List[str], rows: List[Any]) -> bytes:
+    """What streaming.py yields per fetch for format=ndjson."""
+    return b"".join(dumps(dict(zip(columns, r))) + b"\n" for r in rows)
+
+
+# -- cases --------------------------------------------------------------------
+
+def _calibrate():
+    total = 0
+    for i in range(1000):
+        total += i * i
+    return total
+
+
+def cases() -> List[Case]:
+    result: List[Case] = [(CALIBRATION, _calibrate)]
+
+    # :name -> driver paramstyle (sqlExec, count and keyset queries)
+    for params, padding in ((3, 200), (20, 2000), (100, 8000)):
+        sql, values = report_sql(params, padding), report_params(params)
+        for dbtype in ("mysql", "mssql"):
+            dialect = get_dialect(dbtype)
+            result.append((f"bind_named {dbtype} {params}p {len(sql)}c",
+                           lambda d=dialect, s=sql, v=values: d.bind_named(s, v)))
+
+    # COUNT / window / keyset rewriting of the caller's SQL
+    for padding in (200, 8000):
+        sql = report_sql(5, padding)
+        for dbtype in ("oracle", "mssql"):
+            dialect = get_dialect(dbtype)
+            result.append((f"count_query {dbtype} {len(sql)}c", lambda d=dialect, s=sql: d.count_query(s)))
+            result.append((f"window_count_query {dbtype} {len(sql)}c",
+                           lambda d=dialect, s=sql: d.window_count_query(s, 100, 200)))
+            result.append((f"keyset_query {dbtype} {len(sql)}c",
+                           lambda d=dialect, s=sql: d.keyset_query(s, ["id", "created_at"], True, False, 100)))
+    sql = report_sql(5, 200)
+    result.append(("keyset token encode", lambda: encode_keyset_token(sql, ["id", "created_at"], False,
+                                                                       [12345, "2024-01-01T10:00:00"])))
+
+    # CRUD statements: the lru_cache hit per request, and the build on a miss
+    columns = tuple(f"column_{i}" for i in range(12))
+    build = compile_statement.__wrapped__
+    result.append(("compile_statement insert 12c cached",
+                   lambda: compile_statement("postgres", "insert", "orders", columns)))
+    result.append(("compile_statement insert 12c build", lambda: build("postgres", "insert", "orders", columns)))
+    result.append(("compile_statement update 12c build",
+                   lambda: build("oracle", "update", "orders", columns, ("id",))))
+    lookup = compile_lookup.__wrapped__
+    result.append(("compile_lookup 500 keys build", lambda: lookup("mysql", "orders", ("id",), 500)))
+    result.append(("compile_lookup 2x500 keys build mssql",
+                   lambda: lookup("mssql", "orders", ("id", "line"), 500)))
+
+    # Slow-query fingerprint on a miss
+    normalise = fingerprint.__wrapped__
+    for params, padding in ((3, 200), (100, 8000)):
+        sql = report_sql(params, padding)
+        result.append((f"fingerprint {len(sql)}c", lambda s=sql: normalise(s)))
+
+    # Row shaping and encoding for a page of results
+    for count in (1, 300, 5000):
+        rows = make_rows(count)
+        converted = convert_rows(rows, CONVERTERS)
+        result.append((f"convert_rows {count}x{len(COLUMNS)}", lambda r=rows: convert_rows(r, CONVERTERS)))
+        result.append((f"dict(zip) {count}x{len(COLUMNS)}",
+                       lambda r=converted: [dict(zip(COLUMNS, row)) for row in r]))
+        for fmt in ("objects", "rows", "columnar"):
+            result.append((f"shape_rows {fmt} {count}x{len(COLUMNS)}",
+                           lambda r=converted, f=fmt: shape_rows(COLUMNS, r, f)))
+        for fmt in ("objects", "rows"):
+            body = envelope(shape_rows(COLUMNS, converted, fmt))
+            result.append((f"encode {fmt} {count}x{len(COLUMNS)}", lambda b=body: FastJSONResponse(b).body))
+        result.append((f"ndjson chunk {count}x{len(COLUMNS)}", lambda r=converted: streamed_chunk(COLUMNS, r)))
+    return result
+
+
+# -- measurement --------------------------------------------------------------
+
+SAMPLE_SECONDS = 0.05
+
+
+def measure(fn: Callable[[], Any], repeat: int) -> float:
+    """Best seconds per call over `repeat` samples of at least SAMPLE_SECONDS each."""
+    timer = timeit.Timer(fn)
+    number = 1
+    while timer.timeit(number) < SAMPLE_SECONDS:
+        number *= 2
+    return min(timer.repeat(repeat=repeat, number=number)) / number
+
+
+def _format_time(seconds: float) -> str:
+    if seconds >= 1e-3:
+        return f"{seconds * 1e3:9.3f} ms"
+    return f"{seconds * 1e6:9.2f} us"
+
+
+def changes(results: Dict[str, float], baseline: Dict[str, float]) -> Dict[str, Tuple[float, float]]:
+    """(expected seconds, relative change) per case in both runs, scaled by the calibration ratio."""
+    scale = 1.0
+    if results.get(CALIBRATION) and baseline.get(CALIBRATION):
+        scale = results[CALIBRATION] / baseline[CALIBRATION]
+    return {
+        name: (baseline[name] * scale, seconds / (baseline[name] * scale) - 1)
+        for name, seconds in results.items()
+        if name != CALIBRATION and baseline.get(name)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--only", help="Comma-separated substrings of the case names to run")
+    parser.add_argument("--repeat", type=int, default=15, help="Samples per case (the best one counts)")
+    parser.add_argument("--save", action="store_true", help="Store the results as the baseline")
+    parser.add_argument("--check", action="store_true", help="Compare with the baseline; exit 1 on a regression")
+    parser.add_argument("--threshold", type=float, default=0.25, help="Allowed slowdown for --check (0.25 = 25%%)")
+    parser.add_argument("--baseline", default=BASELINE_FILE, help="Baseline file for --save / --check")
+    args = parser.parse_args()
+
+    only = [o.strip().lower() for o in args.only.split(",")] if args.only else None
+    selected = [(n, f) for n, f in cases() if n == CALIBRATION or only is None or any(o in n.lower() for o in only)]
+    if args.save and only:
+        parser.error("--save records every case; drop --only")
+
+    print(f"Python {platform.python_version()}, encoder: {'orjson' if orjson else 'json'}")
+    results: Dict[str, float] = {}
+    for name, fn in selected:
+        results[name] = measure(fn, args.repeat)
+        print(f"  {name:44} {_format_time(results[name])}", flush=True)
+
+    if args.check:
+        with open(args.baseline) as f:
+            baseline = json.load(f)["results"]
+        # A slowdown must reproduce: cases over the threshold are measured once more and keep their best time
+        suspects = [n for n, (_, change) in changes(results, baseline).items() if change > args.threshold]
+        for name, fn in selected:
+            if name in suspects or name == CALIBRATION:
+                results[name] = min(results[name], measure(fn, args.repeat))
+        compared = changes(results, baseline)
+        print(f"\ncompared with {args.baseline} (threshold +{args.threshold:.0%}):")
+        regressed = []
+        for name, (expected, change) in compared.items():
+            flag = ""
+            if change > args.threshold:
+                flag = "  REGRESSION"
+                regressed.append(name)
+            print(f"  {name:44} {_format_time(expected)} -> {_format_time(results[name])}  {change:+7.1%}{flag}")
+        if regressed:
+            print(f"\n{len(regressed)} case(s) slower than the baseline by more than {args.threshold:.0%}")
+            sys.exit(1)
+    if args.save:
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, "w") as f:
+            json.dump({"python": platform.python_version(), "machine": platform.machine(),
+                       "repeat": args.repeat, "results": results}, f, indent=2)
+            f.write("\n")
+        print(f"\nBaseline written to {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""Compare response serialisation paths on a 300-row /sqlExec page.
+
+    python -m benchmarks.serialization_bench [--rows 300] [--repeat 200]
+
+baseline: row dicts -> jsonable_encoder -> JSONResponse (FastAPI's default path)
+fast:     column converters -> FastJSONResponse (orjson when installed)
+"""
+import argparse
+import datetime
+import decimal
+import json
+import statistics
+import time
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from app.formats import shape_rows
+from app.serialization import FastJSONResponse, bytes_to_text, convert_rows, decimal_to_number, orjson
+
+COLUMNS = [
+    "id", "student_id", "amount", "credits", "created_at", "birth_date",
+    "first_name", "last_name", "email", "photo", "notes", "active",
+]
+# What an Oracle/MySQL client would derive from cursor.description for these columns
+CONVERTERS = [None, decimal_to_number, decimal_to_number, decimal_to_number, None, None,
+              None, None, None, bytes_to_text, None, None]
+
+
+def make_rows(n):
+    base = datetime.datetime(2024, 1, 1, 11, 0, 0)
+    return [
+        (
+            i,
+            decimal.Decimal(200000000 + i),
+            decimal.Decimal(f"{i * 3}.{i % 100:02d}"),
+            decimal.Decimal("3.0"),
+            base + datetime.timedelta(minutes=i),
+            datetime.date(2000, 1, 1) + datetime.timedelta(days=i),
+            f"First{i}",
+            f"Last{i}",
+            f"user{i}@yorku.ca",
+            f"RAW{i:08x}".encode(),  # jsonable_encoder can only .decode() utf-8 bytes
+            None if i % 3 else "note",
+            bool(i % 2),
+        )
+        for i in range(n)
+    ]
+
+
+def envelope(records):
+    return {"status": "success", "dbtype": "oracle", "server": "default", "pagination": {"page": 1}, **records}
+
+
+def baseline(rows):
+    records = [dict(zip(COLUMNS, r)) for r in rows]
+    return JSONResponse(jsonable_encoder(envelope({"records": records}))).body
+
+
+def fast(rows, fmt="objects"):
+    converted = convert_rows(rows, CONVERTERS)
+    return FastJSONResponse(envelope(shape_rows(COLUMNS, converted, fmt))).body
+
+
+def measure(fn, rows, repeat):
+    fn(rows)  # warm-up
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(rows)
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples), len(fn(rows))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=300)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    rows = make_rows(args.rows)
+    # Both paths must produce the same document
+    assert json.loads(baseline(rows)) == json.loads(fast(rows)), "fast path output differs from jsonable_encoder"
+
+    print(f"{args.rows} rows x {len(COLUMNS)} columns, median of {args.repeat} runs "
+          f"(encoder: {'orjson' if orjson else 'json'})")
+    base_ms, base_bytes = measure(baseline, rows, args.repeat)
+    print(f"  {'baseline (jsonable_encoder)':32} {base_ms:8.3f} ms {base_bytes:9d} bytes")
+    for fmt in ("objects", "rows", "columnar"):
+        ms, size = measure(lambda r: fast(r, fmt), rows, args.repeat)
+        print(f"  {'fast, format=' + fmt:32} {ms:8.3f} ms {size:9d} bytes  ({base_ms / ms:5.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
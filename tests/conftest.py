@@ -0,0 +1,13 @@
+"""Test settings; app.config reads the environment on import, so they are set before any app module loads."""
+import json
+import os
+import tempfile
+
+_DIR = tempfile.mkdtemp()
+os.environ.update({
+    "API_KEY": "test-key",
+    "SQLITE_PATH": os.path.join(_DIR, "tests.db"),
+    # Second SQLite server for tests that need connections of their own
+    "SQLITE_CONFIGS": json.dumps({"typed": {"path": os.path.join(_DIR, "typed.db")}}),
+    "WARMUP_ENABLED": "false",
+})
@@ -0,0 +1,47 @@
+"""RecordCache invalidation: stale reads and schema-qualified table names."""
+from app.cache import RecordCache
+
+ROWS = [{"id": 1, "name": "old"}]
+
+
+def _cache():
+    return RecordCache(max_entries=100, max_bytes=1 << 20, ttl=60, table_ttls={})
+
+
+def test_put_after_overlapping_write_is_dropped():
+    cache = _cache()
+    key = RecordCache.make_key("sqlite", "default", "users", "*", {"id": 1})
+    generation = cache.generation("sqlite", "default", "users")
+    # A write commits and invalidates while the read is in flight
+    cache.invalidate_table("sqlite", "default", "users")
+    cache.put(key, ROWS, generation)
+    assert cache.get(key) is None
+
+    cache.put(key, ROWS, cache.generation("sqlite", "default", "users"))
+    assert cache.get(key) == ROWS
+
+
+def test_schema_qualified_and_bare_names_invalidate_each_other():
+    cache = _cache()
+    bare = RecordCache.make_key("sqlite", "default", "users", "*", {"id": 1})
+    qualified = RecordCache.make_key("sqlite", "default", "hr.users", "*", {"id": 1})
+    cache.put(bare, ROWS)
+    cache.put(qualified, ROWS)
+
+    assert cache.invalidate_table("sqlite", "default", "HR.Users") == 2
+    assert cache.get(bare) is None and cache.get(qualified) is None
+
+    cache.put(qualified, ROWS)
+    generation = cache.generation("sqlite", "default", "hr.users")
+    cache.invalidate_table("sqlite", "default", "users")
+    assert cache.get(qualified) is None
+    cache.put(qualified, ROWS, generation)
+    assert cache.get(qualified) is None
+
+
+def test_other_servers_are_untouched():
+    cache = _cache()
+    key = RecordCache.make_key("sqlite", "other", "users", "*", {"id": 1})
+    cache.put(key, ROWS)
+    cache.invalidate_table("sqlite", "default", "users")
+    assert cache.get(key) == ROWS
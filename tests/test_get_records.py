@@ -0,0 +1,61 @@
+"""/getRecords: a key finds the rows the database matches for it, as /getRecord would."""
+import functools
+import json
+import sqlite3
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.config import SQLITE_CONFIGS
+from app.main import app
+
+HEADERS = {"X-API-KEY": "test-key"}
+
+
+@pytest.fixture(scope="module")
+def client():
+    conn = sqlite3.connect(SQLITE_CONFIGS["typed"]["path"])
+    conn.execute("CREATE TABLE codes (code TEXT COLLATE NOCASE, padded TEXT COLLATE RTRIM, label TEXT, ratio REAL)")
+    conn.execute("INSERT INTO codes VALUES ('AbC', 'XY  ', 'first', 0.5)")
+    conn.execute("CREATE TABLE events (created_at TIMESTAMP, label TEXT)")
+    conn.execute("INSERT INTO events VALUES ('2024-01-01 10:00:00', 'launch')")
+    conn.commit()
+    conn.close()
+    # Typed connections return TIMESTAMP columns as datetime, like the Oracle, Postgres and MySQL drivers
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr(sqlite3, "connect", functools.partial(sqlite3.connect, detect_types=sqlite3.PARSE_DECLTYPES))
+        with TestClient(app) as c:
+            yield c
+
+
+def _get_records(client, table, keys):
+    body = {"dbtype": "sqlite", "server": "typed", "table": table, "keys": keys}
+    response = client.post("/getRecords", content=json.dumps(body), headers=HEADERS)
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def test_case_insensitive_key(client):
+    body = _get_records(client, "codes", [{"code": "abc"}, {"code": "ABC"}, {"code": "abd"}])
+    assert [r["found"] for r in body["results"]] == [True, True, False]
+    assert body["results"][0]["record"]["code"] == "AbC"
+    single = client.post("/getRecord", json={"dbtype": "sqlite", "server": "typed", "table": "codes",
+                                             "parameters": {"code": "abc"}, "use_cache": False}, headers=HEADERS)
+    assert single.json()["record"] == body["results"][0]["record"]
+
+
+def test_padded_key(client):
+    body = _get_records(client, "codes", [{"padded": "XY"}])
+    assert body["results"][0]["found"]
+
+
+def test_timestamp_key(client):
+    body = _get_records(client, "events", [{"created_at": "2024-01-01 10:00:00"}])
+    [result] = body["results"]
+    assert result["found"]
+    assert result["record"] == {"created_at": "2024-01-01T10:00:00", "label": "launch"}
+
+
+def test_non_finite_key_is_not_an_error(client):
+    body = _get_records(client, "codes", [{"ratio": float("nan")}, {"ratio": float("inf")}, {"ratio": 0.5}])
+    assert [r["found"] for r in body["results"]] == [False, False, True]
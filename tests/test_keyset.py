@@ -0,0 +1,57 @@
+"""Keyset pagination: continuation tokens carry the driver's key values unchanged."""
+import decimal
+import os
+import sqlite3
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.dialects import decode_keyset_token, encode_keyset_token
+from app.main import app
+
+HEADERS = {"X-API-KEY": "test-key"}
+SQL = "SELECT k, label FROM items"
+
+
+@pytest.fixture(scope="module")
+def client():
+    conn = sqlite3.connect(os.environ["SQLITE_PATH"])
+    conn.execute("CREATE TABLE items (k BLOB PRIMARY KEY, label TEXT)")
+    conn.executemany("INSERT INTO items VALUES (?, ?)", [(bytes([0, i, 255]), f"item{i}") for i in range(7)])
+    conn.commit()
+    conn.close()
+    with TestClient(app) as c:
+        yield c
+
+
+@pytest.mark.parametrize("value", [
+    b"\x00\xff\x80",
+    bytearray(b"\x01\x02"),
+    memoryview(b"\xfe\x00"),
+    decimal.Decimal("12345678901234567890.123456789"),
+])
+def test_token_round_trips_driver_values(value):
+    token = encode_keyset_token(SQL, ["k"], False, [value])
+    [decoded] = decode_keyset_token(token, SQL, ["k"], False)
+    expected = bytes(value) if isinstance(value, (bytearray, memoryview)) else value
+    assert decoded == expected
+    assert type(decoded) is type(expected)
+
+
+def test_blob_keyset_pages_advance(client):
+    labels = []
+    token = None
+    for _ in range(10):
+        body = {"dbtype": "sqlite", "sql": SQL, "keyset": ["k"], "page_size": 3}
+        if token:
+            body["continuation_token"] = token
+        response = client.post("/sqlExec", json=body, headers=HEADERS)
+        assert response.status_code == 200, response.text
+        payload = response.json()
+        labels += [row["label"] for row in payload["records"]]
+        token = payload["pagination"]["next_token"]
+        if token is None:
+            break
+        [last] = decode_keyset_token(token, SQL, ["k"], False)
+        assert isinstance(last, bytes)
+    assert labels == [f"item{i}" for i in range(7)]
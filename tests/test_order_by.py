@@ -0,0 +1,72 @@
+"""Splitting off the query's own ORDER BY for the window and keyset pagination modes."""
+import os
+import sqlite3
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.dialects import UnsupportedQuery, get_dialect, split_order_by
+from app.main import app
+
+HEADERS = {"X-API-KEY": "test-key"}
+
+
+@pytest.mark.parametrize("sql, body, order", [
+    ("SELECT id FROM t ORDER BY id", "SELECT id FROM t", "id"),
+    ("SELECT a, b FROM t\nORDER BY a,\n  b DESC", "SELECT a, b FROM t", "a,\n  b DESC"),
+    ("SELECT id, ROW_NUMBER() OVER (\nORDER BY id) rn FROM t",
+     "SELECT id, ROW_NUMBER() OVER (\nORDER BY id) rn FROM t", None),
+    ("SELECT id FROM (SELECT id FROM t ORDER BY id) s",
+     "SELECT id FROM (SELECT id FROM t ORDER BY id) s", None),
+    ("SELECT id FROM t WHERE note = ' order by x' -- order by y\nORDER BY id",
+     "SELECT id FROM t WHERE note = ' order by x' -- order by y", "id"),
+    ("SELECT id, RANK() OVER (ORDER BY score) r FROM t ORDER BY r", "SELECT id, RANK() OVER (ORDER BY score) r FROM t", "r"),
+])
+def test_split_order_by(sql, body, order):
+    assert split_order_by(sql) == (body, order)
+
+
+@pytest.mark.parametrize("sql", [
+    "SELECT id FROM t ORDER BY id LIMIT 10",
+    "SELECT id FROM t ORDER BY id OFFSET 5 ROWS",
+    "SELECT id FROM t WHERE (a = 1 ORDER BY id",
+    "SELECT id FROM t WHERE name = 'x ORDER BY id",
+])
+def test_unsplittable_queries(sql):
+    with pytest.raises(UnsupportedQuery):
+        split_order_by(sql)
+
+
+def test_keyset_query_moves_multiline_order_out_of_subquery():
+    sql = get_dialect("mssql").keyset_query("SELECT a, b FROM t\nORDER BY a,\n b", ["a"], False, False, 10)
+    assert sql == "SELECT * FROM (SELECT a, b FROM t) keyset_q ORDER BY a OFFSET 0 ROWS FETCH NEXT 10 ROWS ONLY"
+
+
+@pytest.fixture(scope="module")
+def client():
+    conn = sqlite3.connect(os.environ["SQLITE_PATH"])
+    conn.execute("CREATE TABLE scores (id INTEGER PRIMARY KEY, score INTEGER)")
+    conn.executemany("INSERT INTO scores VALUES (?, ?)", [(i, i * 10 % 7) for i in range(1, 8)])
+    conn.commit()
+    conn.close()
+    with TestClient(app) as c:
+        yield c
+
+
+def _sql_exec(client, **body):
+    return client.post("/sqlExec", json={"dbtype": "sqlite", "page_size": 3, **body}, headers=HEADERS)
+
+
+def test_window_mode_keeps_order_by_inside_over(client):
+    response = _sql_exec(client, sql="SELECT id, ROW_NUMBER() OVER (\nORDER BY id DESC) rn FROM scores\nORDER BY\n  id",
+                         count_mode="window")
+    assert response.status_code == 200, response.text
+    payload = response.json()
+    assert payload["pagination"]["total_records"] == 7
+    assert [r["rn"] for r in payload["records"]] == [7, 6, 5]
+
+
+def test_unsplittable_order_by_is_a_400(client):
+    sql = "SELECT id FROM scores ORDER BY id LIMIT 5"
+    assert _sql_exec(client, sql=sql, count_mode="window").status_code == 400
+    assert _sql_exec(client, sql=sql, keyset=["id"]).status_code == 400